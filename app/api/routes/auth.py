@@ -40,5 +40,5 @@ def login_json(payload: schemas.UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=schemas.UserOut)
-def me(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def me(current_user: models.User = Depends(get_current_user)):
     return current_user
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.schemas.places_schemas import AutocompleteOut, SuggestionOut
+from app.services.autocomplete import autocomplete_index
+
+router = APIRouter(tags=["places"])
+
+
+# async and DB-free: answered from the in-process index without a threadpool hop
+@router.get("/autocomplete", response_model=AutocompleteOut)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    kind: Optional[List[Literal["place", "dish", "category", "district"]]] = Query(None),
+):
+    if not autocomplete_index.ready:
+        raise HTTPException(status_code=503, detail="autocomplete index is still building",
+                            headers={"Retry-After": "5"})
+    found = autocomplete_index.suggest(q, limit=limit, kinds=set(kind) if kind else None)
+    return AutocompleteOut(
+        q=q, items=[SuggestionOut(kind=s.kind, text=s.text, place_id=s.place_id) for s in found]
+    )
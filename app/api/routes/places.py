@@ -1,15 +1,20 @@
 from __future__ import annotations
+from datetime import datetime
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 from geoalchemy2.types import Geometry
+from app.core.paginator import paginate_query
 from app.database import get_db
+from app.deps import require_admin
+from app.services.principals import Principal
 from app.services.geocoding import geocode_address
 from app.models import models
 from app.schemas import places_schemas
 from app.services import places_crud
 from app.services.places_crud import _to_placeout_row
+from app.services.opening_hours import open_at_clause, resolve_open_minute
 
 router = APIRouter(prefix="/places", tags=["places"])
 
@@ -41,6 +46,8 @@ def _to_placeout_with_distance(row, db: Optional[Session] = None) -> places_sche
         website=place.website,
         price_level=place.price_level,
         rating=float(place.rating) if place.rating is not None else None,
+        review_count=place.review_count or 0,
+        rating_score=float(place.rating_score) if place.rating_score is not None else None,
         is_public=place.is_public,
         status=place.status,
         slug=place.slug,
@@ -80,18 +87,20 @@ def create_place(payload: places_schemas.PlaceCreate, db: Session = Depends(get_
     # now helper reads ST_X/ST_Y from DB
     return _to_placeout_with_distance((place, None), db)
 
-@router.get("/", response_model=List[places_schemas.PlaceOut])
-def list_places(
+def _listing_query(
     db: Session = Depends(get_db),
     q: Optional[str] = Query(None, description="Tìm theo tên/địa chỉ"),
     category: Optional[str] = Query(None, description="Category slug"),
     min_price: Optional[int] = Query(None, ge=1, le=5),
     max_price: Optional[int] = Query(None, ge=1, le=5),
+    min_rating: Optional[float] = Query(None, ge=0, le=5, description="Điểm đánh giá tối thiểu (đã làm mượt)"),
+    sort: str = Query("newest", pattern="^(newest|rating)$"),
     only_public: bool = True,
     only_approved: bool = True,
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    open_now: bool = Query(False, description="Chỉ quán đang mở cửa"),
+    open_at: Optional[datetime] = Query(None, description="Chỉ quán mở cửa vào thời điểm này"),
 ):
+    """Filtered, ordered listing query shared by ``/places/`` and ``/places/paged``."""
     query = (
         db.query(
             models.Place,
@@ -122,23 +131,57 @@ def list_places(
     if max_price is not None:
         query = query.filter(models.Place.price_level <= max_price)
 
+    if min_rating is not None:
+        query = query.filter(models.Place.rating_score >= min_rating)
+
+    open_minute = resolve_open_minute(open_now, open_at)
+    if open_minute is not None:
+        query = query.filter(open_at_clause(open_minute))
+
 
-    query = query.order_by(models.Place.created_at.desc())
+    if sort == "rating":
+        query = query.order_by(models.Place.rating_score.desc(), models.Place.id.desc())
+    else:
+        query = query.order_by(models.Place.created_at.desc(), models.Place.id.desc())
+    return query
 
+@router.get("/", response_model=List[places_schemas.PlaceOut])
+def list_places(
+    query=Depends(_listing_query),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
     rows = query.limit(limit).offset(offset).all()
     return [_to_placeout_row(r) for r in rows]
 
+@router.get("/paged", response_model=places_schemas.PlacePage)
+def list_places_paged(
+    db: Session = Depends(get_db),
+    query=Depends(_listing_query),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=200),
+    count: str = Query("auto", pattern="^(exact|estimate|auto)$",
+                       description="auto: planner estimate for large result sets"),
+):
+    """Same filters as ``/places/`` with the pagination envelope (total, pages)."""
+    page_ = paginate_query(db, query.statement, page, page_size, count=count)
+    page_["listings"] = [_to_placeout_row(tuple(r.values())) for r in page_["listings"]]
+    return page_
+
 @router.get("/map")
 def list_places_geojson(
     lon: float, lat: float,
     limit: int = 200,
     radius_km: float | None = None,
+    open_now: bool = False,
+    open_at: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
     radius_m = int(radius_km * 1000) if radius_km else None
     rows = places_crud.list_places_nearby(
         db, lon=lon, lat=lat, radius_m=radius_m,
         only_public=True, only_approved=True,
+        open_minute=resolve_open_minute(open_now, open_at),
         limit=limit, offset=0
     )
 
@@ -160,6 +203,38 @@ def list_places_geojson(
         })
     return {"type": "FeatureCollection", "features": features}
 
+@router.get("/search/dishes", response_model=List[places_schemas.PlaceDishOut])
+def search_dishes(
+    q: str = Query(..., min_length=2, max_length=100, description="Tên món, vd. bún chả"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=50),
+    min_price_vnd: Optional[int] = Query(None, ge=0),
+    max_price_vnd: Optional[int] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=422, detail="lat and lon go together")
+    return places_crud.search_dishes(
+        db, q,
+        lon=lon, lat=lat, radius_m=int(radius_km * 1000) if radius_km else None,
+        min_price=min_price_vnd, max_price=max_price_vnd, limit=limit,
+    )
+
+@router.post("/moderation", response_model=places_schemas.PlaceModerationOut)
+def moderate_places(
+    payload: places_schemas.PlaceModerationIn,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(require_admin),
+):
+    flt = payload.filter or places_schemas.PlaceModerationFilter()
+    return places_crud.bulk_moderate(
+        db, payload.action, ids=payload.ids,
+        status=flt.status, city=flt.city, district=flt.district,
+        moderator_id=admin.id,
+    )
+
 @router.get("/{place_id}", response_model=places_schemas.PlaceOut)
 def get_place(place_id: int, db: Session = Depends(get_db)):
     place = places_crud.get_place(db, place_id)
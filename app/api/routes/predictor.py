@@ -1,22 +1,69 @@
 import json
+import time
 from pathlib import Path
+from typing import List
 
-import joblib
-from core.config import INPUT_EXAMPLE
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from app.core.batching import MicroBatcher
+from app.core.cache import TTLCache
+from app.core.metrics import batch_size_observer
+from app.core.config import (
+    HEALTH_CHECK_INTERVAL,
+    INPUT_EXAMPLE,
+    PREDICT_BATCH_MAX_BYTES,
+    PREDICT_BATCH_MAX_ROWS,
+    PREDICT_CACHE_SIZE,
+    PREDICT_CACHE_TTL,
+    PREDICT_MAX_BATCH_SIZE,
+    PREDICT_MAX_LATENCY_MS,
+)
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.concurrency import run_in_threadpool
-from models.prediction import (
+from app.core.errors import ModelLoadException, PredictException
+from app.models.prediction import (
+    FEATURES,
     HealthResponse,
+    MachineLearningBatchResponse,
     MachineLearningDataInput,
     MachineLearningResponse,
 )
-from services.predict import MachineLearningModelHandlerScore as model
+from app.services.predict import (
+    MachineLearningModelHandlerScore as model,
+    load_model_file,
+    matrix_from_arrow,
+    matrix_from_columns,
+    matrix_from_npy,
+    matrix_from_rows,
+)
 
 router = APIRouter()
 
 
 def get_prediction(data_point):
-    return model.predict(data_point, load_wrapper=joblib.load, method="predict")
+    return model.predict(data_point, load_wrapper=load_model_file, method="predict")
+
+
+def predict_rows(rows: List[np.ndarray]) -> List[float]:
+    """Batch handler: stack the 1xN inputs into one matrix, one model call."""
+    matrix = np.vstack(rows)
+    predictions = np.asarray(get_prediction(matrix), dtype=float).reshape(-1)
+    if len(predictions) != len(rows):
+        raise ValueError(f"model returned {len(predictions)} predictions for {len(rows)} rows")
+    return predictions.tolist()
+
+
+# Concurrent /predict calls share one vectorized model.predict
+prediction_batcher = MicroBatcher(
+    predict_rows, max_batch_size=PREDICT_MAX_BATCH_SIZE, max_wait_ms=PREDICT_MAX_LATENCY_MS,
+    on_batch=batch_size_observer("predict"),
+)
+
+
+# (model_version, feature bytes) -> prediction; a hot swap changes the version
+prediction_cache = TTLCache(maxsize=PREDICT_CACHE_SIZE, ttl=PREDICT_CACHE_TTL)
+
+# Last readiness check result, shared by /health probes
+_readiness = {"status": False, "checked_at": None, "model_version": None}
 
 
 def get_prediction_label(prediction):
@@ -35,11 +82,11 @@ async def predict(data_input: MachineLearningDataInput):
         raise HTTPException(status_code=404, detail="'data_input' argument invalid!")
     try:
         data_point = data_input.get_np_array()
-        prediction = await run_in_threadpool(get_prediction, data_point)
-        try:
-            prediction = float(prediction[0])
-        except (TypeError, IndexError, KeyError):
-            prediction = float(prediction)
+        key = (model.model_version, data_point.tobytes())
+        prediction = prediction_cache.get(key)
+        if prediction is None:
+            prediction = await prediction_batcher.submit(data_point)
+            prediction_cache.set(key, prediction)
         prediction_label = get_prediction_label(prediction)
     except Exception as err:
         raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
@@ -49,17 +96,116 @@ async def predict(data_input: MachineLearningDataInput):
     )
 
 
+_BATCH_BODY = {
+    "requestBody": {
+        "content": {
+            "application/json": {
+                "schema": {
+                    "oneOf": [
+                        {"type": "object", "properties": {"rows": {"type": "array", "items": MachineLearningDataInput.model_json_schema()}}},
+                        {"type": "object", "properties": {"columns": {"type": "object", "properties": {f: {"type": "array", "items": {"type": "number"}} for f in FEATURES}}}},
+                    ]
+                }
+            },
+            "application/x-npy": {"schema": {"type": "string", "format": "binary"}},
+            "application/vnd.apache.arrow.stream": {"schema": {"type": "string", "format": "binary"}},
+        },
+        "required": True,
+    }
+}
+
+
+async def _read_body(request: Request) -> bytes:
+    """The request body, refused with a 413 as soon as it exceeds PREDICT_BATCH_MAX_BYTES."""
+    too_large = HTTPException(status_code=413, detail=f"At most {PREDICT_BATCH_MAX_BYTES} bytes per batch")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > PREDICT_BATCH_MAX_BYTES:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():  # chunked uploads have no Content-Length
+        size += len(chunk)
+        if size > PREDICT_BATCH_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _read_matrix(request: Request) -> np.ndarray:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    body = await _read_body(request)
+    if content_type == "application/x-npy":
+        return matrix_from_npy(body)
+    if content_type == "application/vnd.apache.arrow.stream":
+        return matrix_from_arrow(body)
+    payload = json.loads(body)
+    if "columns" in payload:
+        return matrix_from_columns(payload["columns"])
+    return matrix_from_rows(payload["rows"])
+
+
+@router.post(
+    "/predict/batch",
+    response_model=MachineLearningBatchResponse,
+    name="predict:get-batch",
+    openapi_extra=_BATCH_BODY,
+)
+async def predict_batch(request: Request):
+    """Score many rows with one model call; JSON rows/columns, NPY or Arrow input."""
+    try:
+        matrix = await _read_matrix(request)
+    except PredictException as err:
+        raise HTTPException(status_code=415, detail=str(err))
+    except (ValueError, KeyError, TypeError) as err:
+        raise HTTPException(status_code=422, detail=f"Invalid batch input: {err}")
+    if len(matrix) > PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {PREDICT_BATCH_MAX_ROWS} rows per batch")
+    if not len(matrix):
+        return MachineLearningBatchResponse(count=0, predictions=[], prediction_labels=[])
+
+    try:
+        predictions = np.asarray(await run_in_threadpool(get_prediction, matrix), dtype=float).reshape(-1)
+    except Exception as err:
+        raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
+    labels = np.where(predictions == 1, "label ok", "label nok")
+    return MachineLearningBatchResponse(
+        count=len(predictions), predictions=predictions.tolist(), prediction_labels=labels.tolist()
+    )
+
+
+def _check_ready():
+    test_input = MachineLearningDataInput(**json.loads(Path(INPUT_EXAMPLE).read_text()))
+    get_prediction(test_input.get_np_array())
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
     name="health:get-data",
 )
 async def health():
-    try:
-        content = await run_in_threadpool(Path(INPUT_EXAMPLE).read_text)
-        test_input = MachineLearningDataInput(**json.loads(content))
-        test_point = test_input.get_np_array()
-        await run_in_threadpool(get_prediction, test_point)
-        return HealthResponse(status=True)
-    except Exception:
+    """Readiness: a real prediction on the example input, reused for HEALTH_CHECK_INTERVAL."""
+    now = time.monotonic()
+    if (
+        _readiness["checked_at"] is None
+        or now - _readiness["checked_at"] >= HEALTH_CHECK_INTERVAL
+        or _readiness["model_version"] != model.model_version
+    ):
+        try:
+            await run_in_threadpool(_check_ready)
+            status = True
+        except (Exception, ModelLoadException):
+            status = False
+        _readiness.update(status=status, checked_at=now, model_version=model.model_version)
+    if not _readiness["status"]:
         raise HTTPException(status_code=404, detail="Unhealthy")
+    return HealthResponse(status=True)
+
+
+@router.get(
+    "/live",
+    response_model=HealthResponse,
+    name="liveness:get-data",
+)
+async def live():
+    """Liveness: the process answers; no model work."""
+    return HealthResponse(status=True)
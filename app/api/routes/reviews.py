@@ -0,0 +1,43 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.deps import get_current_principal
+from app.models import models
+from app.schemas import places_schemas
+from app.services.principals import Principal
+from app.services import reviews_crud
+
+router = APIRouter(prefix="/places", tags=["reviews"])
+
+
+@router.get("/{place_id}/reviews", response_model=places_schemas.ReviewPage)
+def list_place_reviews(
+    place_id: int,
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor của trang trước"),
+):
+    rows, next_cursor = reviews_crud.list_reviews(db, place_id, limit=limit, cursor=cursor)
+    if not rows and not cursor:
+        if not db.query(models.Place.id).filter(models.Place.id == place_id).first():
+            raise HTTPException(status_code=404, detail="Place not found")
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+@router.post(
+    "/{place_id}/reviews",
+    response_model=places_schemas.ReviewOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_place_review(
+    place_id: int,
+    payload: places_schemas.ReviewIn,
+    principal: Principal = Depends(get_current_principal),
+):
+    return await reviews_crud.review_writer.submit({
+        "place_id": place_id,
+        "user_id": principal.id,
+        "rating": payload.rating,
+        "content": payload.content,
+    })
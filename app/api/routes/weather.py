@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from zoneinfo import ZoneInfo
 import datetime
 
 from app.database import get_db
 from app.services import weather_crud as crud
-from app.schemas.weather_schemas import WeatherTodayOut, PlaceOut
-from app.services.weather import fetch_weather_cached, parse_weather, bucket_from, suggestion
+from app.services.opening_hours import resolve_open_minute
+from app.schemas.weather_schemas import (
+    WeatherTodayOut, WeatherForecastOut, ForecastHourOut, BucketSuggestionOut, PlaceOut,
+    WeatherBatchIn, WeatherBatchOut, WeatherPointOut,
+)
+from app.services.weather import (
+    fetch_weather_cached, fetch_weather_many, fetch_forecast_cached, parse_weather, parse_forecast,
+    hourly_from_slots, bucket_from, suggestion, grid_cell,
+)
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
@@ -18,17 +25,19 @@ def weather_today(
     radius_km: float | None = Query(3.0),
     ttl_sec: int = Query(900, ge=60, le=7200),  
     include_raw: bool = Query(False),
+    open_now: bool = Query(False),
+    open_at: datetime.datetime | None = Query(None),
 ):
     raw = fetch_weather_cached(lat, lon, ttl_sec=ttl_sec)
     t, f, h, cond = parse_weather(raw)
     bucket = bucket_from(f, cond)
     text, tags = suggestion(bucket)
 
-    places = crud.find_places_for_bucket(db, bucket=bucket, lat=lat, lon=lon, radius_km=radius_km, limit=12)
-    out_places = [PlaceOut(
-        id=p.id, name=p.name, address=p.address, district=p.district, city=p.city,
-        rating=float(p.rating) if p.rating is not None else None
-    ) for p in places]
+    places = crud.find_places_for_bucket(
+        db, bucket=bucket, lat=lat, lon=lon, radius_km=radius_km, limit=12,
+        open_minute=resolve_open_minute(open_now, open_at),
+    )
+    out_places = [PlaceOut(**p) for p in places]
 
     day = datetime.datetime.now(ZoneInfo("Asia/Bangkok")).date().isoformat()
     return WeatherTodayOut(
@@ -36,3 +45,82 @@ def weather_today(
         condition=cond, bucket=bucket, suggestion_text=text, suggestion_tags=tags,
         places=out_places, raw=raw if include_raw else None
     )
+
+@router.get("/forecast", response_model=WeatherForecastOut)
+def weather_forecast(
+    db: Session = Depends(get_db),
+    lat: float = Query(21.0278),
+    lon: float = Query(105.8342),
+    hours: int = Query(12, ge=1, le=72),
+    radius_km: float | None = Query(3.0),
+    limit: int = Query(12, ge=1, le=50),
+    ttl_sec: int = Query(1800, ge=300, le=7200),
+):
+    raw = fetch_forecast_cached(lat, lon, ttl_sec=ttl_sec)
+    now = datetime.datetime.now(ZoneInfo("Asia/Bangkok"))
+    hourly = hourly_from_slots(parse_forecast(raw), start=now, hours=hours)
+
+    out_hours = []
+    for h in hourly:
+        out_hours.append(ForecastHourOut(
+            time=h["time"].astimezone(ZoneInfo("Asia/Bangkok")),
+            temp_c=h["temp_c"], feels_like_c=h["feels_like_c"], humidity=h["humidity"],
+            condition=h["condition"], bucket=bucket_from(h["feels_like_c"], h["condition"]),
+        ))
+
+    # One lookup (and at most one DB query) for every bucket in the window
+    buckets = list(dict.fromkeys(h.bucket for h in out_hours))
+    candidates = crud.find_places_for_buckets(db, buckets)
+
+    recommendations = {}
+    for b in buckets:
+        text, tags = suggestion(b)
+        places = crud.rank_candidates(candidates[b], lat=lat, lon=lon, radius_km=radius_km, limit=limit)
+        recommendations[b] = BucketSuggestionOut(
+            bucket=b, suggestion_text=text, suggestion_tags=tags,
+            places=[PlaceOut(**p) for p in places],
+        )
+
+    return WeatherForecastOut(city="Hà Nội", hours=out_hours, recommendations=recommendations)
+
+@router.post("/batch", response_model=WeatherBatchOut)
+def weather_batch(payload: WeatherBatchIn, db: Session = Depends(get_db)):
+    points = [(p.lat, p.lon) for p in payload.points]
+    by_cell = fetch_weather_many(points, ttl_sec=payload.ttl_sec)
+
+    parsed = {}
+    for cell, raw in by_cell.items():
+        if isinstance(raw, Exception):
+            continue
+        try:
+            t, f, h, cond = parse_weather(raw)
+        except (KeyError, IndexError, TypeError, ValueError):
+            # One odd payload fails its own points, not the whole batch
+            by_cell[cell] = HTTPException(status_code=502, detail="OpenWeather: malformed response")
+            continue
+        parsed[cell] = (t, f, h, cond, bucket_from(f, cond))
+
+    # Every bucket seen across all points resolved with a single lookup
+    candidates = crud.find_places_for_buckets(db, [v[4] for v in parsed.values()])
+
+    results = []
+    for lat, lon in points:
+        cell = grid_cell(lat, lon)
+        if cell not in parsed:
+            err = by_cell.get(cell)
+            detail = err.detail if isinstance(err, HTTPException) else str(err)
+            results.append(WeatherPointOut(lat=lat, lon=lon, error=detail or "weather unavailable"))
+            continue
+        t, f, h, cond, bucket = parsed[cell]
+        text, tags = suggestion(bucket)
+        places = crud.rank_candidates(
+            candidates[bucket], lat=lat, lon=lon, radius_km=payload.radius_km, limit=payload.limit
+        )
+        results.append(WeatherPointOut(
+            lat=lat, lon=lon, temp_c=t, feels_like_c=f, humidity=h, condition=cond,
+            bucket=bucket, suggestion_text=text, suggestion_tags=tags,
+            places=[PlaceOut(**p) for p in places],
+        ))
+
+    day = datetime.datetime.now(ZoneInfo("Asia/Bangkok")).date().isoformat()
+    return WeatherBatchOut(day=day, results=results)
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    """Collects concurrent ``submit()`` calls into batches for one handler call.
+
+    A batch is flushed when it reaches ``max_batch_size`` items or when the
+    oldest item has waited ``max_wait_ms``.  ``handler`` is a *sync* callable
+    taking the list of items and returning one result per item (in order); it
+    runs in the threadpool.  A result that is an exception is raised to that
+    item's caller only; if the handler itself raises (or returns the wrong
+    number of results), every caller gets the error.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10.0,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ):
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.on_batch = on_batch
+        self.batches = 0
+        self.items = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # First use, or a fresh event loop (e.g. per-request loops in tests)
+            self._loop, self._pending, self._timer = loop, [], None
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = self._loop.create_task(self._run(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            if self.on_batch is not None:
+                self.on_batch(len(batch))
+            results = await run_in_threadpool(self.handler, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"handler returned {len(results)} results for {len(batch)} items")
+        except Exception as err:
+            results = [err] * len(batch)
+        for (_, fut), res in zip(batch, results):
+            if fut.done():  # caller went away
+                continue
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    async def aclose(self) -> None:
+        """Flush whatever is pending and wait for in-flight batches."""
+        if self._loop is asyncio.get_running_loop():
+            self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
@@ -1,7 +1,7 @@
 import logging
 import sys
 
-from core.logging import InterceptHandler
+from app.core.logging import InterceptHandler
 from loguru import logger
 from starlette.config import Config
 from starlette.datastructures import Secret
@@ -28,3 +28,22 @@ logger.configure(handlers=[{"sink": sys.stderr, "level": LOGGING_LEVEL}])
 MODEL_PATH = config("MODEL_PATH", default="./ml/model/")
 MODEL_NAME = config("MODEL_NAME", default="model.pkl")
 INPUT_EXAMPLE = config("INPUT_EXAMPLE", default="./ml/model/examples/example.json")
+# "r" maps the model's arrays read-only so workers share them; empty = load into memory
+MODEL_MMAP_MODE: str = config("MODEL_MMAP_MODE", default="r")
+# seconds between checks of the model file for a hot swap; 0 = never
+MODEL_WATCH_INTERVAL: float = config("MODEL_WATCH_INTERVAL", cast=float, default=5.0)
+
+# micro-batching of /predict calls
+PREDICT_MAX_BATCH_SIZE: int = config("PREDICT_MAX_BATCH_SIZE", cast=int, default=64)
+PREDICT_MAX_LATENCY_MS: float = config("PREDICT_MAX_LATENCY_MS", cast=float, default=5.0)
+PREDICT_BATCH_MAX_ROWS: int = config("PREDICT_BATCH_MAX_ROWS", cast=int, default=100000)
+# /predict/batch bodies above this get a 413 before they are read; the default
+# fits PREDICT_BATCH_MAX_ROWS rows as JSON objects
+PREDICT_BATCH_MAX_BYTES: int = config(
+    "PREDICT_BATCH_MAX_BYTES", cast=int, default=PREDICT_BATCH_MAX_ROWS * 512 + 65536
+)
+# /predict result cache (entries are tagged with the model version); 0 disables
+PREDICT_CACHE_SIZE: int = config("PREDICT_CACHE_SIZE", cast=int, default=10000)
+PREDICT_CACHE_TTL: float = config("PREDICT_CACHE_TTL", cast=float, default=600.0)
+# seconds a /health (readiness) result is reused; a model swap forces a recheck
+HEALTH_CHECK_INTERVAL: float = config("HEALTH_CHECK_INTERVAL", cast=float, default=30.0)
@@ -1,16 +1,38 @@
+import asyncio
 from typing import Callable
 
-import joblib
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
 
 
 def preload_model():
     """
     In order to load model on memory to each worker
     """
-    from services.predict import MachineLearningModelHandlerScore
+    from app.core.errors import ModelLoadException
+    from app.services.predict import MachineLearningModelHandlerScore, load_model_file
 
-    MachineLearningModelHandlerScore.get_model(joblib.load)
+    # the API still starts either way; /health reports not ready and the model
+    # watcher picks up the next file published
+    try:
+        MachineLearningModelHandlerScore.get_model(load_model_file)
+    except FileNotFoundError:
+        logger.warning("No model file yet, predictions unavailable")
+    except (Exception, ModelLoadException):
+        logger.exception("Model failed to load, predictions unavailable")
+
+
+async def watch_model(interval: float) -> None:
+    """Poll the model file and hot-swap it when it changes."""
+    from app.services.predict import MachineLearningModelHandlerScore
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(MachineLearningModelHandlerScore.reload_if_changed)
+        except Exception:
+            logger.exception("model watcher failed")
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
@@ -0,0 +1,134 @@
+"""
+Prometheus metrics (optional: needs ``prometheus_client``; without it every
+metric is a no-op and ``/metrics`` answers 503).
+
+Multi-worker: set ``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory
+shared by the workers (wiped on deploy); each worker writes its samples there
+and ``/metrics`` aggregates them, whichever worker serves the scrape.
+"""
+import os
+import time
+
+from sqlalchemy import event
+
+try:
+    import prometheus_client as prom
+    from prometheus_client import multiprocess
+except ImportError:
+    prom = None
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+class _Noop:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, *args, **kwargs): ...
+    def dec(self, *args, **kwargs): ...
+    def observe(self, *args, **kwargs): ...
+    def set(self, *args, **kwargs): ...
+
+
+def _metric(kind, name, doc, labels=(), **kwargs):
+    if prom is None:
+        return _Noop()
+    if kind == "gauge":
+        # per-worker values are summed over live workers in multiprocess mode
+        kwargs.setdefault("multiprocess_mode", "livesum")
+    return getattr(prom, kind.capitalize())(name, doc, labels, **kwargs)
+
+
+HTTP_LATENCY = _metric(
+    "histogram", "http_request_duration_seconds", "Request latency by route", ("method", "route", "status"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_IN_PROGRESS = _metric("gauge", "http_requests_in_progress", "Requests being served", ("method",))
+
+DB_POOL_CHECKED_OUT = _metric("gauge", "db_pool_checked_out", "DB connections checked out of the pool")
+DB_POOL_CONNECTIONS = _metric("gauge", "db_pool_connections", "Open DB connections held by the pool")
+
+WEATHER_CACHE = _metric(
+    "counter", "weather_cache_requests", "Weather lookups by cache outcome", ("kind", "result")
+)  # result: hit | miss | stale (upstream failed, stale copy served)
+
+GEOCODE_REQUESTS = _metric("counter", "geocode_requests", "Geocoder calls by outcome", ("result",))
+GEOCODE_LATENCY = _metric(
+    "histogram", "geocode_duration_seconds", "Geocoder call latency",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+BATCH_SIZE = _metric(
+    "histogram", "microbatch_size", "Items per micro-batch", ("batcher",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+
+def batch_size_observer(name: str):
+    """``on_batch`` callback for a MicroBatcher."""
+    observe = BATCH_SIZE.labels(name).observe
+    return lambda size: observe(size)
+
+
+def instrument_pool(engine) -> None:
+    event.listen(engine, "connect", lambda *a: DB_POOL_CONNECTIONS.inc())
+    event.listen(engine, "close", lambda *a: DB_POOL_CONNECTIONS.dec())
+    event.listen(engine.pool, "checkout", lambda *a: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine.pool, "checkin", lambda *a: DB_POOL_CHECKED_OUT.dec())
+
+
+def render():
+    """(body, content_type) of the current metrics, or None without prometheus_client."""
+    if prom is None:
+        return None
+    if MULTIPROC_DIR:
+        registry = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prom.REGISTRY
+    return prom.generate_latest(registry), prom.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if prom is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Latency histogram per route template (never the raw path) and in-flight gauge."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or prom is None:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_PROGRESS.labels(method).dec()
+            HTTP_LATENCY.labels(method, route_template(scope), str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+def route_template(scope) -> str:
+    route = getattr(scope.get("route"), "path", None)
+    if route is None:
+        return "unmatched"
+    # Routes of included routers carry their own path only; take the prefix from the request path
+    depth = route.rstrip("/").count("/")
+    prefix = "/".join(scope["path"].rstrip("/").split("/")[:-depth]) if depth else scope["path"].rstrip("/")
+    return prefix + route
@@ -1,11 +1,17 @@
-def pagenation(
-    page_number=1, page_size=20, total_count=0, data=None, start_page_as_1=True
-):
-    """Return payload that contains metainformations about
-    pagination and listing data.
-    page_number starts with 0 (array like),
-    if start_page_as_1 defined as True, start with 1.
-    """
+import json
+import os
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.orm import Session
+
+# count="auto" trusts the planner's row estimate above this many rows
+PAGINATE_ESTIMATE_ABOVE = int(os.getenv("PAGINATE_ESTIMATE_ABOVE", "100000"))
+
+_TOTAL = "_total_count"
+
+
+def _meta(page_number, page_size, total_count, start_page_as_1):
     if start_page_as_1:
         if page_number <= 0:
             raise Exception(
@@ -18,11 +24,7 @@ def pagenation(
         total_count // page_size + 1 if remaining else total_count // page_size
     )
     begin = page_number * page_size
-    end = begin
-    if page_number == total_pages and remaining:
-        end += remaining
-    else:
-        end += page_size
+    end = max(begin, min(begin + page_size, total_count))
     return {
         "begin": begin,
         "end": end,
@@ -31,5 +33,115 @@ def pagenation(
         "pageNumber": page_number,
         "pageSize": page_size,
         "totalCount": total_count,
-        "listings": data[begin:end],
+    }
+
+
+def pagenation(
+    page_number=1, page_size=20, total_count=0, data=None, start_page_as_1=True
+):
+    """Return payload that contains metainformations about
+    pagination and listing data.
+    page_number starts with 0 (array like),
+    if start_page_as_1 defined as True, start with 1.
+    """
+    meta = _meta(page_number, page_size, total_count, start_page_as_1)
+    meta["listings"] = data[meta["begin"]:meta["end"]]
+    return meta
+
+
+def _unwrap(rows, n_cols: int) -> List[Any]:
+    if n_cols == 1:
+        return [r[0] for r in rows]
+    return [dict(zip(r._fields[:n_cols], r[:n_cols])) for r in rows]
+
+
+def _exact_count(db: Session, stmt: Select) -> int:
+    return db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+
+def estimate_count(db: Session, stmt: Select) -> Optional[int]:
+    """Planner row estimate for ``stmt`` (PostgreSQL only, else None)."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    # Bound parameters stay parameters: inlining them into text() would let
+    # user input (":word", "%") be parsed as SQL bind syntax.
+    compiled = stmt.order_by(None).compile(bind, compile_kwargs={"render_postcompile": True})
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate_query(
+    db: Session,
+    stmt: Select,
+    page_number: int = 1,
+    page_size: int = 20,
+    start_page_as_1: bool = True,
+    count: str = "exact",
+) -> dict:
+    """``pagenation`` for a select: LIMIT/OFFSET run in SQL, same envelope.
+
+    count="exact" gets the total from ``COUNT(*) OVER()`` in the page query
+    itself; "estimate" uses the planner estimate; "auto" uses the estimate
+    only when it is above ``PAGINATE_ESTIMATE_ABOVE``.
+    """
+    if start_page_as_1 and page_number <= 0:
+        _meta(page_number, page_size, 0, start_page_as_1)  # raises
+    offset = (page_number - 1 if start_page_as_1 else page_number) * page_size
+
+    n_cols = len(stmt.column_descriptions)
+    total = None
+    if count in ("estimate", "auto"):
+        total = estimate_count(db, stmt)
+        if count == "auto" and total is not None and total < PAGINATE_ESTIMATE_ABOVE:
+            total = None
+
+    if total is None:
+        rows = db.execute(
+            stmt.add_columns(func.count().over().label(_TOTAL)).limit(page_size).offset(offset)
+        ).all()
+        # Past the last page there is no row to carry the total
+        total = rows[0][-1] if rows else (_exact_count(db, stmt) if offset else 0)
+        estimated = False
+    else:
+        rows = db.execute(stmt.limit(page_size).offset(offset)).all()
+        estimated = True
+
+    meta = _meta(page_number, page_size, total, start_page_as_1)
+    meta["listings"] = _unwrap(rows, n_cols)
+    meta["countIsEstimate"] = estimated
+    return meta
+
+
+def paginate_keyset(
+    db: Session,
+    stmt: Select,
+    keys: Sequence,
+    after: Optional[Sequence] = None,
+    page_size: int = 20,
+    descending: bool = False,
+) -> dict:
+    """Keyset page of ``stmt`` ordered by ``keys`` (a unique column tuple).
+
+    Pass the returned ``nextAfter`` back as ``after`` for the next page; cost
+    does not grow with depth the way OFFSET does.
+    """
+    n_cols = len(stmt.column_descriptions)
+    stmt = stmt.add_columns(*[k.label(f"_key{i}") for i, k in enumerate(keys)])
+    if after is not None:
+        bound = tuple_(*keys) < tuple_(*after) if descending else tuple_(*keys) > tuple_(*after)
+        stmt = stmt.where(bound)
+    stmt = stmt.order_by(None).order_by(*[k.desc() if descending else k.asc() for k in keys])
+    rows = db.execute(stmt.limit(page_size + 1)).all()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_after = list(rows[-1][n_cols:]) if has_more else None
+    return {
+        "pageSize": page_size,
+        "listings": _unwrap(rows, n_cols),
+        "nextAfter": next_after,
+        "hasMore": has_more,
     }
@@ -0,0 +1,225 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries ``X-Profile: <PROFILE_TOKEN>`` or when
+an admin armed profiling for its path prefix (admin > Profiles).  A sampler
+thread then records the stacks of the event loop and of the threadpool
+thread running the endpoint every ``PROFILE_INTERVAL_MS`` until the response
+is done, and writes ``<profile id>.speedscope.json`` to ``PROFILE_DIR``
+(open it on https://www.speedscope.app).  The id is generated server-side,
+with the client's ``X-Request-Id`` (if any) only as a suffix, so a client
+cannot overwrite another profile; the response carries it as ``X-Profile-Id``.
+
+Unprofiled requests pay for a header lookup and a cached check of the arm
+file only.  One request per worker is profiled at a time.
+"""
+import hmac
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import anyio
+from loguru import logger
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "foodmap-profiles"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")  # empty = header trigger disabled
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))  # newest profiles kept on disk
+
+_ARM_FILE = "_armed.json"  # shared by the workers through PROFILE_DIR
+_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+_SUFFIX = ".speedscope.json"
+
+
+# ---------- arming (admin toggle) ----------
+_armed_cache = {"at": 0.0, "value": None}
+
+
+def arm(prefix: str, minutes: float) -> dict:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    value = {"prefix": prefix or "/", "until": time.time() + minutes * 60}
+    tmp = os.path.join(PROFILE_DIR, f".{_ARM_FILE}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp, os.path.join(PROFILE_DIR, _ARM_FILE))
+    _armed_cache["at"] = 0.0
+    return value
+
+
+def disarm() -> None:
+    try:
+        os.remove(os.path.join(PROFILE_DIR, _ARM_FILE))
+    except FileNotFoundError:
+        pass
+    _armed_cache["at"] = 0.0
+
+
+def armed() -> Optional[dict]:
+    """Current arm state, re-read from disk at most once a second."""
+    now = time.time()
+    if now - _armed_cache["at"] >= 1.0:
+        try:
+            with open(os.path.join(PROFILE_DIR, _ARM_FILE)) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            value = None
+        _armed_cache.update(at=now, value=value)
+    value = _armed_cache["value"]
+    return value if value and value["until"] > now else None
+
+
+# ---------- stored profiles ----------
+def profile_path(profile_id: str) -> Optional[str]:
+    if not _ID.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + _SUFFIX)
+    return path if os.path.exists(path) else None
+
+
+def list_profiles() -> List[dict]:
+    try:
+        entries = [e for e in os.scandir(PROFILE_DIR) if e.name.endswith(_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    return [
+        {"id": e.name[: -len(_SUFFIX)], "size": e.stat().st_size, "created": e.stat().st_mtime}
+        for e in entries
+    ]
+
+
+def _save(profile_id: str, profile: dict) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, profile_id + _SUFFIX), "w") as f:
+        json.dump(profile, f)
+    for old in list_profiles()[PROFILE_KEEP:]:
+        os.remove(os.path.join(PROFILE_DIR, old["id"] + _SUFFIX))
+
+
+# ---------- sampler ----------
+class Sampler:
+    """Samples the event loop thread and any thread running ``scope["endpoint"]``."""
+
+    def __init__(self, scope, loop_thread: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.scope = scope
+        self.loop_thread = loop_thread
+        self.interval = interval_ms / 1000
+        self.frames: List[dict] = []
+        self._frame_index: Dict[tuple, int] = {}
+        self.samples: Dict[int, List[List[int]]] = {}
+        self.weights: Dict[int, List[float]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def _stack(self, frame) -> List[int]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+            if key not in self._frame_index:
+                self._frame_index[key] = len(self.frames)
+                self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            stack.append(self._frame_index[key])
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _wanted(self, tid: int, frame, endpoint_code) -> bool:
+        if tid == self.loop_thread:
+            # an idle loop waits in selectors; not this request's time
+            return not frame.f_code.co_filename.endswith("selectors.py")
+        while frame is not None and endpoint_code is not None:
+            if frame.f_code is endpoint_code:
+                return True
+            frame = frame.f_back
+        return False
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            endpoint_code = getattr(self.scope.get("endpoint"), "__code__", None)
+            for tid, frame in sys._current_frames().items():
+                if tid != me and self._wanted(tid, frame, endpoint_code):
+                    self.samples.setdefault(tid, []).append(self._stack(frame))
+                    self.weights.setdefault(tid, []).append((now - last) * 1000)
+            last = now
+
+    def stop(self, name: str) -> dict:
+        """Stop sampling and return the profile in speedscope's file format."""
+        self._stop.set()
+        self._thread.join()
+        total_ms = (time.perf_counter() - self.started) * 1000
+        profiles = [
+            {
+                "type": "sampled",
+                "name": "event loop" if tid == self.loop_thread else f"thread {tid}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total_ms,
+                "samples": self.samples[tid],
+                "weights": self.weights[tid],
+            }
+            for tid in self.samples
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "foodmap",
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    def _triggered(self, scope) -> bool:
+        if PROFILE_TOKEN:
+            for key, value in scope["headers"]:
+                if key == b"x-profile":
+                    return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+        state = armed()
+        return state is not None and scope["path"].startswith(state["prefix"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._triggered(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        header_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        suffix = _UNSAFE.sub("", header_id)[:31]
+        profile_id = f"{uuid.uuid4().hex}-{suffix}" if suffix else uuid.uuid4().hex
+        sampler = Sampler(scope, threading.get_ident())
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-profile-id", profile_id.encode()))
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            try:
+                profile = sampler.stop(f'{scope["method"]} {scope["path"]}')
+                await anyio.to_thread.run_sync(_save, profile_id, profile)
+                logger.info(f'Profiled {scope["method"]} {scope["path"]} -> {profile_id}')
+            except Exception:
+                logger.exception("saving profile failed")
+            finally:
+                self._busy.release()
@@ -0,0 +1,137 @@
+"""
+Per-request SQL accounting.
+
+Engine hooks count statements and DB time into the ``QueryStats`` of the
+current request (a contextvar, so it follows the request into the threadpool).
+``QueryStatsMiddleware`` adds a ``Server-Timing`` header and logs requests whose
+statements repeat ``SQL_N_PLUS_ONE_THRESHOLD``+ times with the same shape -
+the signature of an N+1 (per-row lazy load, per-row lookup, ...).
+"""
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_STATS = os.getenv("SQL_STATS", "1") not in ("0", "false", "False")
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+# "(%(id_1_1)s, %(id_1_2)s, ...)" / "(?, ?, ?)" -> "(...)": IN lists of any length share a shape
+_PARAM_LIST = re.compile(r"\((?:\s*(?:%\(\w+\)s|\?|\$\d+|:\w+)\s*,)+\s*(?:%\(\w+\)s|\?|\$\d+|:\w+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST.sub("(...)", " ".join(statement.split()))
+
+
+class QueryStats:
+    def __init__(self, endpoint: Optional[str] = None):
+        self.endpoint = endpoint
+        self.count = 0
+        self.db_ms = 0.0
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, elapsed_ms: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.db_ms += elapsed_ms
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statement shapes run at least ``threshold`` times (likely N+1)."""
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} queries, {self.db_ms:.1f}ms"]
+        lines += [f"  {n}x {s[:200]}" for s, n in self.shapes.most_common(10)]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+# Collectors that see every statement, whatever request/thread it runs in (tests)
+_observers: List[QueryStats] = []
+# Called as hook(conn, statement, parameters, elapsed_ms, endpoint) after every statement
+statement_hooks: List[Callable] = []
+
+
+@contextmanager
+def track_queries():
+    """Collect every statement executed (in any thread) while the block runs."""
+    stats = QueryStats()
+    _observers.append(stats)
+    try:
+        yield stats
+    finally:
+        _observers.remove(stats)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed_ms)
+    for observer in list(_observers):
+        observer.add(statement, elapsed_ms)
+    endpoint = stats.endpoint if stats is not None else None
+    for hook in statement_hooks:
+        # a diagnostics hook must never fail the statement it observes
+        try:
+            hook(conn, statement, parameters, elapsed_ms, endpoint)
+        except Exception:
+            logger.exception(f"statement hook {getattr(hook, '__qualname__', hook)} failed")
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed(context):
+    # A failed statement never reaches after_cursor_execute: drop its start time
+    if context.connection is not None and context.execution_context is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+class QueryStatsMiddleware:
+    """Adds ``Server-Timing: db;dur=..;desc="N queries", app;dur=..`` and logs N+1 suspects."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_STATS:
+            await self.app(scope, receive, send)
+            return
+
+        route = f'{scope["method"]} {scope["path"]}'
+        stats = QueryStats(route)
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started) * 1000
+                timing = f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries", app;dur={app_ms:.1f}'
+                message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for shape, n in stats.repeated():
+                logger.warning(f"N+1 suspect on {route}: {n}x {shape[:300]}")
+            logger.debug(f"{route}: {stats.count} queries, {stats.db_ms:.1f}ms in DB")
@@ -0,0 +1,168 @@
+"""
+Slow-query log (opt-in: ``SLOW_QUERY_MS`` > 0).
+
+Statements slower than the threshold are sampled (``SLOW_QUERY_SAMPLE``, and at
+most one capture per statement shape every ``SLOW_QUERY_COOLDOWN`` seconds),
+then a background thread re-plans them and stores statement, parameters,
+endpoint and plan in ``slow_queries`` (browsable in the admin):
+
+* SELECTs get ``EXPLAIN (ANALYZE, BUFFERS)`` - they run once more, inside a
+  rolled-back transaction bounded by ``SLOW_QUERY_EXPLAIN_TIMEOUT_MS``;
+* writes only get a plain ``EXPLAIN`` (never executed twice).
+
+``plan_signature`` hashes the plan's node types and relations, so a plan
+change for the same endpoint shows up as a new signature.
+"""
+import hashlib
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import delete, insert, text
+
+from app.core import querystats
+from app.core.querystats import statement_shape
+from app.models.models import SlowQuery
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 = off
+SLOW_QUERY_SAMPLE = float(os.getenv("SLOW_QUERY_SAMPLE", "1.0"))
+SLOW_QUERY_COOLDOWN = float(os.getenv("SLOW_QUERY_COOLDOWN", "60"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+SLOW_QUERY_KEEP_DAYS = int(os.getenv("SLOW_QUERY_KEEP_DAYS", "14"))
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "VALUES")
+_SECRET_PARAM = re.compile(r"password|token|secret", re.I)
+
+
+def _scrub(parameters) -> Any:
+    """JSON-safe copy of the bind parameters, secrets masked, long values cut."""
+    def value(v):
+        v = v if isinstance(v, (int, float, bool, type(None))) else str(v)
+        return v[:200] if isinstance(v, str) else v
+
+    if isinstance(parameters, dict):
+        return {k: "***" if _SECRET_PARAM.search(k) else value(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [value(v) for v in parameters]
+    return None
+
+
+def plan_signature(plan: str) -> str:
+    """Hash of the plan's node lines without costs, timings and row counts."""
+    nodes = []
+    for i, line in enumerate(plan.splitlines()):
+        line = line.strip()
+        if i == 0 or line.startswith("->"):
+            nodes.append(line.lstrip("-> ").split("  (")[0])
+    return hashlib.sha1("\n".join(nodes).encode()).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, sample: float, cooldown: float, max_pending: int = 100):
+        self.threshold_ms = threshold_ms
+        self.sample = sample
+        self.cooldown = cooldown
+        self._queue: "queue.Queue[Tuple]" = queue.Queue(maxsize=max_pending)
+        self._last_seen: Dict[str, float] = {}
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- request thread: keep cheap ----------
+    def capture(self, conn, statement, parameters, elapsed_ms, endpoint) -> bool:
+        if elapsed_ms < self.threshold_ms or threading.current_thread() is self._thread:
+            return False
+        if random.random() >= self.sample:
+            return False
+        shape = statement_shape(statement)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_seen.get(shape, -self.cooldown) < self.cooldown:
+                return False
+            self._last_seen[shape] = now
+            if now - self._pruned_at >= self.cooldown:
+                # shapes outside their cooldown would be captured anyway: forget them
+                self._last_seen = {s: t for s, t in self._last_seen.items() if now - t < self.cooldown}
+                self._pruned_at = now
+        # executemany passes a list of parameter sets: keep the first, skip the plan
+        many = isinstance(parameters, list)
+        item = (conn.engine, statement, _scrub(parameters[0] if many and parameters else parameters),
+                None if many else parameters, elapsed_ms, endpoint)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            return False
+        self._ensure_worker()
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+                    self._thread.start()
+
+    # ---------- background thread ----------
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                self._record(*item)
+            except Exception:
+                logger.exception("slow query capture failed")
+            finally:
+                self._queue.task_done()
+
+    def _explain(self, conn, statement, parameters) -> Optional[str]:
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        if parameters is None or verb not in _EXPLAINABLE or conn.dialect.name != "postgresql":
+            return None
+        explain = "EXPLAIN (ANALYZE, BUFFERS)" if verb == "SELECT" else "EXPLAIN"
+        with conn.begin() as tx:
+            conn.execute(text(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}"))
+            rows = conn.exec_driver_sql(f"{explain} {statement}", parameters).all()
+            tx.rollback()
+        return "\n".join(r[0] for r in rows)
+
+    def _record(self, engine, statement, scrubbed, parameters, elapsed_ms, endpoint) -> None:
+        with engine.connect() as conn:
+            try:
+                plan = self._explain(conn, statement, parameters)
+            except Exception as err:
+                plan = f"EXPLAIN failed: {err}"
+            with conn.begin():
+                conn.execute(insert(SlowQuery.__table__).values(
+                    endpoint=endpoint,
+                    duration_ms=round(elapsed_ms, 1),
+                    statement=statement,
+                    parameters=scrubbed,
+                    plan=plan,
+                    plan_signature=plan_signature(plan) if plan and not plan.startswith("EXPLAIN failed") else None,
+                ))
+                if conn.dialect.name == "postgresql":
+                    conn.execute(delete(SlowQuery.__table__).where(
+                        SlowQuery.captured_at < text(f"now() - interval '{SLOW_QUERY_KEEP_DAYS} days'")
+                    ))
+        logger.warning(f"Slow query ({elapsed_ms:.0f}ms) on {endpoint or '-'}: {statement_shape(statement)[:300]}")
+
+    def flush(self) -> None:
+        """Block until every queued capture is stored."""
+        self._queue.join()
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_SAMPLE, SLOW_QUERY_COOLDOWN)
+
+
+def enable(log: SlowQueryLog = slow_query_log) -> None:
+    if log.threshold_ms > 0 and log.capture not in querystats.statement_hooks:
+        querystats.statement_hooks.append(log.capture)
+
+
+def disable(log: SlowQueryLog = slow_query_log) -> None:
+    if log.capture in querystats.statement_hooks:
+        querystats.statement_hooks.remove(log.capture)
@@ -0,0 +1,95 @@
+"""
+Boot-time bookkeeping: a per-phase timer and the schema version check.
+
+``SCHEMA_CHECK`` picks what the lifespan does with the database:
+``stamp`` (default) reads ``max(schema_version.version)`` in one query, runs
+``create_all`` only on a fresh database and refuses to start on an outdated
+one (apply ``db/migrations/`` first);
+``create_all`` always runs it (old behaviour); ``skip`` does nothing.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from loguru import logger
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import ProgrammingError, OperationalError
+
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "stamp")
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def report(self) -> Dict[str, float]:
+        total = (time.perf_counter() - self.started) * 1000
+        parts = ", ".join(f"{k} {v:.0f}ms" for k, v in self.phases.items())
+        logger.info(f"ready in {total:.0f}ms ({parts})")
+        return dict(self.phases, total=total)
+
+
+startup_timer = StartupTimer()
+
+
+def ensure_schema(engine) -> None:
+    from app.models import models
+
+    if SCHEMA_CHECK == "skip":
+        return
+    if SCHEMA_CHECK == "create_all":
+        models.Base.metadata.create_all(bind=engine, checkfirst=True)
+        return
+
+    with engine.connect() as conn:
+        try:
+            current = conn.scalar(select(func.max(models.SchemaVersion.version)))
+        except (ProgrammingError, OperationalError):  # no schema_version table
+            conn.rollback()
+            current = None
+        fresh = current is None and not engine.dialect.has_table(conn, models.User.__tablename__)
+    if current is not None and current >= models.SCHEMA_VERSION:
+        return
+    if not fresh:
+        # create_all would only add missing tables, on every boot, and never
+        # alter the existing ones: the migrations have to be applied
+        pending = f"newer than {current:03d}" if current is not None else "from 001"
+        raise RuntimeError(
+            f"database schema is at version {current}, code expects {models.SCHEMA_VERSION}: "
+            f"apply db/migrations/ {pending} (or set SCHEMA_CHECK=create_all)"
+        )
+
+    models.Base.metadata.create_all(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(insert(models.SchemaVersion).values(version=models.SCHEMA_VERSION))
+    logger.info(f"created schema version {models.SCHEMA_VERSION}")
+
+
+class LazyMountMiddleware:
+    """Runs ``build()`` (e.g. mounting sqladmin) before the first request under ``prefix``.
+
+    Keeps the import and setup of rarely used sub-apps out of worker boot.
+    """
+
+    def __init__(self, app, prefix: str, build):
+        self.app = app
+        self.prefix = prefix
+        self.build = build
+        self.built = False
+
+    async def __call__(self, scope, receive, send):
+        if not self.built and scope["type"] in ("http", "websocket") and scope["path"].startswith(self.prefix):
+            self.built = True  # no await before this: one build per process
+            with startup_timer.phase(f"lazy {self.prefix}"):
+                self.build()
+        await self.app(scope, receive, send)
@@ -0,0 +1,110 @@
+"""
+Traffic recording for load replay (opt-in: set ``TRAFFIC_LOG`` to a file path).
+
+Every sampled request (``TRAFFIC_SAMPLE``) becomes one JSON line:
+
+    {"t": 1729240000.123, "m": "GET", "r": "/places/map", "p": "/places/map",
+     "q": {"lat": "21.03", "lon": "105.85", "radius_km": "2"}, "a": 0, "s": 200, "d": 41.2}
+
+t = start (epoch s), r = route template, p = path, q = query, a = caller was
+authenticated, s = status, d = duration (ms).  Nothing identifying is kept:
+no bodies, headers, tokens or IPs; credential/contact query parameters are
+dropped, coordinates snapped to the ~1 km forecast grid and long digit runs in free text masked.
+
+Lines go through a dedicated loguru sink (enqueue=True: written by a
+background thread, rotated and gzipped) at TRACE level, below what the
+console handler shows.  Replay with ``python -m bench.replay``.
+"""
+import json
+import os
+import random
+import re
+import time
+from urllib.parse import parse_qsl
+
+from loguru import logger
+
+from app.core.metrics import route_template
+
+TRAFFIC_LOG = os.getenv("TRAFFIC_LOG", "")  # empty = off
+TRAFFIC_SAMPLE = float(os.getenv("TRAFFIC_SAMPLE", "1.0"))
+TRAFFIC_ROTATION = os.getenv("TRAFFIC_ROTATION", "100 MB")
+TRAFFIC_RETENTION = os.getenv("TRAFFIC_RETENTION", "14 days")
+
+_SKIP_PREFIXES = ("/admin", "/metrics", "/health", "/docs", "/redoc", "/openapi.json")
+_DROP_PARAM = re.compile(r"email|phone|password|token|secret|key|name", re.I)
+_COORD_PARAM = {"lat", "lon", "lng"}
+# ~1 km: coarse enough not to pin down a home, and the same cells as the forecast cache
+_COORD_DECIMALS = 2
+_DIGITS = re.compile(r"\d{6,}")
+
+_recorder = logger.bind(traffic=True)
+
+
+def scrub_query(query_string: bytes) -> dict:
+    out = {}
+    for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        if _DROP_PARAM.search(key):
+            continue
+        if key in _COORD_PARAM:
+            try:
+                value = f"{float(value):.{_COORD_DECIMALS}f}"
+            except ValueError:
+                continue
+        else:
+            value = _DIGITS.sub("#", value)[:64]
+        out[key] = value
+    return out
+
+
+def install_sink(path: str = TRAFFIC_LOG):
+    """Add the traffic sink; returns the loguru handler id."""
+    return logger.add(
+        path,
+        level="TRACE",
+        format="{message}",
+        filter=lambda record: record["extra"].get("traffic", False),
+        enqueue=True,
+        rotation=TRAFFIC_ROTATION,
+        retention=TRAFFIC_RETENTION,
+        compression="gz",
+    )
+
+
+class TrafficRecorderMiddleware:
+    def __init__(self, app, sample: float = TRAFFIC_SAMPLE):
+        self.app = app
+        self.sample = sample
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith(_SKIP_PREFIXES)
+            or random.random() >= self.sample
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            authenticated = any(k == b"authorization" for k, _ in scope["headers"])
+            _recorder.trace(json.dumps({
+                "t": round(started_at, 3),
+                "m": scope["method"],
+                "r": route_template(scope),
+                "p": scope["path"],
+                "q": scrub_query(scope.get("query_string", b"")),
+                "a": int(authenticated),
+                "s": status["code"],
+                "d": round((time.perf_counter() - started) * 1000, 1),
+            }, ensure_ascii=False, separators=(",", ":")))
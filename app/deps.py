@@ -3,18 +3,19 @@ from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models import models
+from app.services.principals import Principal, get_principal
 
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-me")
 JWT_ALG = os.getenv("JWT_ALG", "HS256")
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-def get_current_user(
+def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
-    db: Session = Depends(get_db),
-):
+) -> Principal:
+    """Authenticated caller from the JWT + principal cache; no DB session on a cache hit."""
     if credentials is None or not credentials.credentials:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
@@ -28,11 +29,31 @@ def get_current_user(
     if not sub:
         raise HTTPException(status_code=401, detail="Invalid token payload")
     try:
-        user = db.get(models.User, int(sub))
+        principal = get_principal(int(sub))
     except (TypeError, ValueError):
-        user = db.query(models.User).filter(models.User.email == str(sub).lower()).first()
+        # legacy tokens carrying the email as subject
+        with SessionLocal() as db:
+            user_id = db.query(models.User.id).filter(models.User.email == str(sub).lower()).scalar()
+        principal = get_principal(user_id) if user_id else None
 
-    if not user or not getattr(user, "is_active", True):
+    if not principal or not principal.is_active:
         raise HTTPException(status_code=401, detail="User not found or inactive")
+    if int(payload.get("ver", 0)) != principal.auth_version:
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    return principal
+
+def require_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return principal
 
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """ORM user for endpoints that need more than the principal (one query, no relationships)."""
+    user = db.get(models.User, principal.id)
+    if not user or not getattr(user, "is_active", True):
+        raise HTTPException(status_code=401, detail="User not found or inactive")
     return user
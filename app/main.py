@@ -1,21 +1,95 @@
+from app.core.startup import startup_timer  # first: times the imports below
+
+import asyncio
+import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from app.database import engine
-from app.models import models
-from app.api.routes import auth, places, weather
-from app.services.admin.__init__ import init_admin  # <-- ensure this import path matches your tree
+
+with startup_timer.phase("import fastapi+db"):
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import Response
+    from fastapi.concurrency import run_in_threadpool
+    from app.database import engine
+    from app.models import models  # noqa: F401
+
+with startup_timer.phase("import routes"):
+    from app.api.routes import auth, autocomplete, places, reviews, weather
+    from app.api.routes import api as ml_api
+    from app.api.routes.predictor import prediction_batcher
+    from app.core.config import API_PREFIX, MODEL_WATCH_INTERVAL
+    from app.core.events import preload_model, watch_model
+    from app.core import metrics
+    from app.core.querystats import QueryStatsMiddleware
+    from app.core import slowlog
+    from app.core.profiling import ProfilingMiddleware
+    from app.core import traffic
+    from app.core.startup import LazyMountMiddleware, ensure_schema
+    from app.services.reviews_crud import review_writer
+    from app.services.password_pool import hasher
+    from app.services import weather_scoring  # queues places for score recompute on change
+    from app.services.autocomplete import AUTOCOMPLETE_REFRESH, watch_autocomplete
+
+# Build the admin on its first request instead of at boot (ADMIN_LAZY=0 to disable)
+ADMIN_LAZY = os.getenv("ADMIN_LAZY", "1") not in ("0", "false", "False")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    models.Base.metadata.create_all(bind=engine, checkfirst=True)
+    with startup_timer.phase("schema check"):
+        await run_in_threadpool(ensure_schema, engine)
+    with startup_timer.phase("model preload"):
+        await run_in_threadpool(preload_model)
+    watcher = asyncio.create_task(watch_model(MODEL_WATCH_INTERVAL)) if MODEL_WATCH_INTERVAL > 0 else None
+    # built in the background; /autocomplete answers 503 until the first build is done
+    indexer = asyncio.create_task(watch_autocomplete()) if AUTOCOMPLETE_REFRESH > 0 else None
+    scorer = (
+        asyncio.create_task(weather_scoring.watch_dirty_scores())
+        if weather_scoring.WEATHER_SCORE_INTERVAL > 0 else None
+    )
+    app.state.startup_timings = startup_timer.report()
     yield
+    if watcher:
+        watcher.cancel()
+    if indexer:
+        indexer.cancel()
+    if scorer:
+        scorer.cancel()
+    await review_writer.aclose()
+    await prediction_batcher.aclose()
+    hasher.shutdown()
+    metrics.mark_process_dead()
+
+def init_admin(app):
+    from app.services.admin.__init__ import init_admin as _init_admin  # <-- ensure this import path matches your tree
+    return _init_admin(app)
 
 app = FastAPI(title="FoodMap API", lifespan=lifespan)
 app.include_router(auth.router)
 app.include_router(places.router)
+app.include_router(autocomplete.router)
+app.include_router(reviews.router)
 app.include_router(weather.router)
-init_admin(app)
+app.include_router(ml_api.router, prefix=API_PREFIX)
+app.add_middleware(QueryStatsMiddleware)
+slowlog.enable()  # no-op unless SLOW_QUERY_MS > 0
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+if traffic.TRAFFIC_LOG:
+    traffic.install_sink()
+    app.add_middleware(traffic.TrafficRecorderMiddleware)
+metrics.instrument_pool(engine)
+if ADMIN_LAZY:
+    app.add_middleware(LazyMountMiddleware, prefix="/admin", build=lambda: init_admin(app))
+else:
+    with startup_timer.phase("admin"):
+        init_admin(app)
 
 @app.get("/")
 def root():
     return {"ok": True}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    rendered = metrics.render()
+    if rendered is None:
+        raise HTTPException(status_code=503, detail="prometheus_client is not installed")
+    body, content_type = rendered
+    return Response(body, media_type=content_type)
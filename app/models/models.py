@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from datetime import datetime, time
 from sqlalchemy import (
-    Column, Integer, BigInteger, SmallInteger, Text, Numeric, Time, TIMESTAMP,
+    Column, Integer, BigInteger, SmallInteger, Text, Numeric, Float, Time, TIMESTAMP, JSON,
     ForeignKey, CheckConstraint, UniqueConstraint, Index, Boolean, Enum as SqlEnum,
-    func, text
+    func, text, event, DDL, Computed
 )
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.schema import MetaData
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, INT4MULTIRANGE, JSONB
 from geoalchemy2 import Geography
 
 # ---------- Base ----------
@@ -23,6 +23,16 @@ Base = declarative_base(metadata=MetaData(naming_convention=naming_convention))
 
 PlaceStatusEnum = SqlEnum("pending", "approved", "rejected", name="place_status")
 
+# Number of the newest db/migrations/NNN_*.sql; bump together with every new migration.
+SCHEMA_VERSION = 11
+
+
+class SchemaVersion(Base):
+    """One row per applied migration; boot compares max(version) with SCHEMA_VERSION."""
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True)
+    applied_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
 
 # ---------- Users ----------
 class User(Base):
@@ -35,11 +45,19 @@ class User(Base):
     password_hash = Column(Text)               
     role = Column(Text, server_default=text("'user'"), nullable=False) 
     is_active = Column(Boolean, nullable=False, server_default=text("true"))
+    auth_version = Column(Integer, nullable=False, server_default=text("0"))  # bumped to revoke issued tokens
 
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    reviews = relationship("Review", back_populates="user", lazy="selectin")
+    reviews = relationship("Review", back_populates="user", lazy="select")
+
+    # Admin search (ILIKE '%term%')
+    __table_args__ = (
+        Index("idx_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("idx_users_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("idx_users_phone_trgm", "phone", postgresql_using="gin", postgresql_ops={"phone": "gin_trgm_ops"}),
+    )
 
 
 # ---------- Places (shareable + moderation) ----------
@@ -58,7 +76,16 @@ class Place(Base):
     price_level = Column(SmallInteger)        # 1 = budget (street food / student-friendly) 2 = moderate 3 = pricey 4 = premium
     rating = Column(Numeric(2, 1))                
 
-    geom = Column(Geography(geometry_type="POINT", srid=4326))  # lon/lat
+    # Review aggregates (rated reviews only), kept current by triggers on reviews
+    review_count = Column(Integer, nullable=False, server_default=text("0"))
+    rating_sum = Column(BigInteger, nullable=False, server_default=text("0"))
+    # Bayesian average: few reviews are pulled towards a 3.5 prior worth 5 reviews
+    rating_score = Column(Numeric(4, 3), Computed("(rating_sum + 3.5 * 5) / (review_count + 5)", persisted=True))
+
+    geom = Column(Geography(geometry_type="POINT", srid=4326, spatial_index=False))  # lon/lat; indexed below
+
+    # Minute-of-week ranges (Mon 00:00 = 0) the place is open; maintained from opening_hours by trigger
+    open_minutes = Column(INT4MULTIRANGE)
 
     # --- Sharing & publishing ---
     slug = Column(Text, unique=True)             
@@ -79,15 +106,27 @@ class Place(Base):
     categories = relationship("Category", secondary="place_categories", back_populates="places", lazy="selectin")
     opening_hours = relationship("OpeningHour", back_populates="place", cascade="all, delete-orphan", lazy="selectin")
     menus = relationship("Menu", back_populates="place", cascade="all, delete-orphan", lazy="selectin")
-    reviews = relationship("Review", back_populates="place", cascade="all, delete-orphan", lazy="selectin")
+    # Not eager: a place can have thousands of reviews, use GET /places/{id}/reviews
+    reviews = relationship("Review", back_populates="place", cascade="all, delete-orphan", lazy="select", passive_deletes=True)
     weather_scores = relationship("PlaceWeatherScore", back_populates="place", cascade="all, delete-orphan", lazy="selectin")
 
     __table_args__ = (
         Index("idx_places_geom", "geom", postgresql_using="gist"),
         Index("idx_places_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
         Index("idx_places_addr_trgm", "address", postgresql_using="gin", postgresql_ops={"address": "gin_trgm_ops"}),
+        Index("idx_places_phone_trgm", "phone", postgresql_using="gin", postgresql_ops={"phone": "gin_trgm_ops"}),
+        Index("idx_places_slug_trgm", "slug", postgresql_using="gin", postgresql_ops={"slug": "gin_trgm_ops"}),
+        Index("idx_places_ward_trgm", "ward", postgresql_using="gin", postgresql_ops={"ward": "gin_trgm_ops"}),
+        Index("idx_places_district_trgm", "district", postgresql_using="gin", postgresql_ops={"district": "gin_trgm_ops"}),
+        Index("idx_places_city_trgm", "city", postgresql_using="gin", postgresql_ops={"city": "gin_trgm_ops"}),
+        Index("idx_places_website_trgm", "website", postgresql_using="gin", postgresql_ops={"website": "gin_trgm_ops"}),
         Index("idx_places_status", "status"),
         Index("idx_places_is_public", "is_public"),
+        Index("idx_places_open_minutes", "open_minutes", postgresql_using="gist"),
+        Index(
+            "idx_places_rating_score", rating_score.desc(), id.desc(),
+            postgresql_where=text("is_public AND status = 'approved'"),
+        ),
     )
 
 
@@ -110,11 +149,14 @@ class OpeningHour(Base):
     __tablename__ = "opening_hours"
     id = Column(BigInteger, primary_key=True)
     place_id = Column(BigInteger, ForeignKey("places.id", ondelete="CASCADE"), nullable=False)
-    weekday = Column(SmallInteger, nullable=False)
+    weekday = Column(SmallInteger, nullable=False)  # 0 = Monday
     opens = Column(Time, nullable=False)
-    closes = Column(Time, nullable=False)
+    closes = Column(Time, nullable=False)           # closes <= opens means past midnight
     place = relationship("Place", back_populates="opening_hours")
-    __table_args__ = (CheckConstraint("weekday BETWEEN 0 AND 6", name="weekday_range"),)
+    __table_args__ = (
+        CheckConstraint("weekday BETWEEN 0 AND 6", name="weekday_range"),
+        Index("idx_opening_hours_place_id", "place_id"),
+    )
 
 
 # ---------- Menus & items ----------
@@ -125,6 +167,10 @@ class Menu(Base):
     title = Column(Text)
     place = relationship("Place", back_populates="menus")
     items = relationship("MenuItem", back_populates="menu", cascade="all, delete-orphan", lazy="selectin")
+    __table_args__ = (
+        Index("idx_menus_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("idx_menus_place_id", "place_id"),
+    )
 
 class MenuItem(Base):
     __tablename__ = "menu_items"
@@ -135,6 +181,17 @@ class MenuItem(Base):
     price = Column(Integer)             # VND
     tags = Column(ARRAY(Text))
     menu = relationship("Menu", back_populates="items", lazy="selectin")          
+    __table_args__ = (
+        Index("idx_menu_items_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("idx_menu_items_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        Index("idx_menu_items_menu_id", "menu_id"),
+        # Dish search: tag lookups and accent-insensitive name matching (see places_crud.search_dishes)
+        Index("idx_menu_items_tags", "tags", postgresql_using="gin"),
+        Index(
+            "idx_menu_items_name_folded_trgm", func.f_unaccent(func.lower(name)).label("name_folded"),
+            postgresql_using="gin", postgresql_ops={"name_folded": "gin_trgm_ops"},
+        ),
+    )
 
 
 # ---------- Reviews ----------
@@ -149,7 +206,11 @@ class Review(Base):
 
     place = relationship("Place", back_populates="reviews")
     user = relationship("User", back_populates="reviews")
-    __table_args__ = (CheckConstraint("rating BETWEEN 1 AND 5", name="rating_range"),)
+    __table_args__ = (
+        CheckConstraint("rating BETWEEN 1 AND 5", name="rating_range"),
+        Index("idx_reviews_place_created", "place_id", created_at.desc(), id.desc()),
+        Index("idx_reviews_content_trgm", "content", postgresql_using="gin", postgresql_ops={"content": "gin_trgm_ops"}),
+    )
 
 
 # ---------- Weather ----------
@@ -170,4 +231,162 @@ class PlaceWeatherScore(Base):
     place_id = Column(BigInteger, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True)
     weather_bucket = Column(Text, primary_key=True)    # hot/warm/cool/cold/rain
     score = Column(Numeric(3, 2), nullable=False, server_default=text("0"))
+    is_manual = Column(Boolean, nullable=False, server_default=text("false"))  # hand-curated; scoring engine leaves it alone
     place = relationship("Place", back_populates="weather_scores")
+
+
+# ---------- Diagnostics ----------
+class SlowQuery(Base):
+    """Statements over SLOW_QUERY_MS with their plan (see app/core/slowlog.py)."""
+    __tablename__ = "slow_queries"
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    captured_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    endpoint = Column(Text)                    # "GET /places/" (null outside requests)
+    duration_ms = Column(Float, nullable=False)
+    statement = Column(Text, nullable=False)
+    parameters = Column(JSON().with_variant(JSONB, "postgresql"))
+    plan = Column(Text)                        # EXPLAIN (ANALYZE, BUFFERS) for SELECTs, plain EXPLAIN otherwise
+    plan_signature = Column(Text)              # node types + relations/indexes: changes when the plan shape does
+    __table_args__ = (
+        Index("idx_slow_queries_captured", captured_at.desc()),
+        Index("idx_slow_queries_signature", "plan_signature"),
+    )
+
+
+# ---------- DDL (functions / triggers) ----------
+# Also shipped as db/migrations/*.sql for databases created before these existed.
+
+# unaccent() is only STABLE, so index expressions go through this IMMUTABLE wrapper
+# (needs the unaccent extension, see db/init/001_extensions.sql).
+UNACCENT_DDL = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+  SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$
+"""
+event.listen(Base.metadata, "before_create", DDL(UNACCENT_DDL).execute_if(dialect="postgresql"))
+
+OPEN_MINUTES_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION place_open_minutes(pid bigint) RETURNS int4multirange
+    LANGUAGE sql STABLE AS $$
+      WITH spans AS (
+        SELECT weekday * 1440 + (extract(epoch FROM opens) / 60)::int AS s,
+               weekday * 1440 + (extract(epoch FROM closes) / 60)::int
+                 + CASE WHEN closes <= opens THEN 1440 ELSE 0 END AS e
+        FROM opening_hours WHERE place_id = pid
+      )
+      SELECT range_agg(r) FROM (
+        SELECT int4range(s, LEAST(e, 10080)) FROM spans
+        UNION ALL
+        SELECT int4range(0, e - 10080) FROM spans WHERE e > 10080
+      ) AS parts(r)
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION refresh_open_minutes(ids bigint[]) RETURNS void
+    LANGUAGE sql AS $$
+      WITH spans AS (
+        SELECT o.place_id,
+               o.weekday * 1440 + (extract(epoch FROM o.opens) / 60)::int AS s,
+               o.weekday * 1440 + (extract(epoch FROM o.closes) / 60)::int
+                 + CASE WHEN o.closes <= o.opens THEN 1440 ELSE 0 END AS e
+        FROM opening_hours o JOIN unnest(ids) AS t(id) ON o.place_id = t.id
+      ), agg AS (
+        SELECT place_id, range_agg(r) AS m FROM (
+          SELECT place_id, int4range(s, LEAST(e, 10080)) FROM spans
+          UNION ALL
+          SELECT place_id, int4range(0, e - 10080) FROM spans WHERE e > 10080
+        ) AS parts(place_id, r)
+        GROUP BY place_id
+      )
+      UPDATE places p SET open_minutes = agg.m
+      FROM unnest(ids) AS t(id) LEFT JOIN agg ON agg.place_id = t.id
+      WHERE p.id = t.id
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION opening_hours_refresh_places() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+      ids bigint[];
+    BEGIN
+      -- one set-based recompute for every place the statement touched
+      IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT place_id) INTO ids FROM new_rows;
+      ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT place_id) INTO ids FROM old_rows;
+      ELSE
+        SELECT array_agg(place_id) INTO ids
+        FROM (SELECT place_id FROM new_rows UNION SELECT place_id FROM old_rows) AS changed;
+      END IF;
+      PERFORM refresh_open_minutes(ids);
+      RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_opening_hours_ins AFTER INSERT ON opening_hours
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opening_hours_refresh_places()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_opening_hours_upd AFTER UPDATE ON opening_hours
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opening_hours_refresh_places()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_opening_hours_del AFTER DELETE ON opening_hours
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION opening_hours_refresh_places()
+    """,
+]
+for _stmt in OPEN_MINUTES_DDL:
+    event.listen(OpeningHour.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+
+RATING_AGG_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION reviews_refresh_rating() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+      IF TG_OP = 'INSERT' THEN
+        UPDATE places p SET review_count = p.review_count + d.n, rating_sum = p.rating_sum + d.s
+        FROM (SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+              FROM new_rows GROUP BY place_id) d
+        WHERE p.id = d.place_id AND d.n > 0;
+      ELSIF TG_OP = 'DELETE' THEN
+        UPDATE places p SET review_count = p.review_count - d.n, rating_sum = p.rating_sum - d.s
+        FROM (SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+              FROM old_rows GROUP BY place_id) d
+        WHERE p.id = d.place_id AND d.n > 0;
+      ELSE
+        UPDATE places p SET review_count = p.review_count + d.n, rating_sum = p.rating_sum + d.s
+        FROM (SELECT place_id, sum(n) AS n, sum(s) AS s FROM (
+                SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+                FROM new_rows GROUP BY place_id
+                UNION ALL
+                SELECT place_id, -count(rating), -coalesce(sum(rating), 0)
+                FROM old_rows GROUP BY place_id
+              ) x GROUP BY place_id) d
+        WHERE p.id = d.place_id AND (d.n <> 0 OR d.s <> 0);
+      END IF;
+      RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_reviews_rating_ins AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reviews_refresh_rating()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_reviews_rating_upd AFTER UPDATE ON reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reviews_refresh_rating()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_reviews_rating_del AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reviews_refresh_rating()
+    """,
+]
+for _stmt in RATING_AGG_DDL:
+    event.listen(Review.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
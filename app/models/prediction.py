@@ -1,33 +1,45 @@
-# import numpy as np
+from typing import List
 
-# from pydantic import BaseModel
+import numpy as np
 
+from pydantic import BaseModel
 
-# class MachineLearningResponse(BaseModel):
-#     prediction: float
-#     prediction_label: str
 
+class MachineLearningResponse(BaseModel):
+    prediction: float
+    prediction_label: str
 
-# class HealthResponse(BaseModel):
-#     status: bool
 
+class MachineLearningBatchResponse(BaseModel):
+    count: int
+    predictions: List[float]
+    prediction_labels: List[str]
 
-# class MachineLearningDataInput(BaseModel):
-#     feature1: float
-#     feature2: float
-#     feature3: float
-#     feature4: float
-#     feature5: float
 
-#     def get_np_array(self):
-#         return np.array(
-#             [
-#                 [
-#                     self.feature1,
-#                     self.feature2,
-#                     self.feature3,
-#                     self.feature4,
-#                     self.feature5,
-#                 ]
-#             ]
-#         )
+class HealthResponse(BaseModel):
+    status: bool
+
+
+class MachineLearningDataInput(BaseModel):
+    feature1: float
+    feature2: float
+    feature3: float
+    feature4: float
+    feature5: float
+
+    def get_np_array(self):
+        return np.array(
+            [
+                [
+                    self.feature1,
+                    self.feature2,
+                    self.feature3,
+                    self.feature4,
+                    self.feature5,
+                ]
+            ]
+        )
+
+
+# Column order of the model's input matrix
+FEATURES = tuple(MachineLearningDataInput.model_fields)
@@ -0,0 +1,23 @@
+import os
+from functools import lru_cache
+
+
+def __getattr__(name):
+    # ``redis_client.RedisError`` without importing redis-py (and redis.asyncio)
+    # at boot; ``except`` clauses only evaluate it when something was raised.
+    if name in ("RedisError", "ResponseError"):
+        import redis
+        return getattr(redis, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """Process-wide Redis client (connections are opened lazily by redis-py)."""
+    import redis
+
+    return redis.Redis(
+        host=os.getenv("REDIS_HOST", "redis"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        decode_responses=True,
+    )
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -38,6 +38,8 @@ class PlaceUpdate(PlaceBase):
 
 class PlaceOut(PlaceBase):
     id: int
+    review_count: int = 0
+    rating_score: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     created_by: Optional[int] = None
@@ -45,6 +47,52 @@ class PlaceOut(PlaceBase):
     class Config:
         from_attributes = True
 
+class PlacePage(BaseModel):
+    listings: List[PlaceOut]
+    totalCount: int
+    totalPages: int
+    pageNumber: int
+    pageSize: int
+    begin: int
+    end: int
+    remaining: int
+    countIsEstimate: bool
+
+# ---------- Moderation ----------
+class PlaceModerationFilter(BaseModel):
+    status: Optional[Literal["pending", "approved", "rejected"]] = None
+    city: Optional[str] = None
+    district: Optional[str] = None
+
+class PlaceModerationIn(BaseModel):
+    action: Literal["approve", "reject", "publish", "unpublish"]
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[PlaceModerationFilter] = None
+
+class PlaceModerationOut(BaseModel):
+    action: str
+    updated: int
+    ids: List[int]
+    skipped: Optional[int] = None   # requested ids that were missing or already in that state
+
+# ---------- Dish search ----------
+class DishMatchOut(BaseModel):
+    name: str
+    price: Optional[int] = None     # VND
+
+class PlaceDishOut(BaseModel):
+    id: int
+    name: str
+    address: Optional[str] = None
+    district: Optional[str] = None
+    price_level: Optional[int] = None
+    rating_score: Optional[float] = None
+    lon: Optional[float] = None
+    lat: Optional[float] = None
+    distance_m: Optional[int] = None
+    relevance: float
+    dishes: List[DishMatchOut]     # best matches first
+
 # ---------- GeoJSON ----------
 class GeoJSONFeature(BaseModel):
     type: str = "Feature"
@@ -70,3 +118,31 @@ class MenuIn(BaseModel):
     title: Optional[str] = None
     items: List[MenuItemIn] = Field(default_factory=list)
 
+
+# ---------- Reviews ----------
+class ReviewIn(BaseModel):
+    rating: Optional[int] = Field(None, ge=1, le=5)
+    content: Optional[str] = Field(None, max_length=5000)
+
+class ReviewOut(BaseModel):
+    id: int
+    place_id: int
+    user_id: Optional[int] = None
+    rating: Optional[int] = None
+    content: Optional[str] = None
+    created_at: datetime
+
+class ReviewPage(BaseModel):
+    items: List[ReviewOut]
+    next_cursor: Optional[str] = None
+
+
+# ---------- Autocomplete ----------
+class SuggestionOut(BaseModel):
+    kind: Literal["place", "dish", "category", "district"]
+    text: str
+    place_id: Optional[int] = None   # only for kind == "place"
+
+class AutocompleteOut(BaseModel):
+    q: str
+    items: List[SuggestionOut]
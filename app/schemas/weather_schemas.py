@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, Any, List
+from pydantic import BaseModel, Field
+from typing import Optional, Any, List, Dict
+from datetime import datetime
 
 class PlaceOut(BaseModel):
     id: int
@@ -8,6 +9,7 @@ class PlaceOut(BaseModel):
     district: Optional[str] = None
     city: Optional[str] = None
     rating: Optional[float] = None
+    distance_m: Optional[float] = None
 
 class WeatherTodayOut(BaseModel):
     city: str
@@ -21,3 +23,50 @@ class WeatherTodayOut(BaseModel):
     suggestion_tags: List[str]
     places: List[PlaceOut]
     raw: Any | None = None
+
+
+class ForecastHourOut(BaseModel):
+    time: datetime
+    temp_c: float
+    feels_like_c: float
+    humidity: int
+    condition: str
+    bucket: str
+
+class BucketSuggestionOut(BaseModel):
+    bucket: str
+    suggestion_text: str
+    suggestion_tags: List[str]
+    places: List[PlaceOut]
+
+class WeatherForecastOut(BaseModel):
+    city: str
+    hours: List[ForecastHourOut]
+    recommendations: Dict[str, BucketSuggestionOut]
+
+class WeatherPointIn(BaseModel):
+    lat: float = Field(ge=-90, le=90)
+    lon: float = Field(ge=-180, le=180)
+
+class WeatherBatchIn(BaseModel):
+    points: List[WeatherPointIn] = Field(min_length=1, max_length=500)
+    radius_km: Optional[float] = 3.0
+    limit: int = Field(12, ge=1, le=50)
+    ttl_sec: int = Field(900, ge=60, le=7200)
+
+class WeatherPointOut(BaseModel):
+    lat: float
+    lon: float
+    temp_c: Optional[float] = None
+    feels_like_c: Optional[float] = None
+    humidity: Optional[int] = None
+    condition: Optional[str] = None
+    bucket: Optional[str] = None
+    suggestion_text: Optional[str] = None
+    suggestion_tags: List[str] = []
+    places: List[PlaceOut] = []
+    error: Optional[str] = None
+
+class WeatherBatchOut(BaseModel):
+    day: str
+    results: List[WeatherPointOut]
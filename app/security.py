@@ -1,23 +1,28 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from jose import jwt
 from app.models import models
-from passlib.context import CryptContext
+from app.services.password_pool import hasher
 import os
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-me")
 JWT_ALG = os.getenv("JWT_ALG", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "600"))
 
+# bcrypt runs in the password pool (app/services/password_pool.py), never inline.
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return hasher.hash(password)
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
-    return pwd_context.verify(plain_password, password_hash)
+    return hasher.verify_and_update(plain_password, password_hash)[0]
+
+def verify_and_update_password(plain_password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """(ok, new_hash); new_hash is set when the stored hash uses outdated cost parameters."""
+    return hasher.verify_and_update(plain_password, password_hash)
+
+async def averify_and_update_password(plain_password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return await hasher.averify_and_update(plain_password, password_hash)
 
 def create_access_token(user: models.User, expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta is None:
@@ -30,5 +35,6 @@ def create_access_token(user: models.User, expires_delta: Optional[timedelta] =
         "email": user.email,          
         "role": user.role if hasattr(user, "role") else "user",
         "is_active": user.is_active,
+        "ver": user.auth_version or 0,
     }
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALG)
\ No newline at end of file
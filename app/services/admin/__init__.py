@@ -1,6 +1,7 @@
 from sqladmin import Admin
 from app.database import engine
 from app.services.admin.auth import AdminAuth
+from app.services.admin.profiles import ProfilesAdmin
 from app.services.admin.crud import (
     UserAdmin,
     PlaceAdmin,
@@ -12,6 +13,7 @@ from app.services.admin.crud import (
     ReviewAdmin,
     WeatherCacheAdmin,
     PlaceWeatherScoreAdmin,
+    SlowQueryAdmin,
 )
 import os
 
@@ -19,7 +21,10 @@ def init_admin(app):
     secret = os.getenv("ADMIN_SECRET", "foodmapisthebest")
     auth = AdminAuth(secret_key=secret)
 
-    admin = Admin(app=app, engine=engine, authentication_backend=auth, base_url="/admin")
+    admin = Admin(
+        app=app, engine=engine, authentication_backend=auth, base_url="/admin",
+        templates_dir=os.path.join(os.path.dirname(__file__), "templates"),
+    )
 
     admin.add_view(UserAdmin)
     admin.add_view(PlaceAdmin)
@@ -31,5 +36,7 @@ def init_admin(app):
     admin.add_view(ReviewAdmin)
     admin.add_view(WeatherCacheAdmin)
     admin.add_view(PlaceWeatherScoreAdmin)
+    admin.add_view(SlowQueryAdmin)
+    admin.add_view(ProfilesAdmin)
 
     return admin
@@ -4,7 +4,8 @@ from starlette.middleware import Middleware
 from fastapi import Request
 from app.database import SessionLocal
 from app.models import models
-from app.security import verify_password
+from app.security import averify_and_update_password
+from app.services.crud import rehash_password
 
 class AdminAuth(AuthenticationBackend):
     """Session-based auth for SQLAdmin using your Users table."""
@@ -19,8 +20,11 @@ class AdminAuth(AuthenticationBackend):
             user = db.query(models.User).filter(models.User.email == email).first()
             if not user or not user.is_active:
                 return False
-            if not verify_password(password, user.password_hash):
+            ok, new_hash = await averify_and_update_password(password, user.password_hash)
+            if not ok:
                 return False
+            if new_hash:
+                rehash_password(db, user, new_hash)
             request.session.update({"admin_user_id": int(user.id)})
             return True
 
@@ -1,8 +1,20 @@
-from sqladmin import ModelView
-from sqlalchemy import func
+import os
+from typing import Optional
+
+import anyio
+from sqladmin import ModelView, action
+from starlette.requests import Request
+from starlette.responses import RedirectResponse
+from sqlalchemy import String, cast, func, or_, select, text
 from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import load_only, noload
 from geoalchemy2.types import Geometry
+from app.database import SessionLocal
 from app.models import models
+from app.services import places_crud
+
+# Unfiltered list pages show pg_class.reltuples instead of COUNT(*) above this many rows.
+ADMIN_COUNT_ESTIMATE_ABOVE = int(os.getenv("ADMIN_COUNT_ESTIMATE_ABOVE", "50000"))
 
 # ---------- helpers ----------
 def _pk_columns(model):
@@ -33,9 +45,56 @@ def _safe_sort(model, prefer_names, desc=True):
     pk_attr = _pk_first_attr(model)
     return [(pk_attr, desc)] if pk_attr is not None else []
 
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class FastListMixin:
+    """List pages that stay fast on big tables.
+
+    * unfiltered counts come from the planner estimate once the table is large;
+    * rows are loaded with only the listed columns and no relationships
+      (the models' ``lazy="selectin"`` would otherwise fan out per page);
+    * search compares text columns as-is so the trigram indexes apply.
+    """
+
+    def _estimated_count(self) -> Optional[int]:
+        with self.session_maker() as session:
+            if session.get_bind().dialect.name != "postgresql":
+                return None
+            n = session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+                {"t": self.model.__table__.name},
+            ).scalar()
+        # -1 = never analyzed
+        return n if n is not None and n >= 0 else None
+
+    async def count(self, request, stmt=None) -> int:
+        if stmt is None:
+            estimate = await anyio.to_thread.run_sync(self._estimated_count)
+            if estimate is not None and estimate >= ADMIN_COUNT_ESTIMATE_ABOVE:
+                return estimate
+        return await super().count(request, stmt)
+
+    def list_query(self, request):
+        columns = {c.key for c in sa_inspect(self.model).column_attrs}
+        listed = [getattr(self.model, n) for n in self._list_prop_names if n in columns]
+        stmt = select(self.model).options(noload("*"))
+        return stmt.options(load_only(*listed)) if listed else stmt
+
+    def search_query(self, stmt, term: str):
+        pattern = f"%{_like_escape(term)}%"
+        expressions = []
+        for name in self._search_fields:
+            field = getattr(self.model, name)
+            if not isinstance(field.type, String):
+                field = cast(field, String)
+            expressions.append(field.ilike(pattern, escape="\\"))
+        return stmt.filter(or_(*expressions))
+
 
 # ---------- Users ----------
-class UserAdmin(ModelView, model=models.User):
+class UserAdmin(FastListMixin, ModelView, model=models.User):
     identity = "user"
     name_plural = "Users"
     icon = "fa-solid fa-user"
@@ -47,6 +106,8 @@ class UserAdmin(ModelView, model=models.User):
     column_searchable_list = _attrs(models.User, ["email", "name", "phone"])
     column_default_sort = _safe_sort(models.User, ["created_at", "id"], desc=True)
 
+    form_excluded_columns = _attrs(models.User, ["auth_version", "reviews"])
+
     can_view_details = True
     can_create = True
     can_edit = True
@@ -54,7 +115,7 @@ class UserAdmin(ModelView, model=models.User):
 
 
 # ---------- Places ----------
-class PlaceAdmin(ModelView, model=models.Place):
+class PlaceAdmin(FastListMixin, ModelView, model=models.Place):
     identity = "place"
     name_plural = "Places"
     icon = "fa-solid fa-location-dot"
@@ -63,18 +124,62 @@ class PlaceAdmin(ModelView, model=models.Place):
     lon_expr = func.ST_X(models.Place.geom.cast(Geometry("POINT", 4326))).label("lon")
     lat_expr = func.ST_Y(models.Place.geom.cast(Geometry("POINT", 4326))).label("lat")
 
-    column_list = (
-        _attrs(models.Place, [
-            "id", "name", "description", "address", "ward", "district", "city",
-            "phone", "website", "price_level", "rating", "slug", "is_public",
-            "status", "share_token", "published_at", "created_at", "updated_at"
-        ]) + [lon_expr, lat_expr]
-    )
+    column_list = _attrs(models.Place, [
+        "id", "name", "description", "address", "ward", "district", "city",
+        "phone", "website", "price_level", "rating", "review_count", "rating_score", "slug", "is_public",
+        "status", "share_token", "published_at", "created_at", "updated_at"
+    ])
+    # lon/lat are computed for the one place shown, not per list row; reviews are paged via the API
+    column_details_list = [
+        a.key for a in sa_inspect(models.Place).attrs if a.key not in ("geom", "reviews")
+    ] + ["lon", "lat"]
+    # Every field here is backed by a trigram index
     column_searchable_list = _attrs(models.Place, ["name", "address", "ward", "district", "city", "phone", "website", "slug"])
     column_filters = _attrs(models.Place, ["status", "is_public", "city", "district"])
     column_default_sort = _safe_sort(models.Place, ["created_at", "id"], desc=True)
 
-    form_excluded_columns = _attrs(models.Place, ["geom", "created_at", "updated_at", "published_at"])
+    form_excluded_columns = _attrs(models.Place, [
+        "geom", "open_minutes", "review_count", "rating_sum", "rating_score",
+        "created_at", "updated_at", "published_at",
+    ])
+
+    async def _moderate(self, request: Request, action_name: str) -> RedirectResponse:
+        pks = [int(pk) for pk in request.query_params.get("pks", "").split(",") if pk]
+        if pks:
+            def _run():
+                with SessionLocal() as db:
+                    places_crud.bulk_moderate(
+                        db, action_name, ids=pks, moderator_id=request.session.get("admin_user_id")
+                    )
+            await anyio.to_thread.run_sync(_run)
+        return RedirectResponse(request.url_for("admin:list", identity=self.identity), status_code=302)
+
+    @action(name="approve", label="Approve", confirmation_message="Approve the selected places?")
+    async def approve(self, request: Request):
+        return await self._moderate(request, "approve")
+
+    @action(name="reject", label="Reject", confirmation_message="Reject (and unpublish) the selected places?")
+    async def reject(self, request: Request):
+        return await self._moderate(request, "reject")
+
+    @action(name="publish", label="Publish", confirmation_message="Publish the selected places?")
+    async def publish(self, request: Request):
+        return await self._moderate(request, "publish")
+
+    @action(name="unpublish", label="Unpublish", confirmation_message="Unpublish the selected places?")
+    async def unpublish(self, request: Request):
+        return await self._moderate(request, "unpublish")
+
+    async def get_object_for_details(self, value):
+        obj = await super().get_object_for_details(value)
+        if obj is not None:
+            def _coords():
+                with self.session_maker() as session:
+                    return session.execute(
+                        select(self.lon_expr, self.lat_expr).where(models.Place.id == obj.id)
+                    ).first()
+            obj.lon, obj.lat = await anyio.to_thread.run_sync(_coords)
+        return obj
 
     can_view_details = True
     can_create = True
@@ -83,7 +188,7 @@ class PlaceAdmin(ModelView, model=models.Place):
 
 
 # ---------- Categories ----------
-class CategoryAdmin(ModelView, model=models.Category):
+class CategoryAdmin(FastListMixin, ModelView, model=models.Category):
     identity = "category"
     name_plural = "Categories"
     icon = "fa-regular fa-list"
@@ -100,7 +205,7 @@ class CategoryAdmin(ModelView, model=models.Category):
 
 
 # ---------- PlaceCategory (composite PK) ----------
-class PlaceCategoryAdmin(ModelView, model=models.PlaceCategory):
+class PlaceCategoryAdmin(FastListMixin, ModelView, model=models.PlaceCategory):
     identity = "place-category"
     name_plural = "Place Categories"
     icon = "fa-regular fa-square"
@@ -117,7 +222,7 @@ class PlaceCategoryAdmin(ModelView, model=models.PlaceCategory):
 
 
 # ---------- Opening Hours ----------
-class OpeningHourAdmin(ModelView, model=models.OpeningHour):
+class OpeningHourAdmin(FastListMixin, ModelView, model=models.OpeningHour):
     identity = "opening-hour"
     name_plural = "Opening Hours"
     icon = "fa-regular fa-clock"
@@ -134,7 +239,7 @@ class OpeningHourAdmin(ModelView, model=models.OpeningHour):
 
 
 # ---------- Menus ----------
-class MenuAdmin(ModelView, model=models.Menu):
+class MenuAdmin(FastListMixin, ModelView, model=models.Menu):
     identity = "menu"
     name_plural = "Menus"
     icon = "fa-regular fa-folder"
@@ -151,7 +256,7 @@ class MenuAdmin(ModelView, model=models.Menu):
 
 
 # ---------- Menu Items (exclude ARRAY 'tags' in form) ----------
-class MenuItemAdmin(ModelView, model=models.MenuItem):
+class MenuItemAdmin(FastListMixin, ModelView, model=models.MenuItem):
     identity = "menu-item"
     name_plural = "Menu Items"
     icon = "fa-regular fa-square-plus"
@@ -170,7 +275,7 @@ class MenuItemAdmin(ModelView, model=models.MenuItem):
 
 
 # ---------- Reviews ----------
-class ReviewAdmin(ModelView, model=models.Review):
+class ReviewAdmin(FastListMixin, ModelView, model=models.Review):
     identity = "review"
     name_plural = "Reviews"
     icon = "fa-regular fa-comment"
@@ -189,7 +294,7 @@ class ReviewAdmin(ModelView, model=models.Review):
 
 
 # ---------- Weather Cache ----------
-class WeatherCacheAdmin(ModelView, model=models.WeatherCache):
+class WeatherCacheAdmin(FastListMixin, ModelView, model=models.WeatherCache):
     identity = "weather-cache"
     name_plural = "Weather Cache"
     icon = "fa-regular fa-cloud"
@@ -208,17 +313,48 @@ class WeatherCacheAdmin(ModelView, model=models.WeatherCache):
 
 
 # ---------- Place Weather Score ----------
-class PlaceWeatherScoreAdmin(ModelView, model=models.PlaceWeatherScore):
+class PlaceWeatherScoreAdmin(FastListMixin, ModelView, model=models.PlaceWeatherScore):
     identity = "place-weather-score"
     name_plural = "Place Weather Scores"
     icon = "fa-regular fa-sun"
 
     pk_columns = _pk_columns(models.PlaceWeatherScore) or _attrs(models.PlaceWeatherScore, ["place_id", "weather_bucket"])
-    column_list = _attrs(models.PlaceWeatherScore, ["place_id", "weather_bucket", "score"])
+    column_list = _attrs(models.PlaceWeatherScore, ["place_id", "weather_bucket", "score", "is_manual"])
     column_searchable_list = _attrs(models.PlaceWeatherScore, ["weather_bucket"])
+    column_filters = _attrs(models.PlaceWeatherScore, ["weather_bucket", "is_manual"])
     column_default_sort = _safe_sort(models.PlaceWeatherScore, ["place_id"], desc=False)
 
     can_view_details = True
     can_create = True
     can_edit = True
     can_delete = True
+
+    async def on_model_change(self, data, model, is_created, request: Request) -> None:
+        # a hand-set score must survive the next recompute_scores run
+        if "score" in data and (is_created or data["score"] != model.score):
+            data["is_manual"] = True
+
+
+# ---------- Slow queries (read-only) ----------
+class SlowQueryAdmin(FastListMixin, ModelView, model=models.SlowQuery):
+    identity = "slow-query"
+    name_plural = "Slow Queries"
+    icon = "fa-solid fa-gauge-high"
+
+    pk_columns = _pk_columns(models.SlowQuery)
+    column_list = _attrs(models.SlowQuery, ["id", "captured_at", "duration_ms", "endpoint", "plan_signature", "statement"])
+    column_details_list = _attrs(models.SlowQuery, [
+        "id", "captured_at", "duration_ms", "endpoint", "statement", "parameters", "plan_signature", "plan"
+    ])
+    column_searchable_list = _attrs(models.SlowQuery, ["endpoint", "statement"])
+    column_filters = _attrs(models.SlowQuery, ["endpoint", "plan_signature"])
+    column_sortable_list = _attrs(models.SlowQuery, ["captured_at", "duration_ms"])
+    column_default_sort = _safe_sort(models.SlowQuery, ["captured_at", "id"], desc=True)
+    column_formatters = {
+        models.SlowQuery.statement: lambda m, a: (m.statement or "")[:120],
+    }
+
+    can_view_details = True
+    can_create = False
+    can_edit = False
+    can_delete = True
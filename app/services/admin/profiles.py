@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqladmin import BaseView, expose
+from starlette.requests import Request
+from starlette.responses import FileResponse, RedirectResponse, Response
+
+from app.core import profiling
+
+
+class ProfilesAdmin(BaseView):
+    """Arm request profiling and download the captured speedscope files.
+
+    sqladmin points the menu at the exposed method whose name sorts first,
+    hence ``list_profiles`` ahead of the ``profile_*`` handlers.
+    """
+
+    name = "Profiles"
+    identity = "profiles"
+    icon = "fa-solid fa-fire"
+
+    @expose("/profiles", methods=["GET"], identity="profiles")
+    async def list_profiles(self, request: Request):
+        profiles = [
+            {**p, "created": datetime.fromtimestamp(p["created"]).isoformat(timespec="seconds")}
+            for p in profiling.list_profiles()
+        ]
+        state = profiling.armed()
+        if state:
+            state = {**state, "until": datetime.fromtimestamp(state["until"]).isoformat(timespec="seconds")}
+        return await self.templates.TemplateResponse(
+            request,
+            "profiles.html",
+            {"title": "Request profiles", "profiles": profiles, "armed": state,
+             "header_enabled": bool(profiling.PROFILE_TOKEN)},
+        )
+
+    @expose("/profiles/arm", methods=["POST"], identity="profiles-arm")
+    async def profile_arm(self, request: Request):
+        form = await request.form()
+        try:
+            minutes = min(max(float(form.get("minutes") or 5), 0.5), 60)
+        except ValueError:
+            minutes = 5
+        profiling.arm((form.get("prefix") or "/").strip(), minutes)
+        return RedirectResponse(request.url_for("admin:profiles"), status_code=303)
+
+    @expose("/profiles/disarm", methods=["POST"], identity="profiles-disarm")
+    async def profile_disarm(self, request: Request):
+        profiling.disarm()
+        return RedirectResponse(request.url_for("admin:profiles"), status_code=303)
+
+    @expose("/profiles/download/{profile_id}", methods=["GET"], identity="profiles-download")
+    async def profile_download(self, request: Request):
+        path = profiling.profile_path(request.path_params["profile_id"])
+        if path is None:
+            return Response("Profile not found", status_code=404)
+        return FileResponse(path, media_type="application/json", filename=path.rsplit("/", 1)[-1])
@@ -0,0 +1,323 @@
+"""
+In-process prefix index for typeahead (``GET /autocomplete``).
+
+Suggestions come from approved public places: their names, the menu items
+and categories they list and their districts.  Every term is indexed under
+its folded form (see ``textnorm.fold``) and under the suffixes starting at
+its next few words, so "bun ch" and "cha" both reach "Bún chả".
+
+Each kind has its own snapshot, a key-sorted array searched with ``bisect``,
+so a ``kind`` filter only ever touches the arrays it asks for.  Ranking uses
+a weight per suggestion: ``rating_score * (1 + log1p(review_count))`` for a
+place, the sum over the places listing it for a dish, category or district.
+Picking the best ``k`` in a prefix range either scans the range or walks all
+rows by descending weight until ``k`` fall inside it, whichever is cheaper,
+so one-letter prefixes cost as little as long ones.
+
+Changes reported by ``place_events`` are applied as a small overlay
+(``refresh``); aggregate weights and removed dishes/districts catch up at the
+periodic full rebuild (``AUTOCOMPLETE_REBUILD``), which is also how other
+worker processes see changes committed elsewhere.
+"""
+import asyncio
+import heapq
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import models
+from app.services.place_events import PlaceChanges, on_places_changed
+from app.services.textnorm import fold
+
+AUTOCOMPLETE_REFRESH = float(os.getenv("AUTOCOMPLETE_REFRESH", "2"))  # seconds; 0 = never build
+AUTOCOMPLETE_REBUILD = float(os.getenv("AUTOCOMPLETE_REBUILD", "900"))
+AUTOCOMPLETE_SUFFIXES = int(os.getenv("AUTOCOMPLETE_SUFFIXES", "3"))  # word starts indexed per term
+AUTOCOMPLETE_MAX_OVERLAY = int(os.getenv("AUTOCOMPLETE_MAX_OVERLAY", "5000"))  # changed places before a rebuild
+
+KINDS = ("place", "dish", "category", "district")
+
+# Change kinds (see place_events) that can alter a suggestion or its weight
+_SIGNALS = {
+    "Place", "Place.name", "Place.district", "Place.status", "Place.is_public",
+    "Menu", "MenuItem", "PlaceCategory", "Category", "Review",
+}
+_LOAD_CHUNK = 10000
+_SORT_CHUNK = 50000
+_HIGH = "\U0010ffff"
+
+
+class Suggestion(NamedTuple):
+    kind: str
+    text: str
+    place_id: Optional[int]
+    weight: float
+
+
+def place_weight(review_count: Optional[int], rating_score) -> float:
+    rating = float(rating_score) if rating_score is not None else 3.5
+    return rating * (1.0 + math.log1p(review_count or 0))
+
+
+def index_keys(text: str, suffixes: int = AUTOCOMPLETE_SUFFIXES) -> List[str]:
+    """Folded ``text`` plus its suffixes starting at the next words.
+
+    >>> index_keys("Bún chả Hương Liên", 3)
+    ['bun cha huong lien', 'cha huong lien', 'huong lien']
+    """
+    words = fold(text).split(" ")
+    if words == [""]:
+        return []
+    return [" ".join(words[i:]) for i in range(min(len(words), max(1, suffixes)))]
+
+
+def _sorted_positions(values: list) -> list:
+    """Positions of ``values`` in ascending order.
+
+    Sorts chunks and merges them lazily: one ``sorted`` over millions of rows
+    would hold the GIL, and stall the event loop, for seconds during a rebuild.
+    """
+    key = values.__getitem__
+    runs = [sorted(range(lo, min(lo + _SORT_CHUNK, len(values))), key=key)
+            for lo in range(0, len(values), _SORT_CHUNK)]
+    return list(heapq.merge(*runs, key=key))
+
+
+class Snapshot:
+    """Immutable key-sorted arrays over a list of suggestions."""
+
+    def __init__(self, suggestions: List[Suggestion], suffixes: int = AUTOCOMPLETE_SUFFIXES):
+        keys: List[str] = []
+        rows = array("l")
+        for i, s in enumerate(suggestions):
+            for key in index_keys(s.text, suffixes):
+                keys.append(key)
+                rows.append(i)
+        order = _sorted_positions(keys)
+        self.suggestions = suggestions
+        self.keys = [keys[j] for j in order]
+        self.rows = array("l", (rows[j] for j in order))
+        weights = array("d", (suggestions[i].weight for i in self.rows))
+        self.by_weight = array("l", (j for j in reversed(_sorted_positions(weights))))
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def top(self, prefix: str, k: int, skip=lambda s: False) -> List[Suggestion]:
+        """Best ``k`` suggestions with a key starting with ``prefix``."""
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _HIGH, lo)
+        if lo >= hi:
+            return []
+        seen: Set[int] = set()
+        out: List[Suggestion] = []
+        if (hi - lo) ** 2 <= k * len(self.rows):
+            for i in self.rows[lo:hi]:
+                if i not in seen:
+                    seen.add(i)
+                    if not skip(self.suggestions[i]):
+                        out.append(self.suggestions[i])
+            return heapq.nlargest(k, out, key=lambda s: s.weight)
+        for row in self.by_weight:
+            if lo <= row < hi:
+                i = self.rows[row]
+                if i not in seen:
+                    seen.add(i)
+                    if not skip(self.suggestions[i]):
+                        out.append(self.suggestions[i])
+                        if len(out) == k:
+                            break
+        return out
+
+
+def build_suggestions(
+    places: Iterable[Tuple[int, str, Optional[str], Optional[int], object]],
+    dishes: Iterable[Tuple[int, str]],
+    categories: Iterable[Tuple[int, str]],
+) -> List[Suggestion]:
+    """Suggestions from ``(id, name, district, review_count, rating_score)``
+    place rows and ``(place_id, name)`` dish/category rows grouped by place;
+    one per place, one per distinct folded dish, category and district."""
+    out: List[Suggestion] = []
+    weights: Dict[int, float] = {}
+    totals: Dict[Tuple[str, str], float] = defaultdict(float)
+    labels: Dict[Tuple[str, str], Tuple[float, str]] = {}
+    folded: Dict[str, str] = {}  # dish, category and district names repeat a lot
+    counted: Set[str] = set()  # folded names already added for ``owner``
+    owner = None
+
+    def add(kind: str, pid: int, text: Optional[str]) -> None:
+        nonlocal owner
+        if not text or pid not in weights:
+            return
+        if owner != (kind, pid):
+            owner = (kind, pid)
+            counted.clear()
+        key = (kind, folded.get(text) or folded.setdefault(text, fold(text)))
+        if not key[1] or key[1] in counted:  # a dish on two menus counts once
+            return
+        counted.add(key[1])
+        w = weights[pid]
+        totals[key] += w
+        if key not in labels or w > labels[key][0]:
+            labels[key] = (w, text.strip())
+
+    for pid, name, district, review_count, rating_score in places:
+        weights[pid] = place_weight(review_count, rating_score)
+        out.append(Suggestion("place", name.strip(), pid, weights[pid]))
+        add("district", pid, district)
+    for pid, text in dishes:
+        add("dish", pid, text)
+    for pid, text in categories:
+        add("category", pid, text)
+    out.extend(Suggestion(kind, labels[(kind, key)][1], None, total) for (kind, key), total in totals.items())
+    return out
+
+
+def _stream(db: Session, stmt):
+    # a generator, so each query only starts once the previous one is consumed
+    yield from db.execute(stmt, execution_options={"yield_per": _LOAD_CHUNK}).tuples()
+
+
+def load_suggestions(db: Session, place_ids: Optional[List[int]] = None) -> List[Suggestion]:
+    P, M, MI, PC, C = models.Place, models.Menu, models.MenuItem, models.PlaceCategory, models.Category
+    visible = (P.is_public.is_(True), P.status == "approved")
+    if place_ids is not None:
+        visible += (P.id.in_(place_ids),)
+    return build_suggestions(
+        _stream(db, select(P.id, P.name, P.district, P.review_count, P.rating_score).where(*visible)),
+        _stream(db, select(M.place_id, MI.name).join(MI, MI.menu_id == M.id).join(P, P.id == M.place_id)
+                .where(*visible).order_by(M.place_id)),
+        _stream(db, select(PC.place_id, C.title).join(C, C.id == PC.category_id).join(P, P.id == PC.place_id)
+                .where(*visible).order_by(PC.place_id)),
+    )
+
+
+class _State(NamedTuple):
+    base: Dict[str, Snapshot]  # one per kind
+    changed: frozenset         # place ids whose "place" suggestion in base is stale
+    overlay: Tuple[Tuple[Suggestion, Tuple[str, ...]], ...]  # with its index keys
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._state: Optional[_State] = None
+        self._lock = threading.Lock()
+        self._dirty: Set[Optional[int]] = set()
+        self._known: Set[Tuple[str, str]] = set()
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def load(self, suggestions: List[Suggestion]) -> None:
+        by_kind: Dict[str, List[Suggestion]] = {kind: [] for kind in KINDS}
+        for s in suggestions:
+            by_kind[s.kind].append(s)
+        base = {kind: Snapshot(rows) for kind, rows in by_kind.items()}
+        self._known = {(s.kind, fold(s.text)) for s in suggestions if s.place_id is None}
+        self._state = _State(base, frozenset(), ())
+
+    def rebuild(self, db: Session) -> None:
+        with self._lock:
+            self._dirty.clear()
+        self.load(load_suggestions(db))
+        logger.info(f"autocomplete index rebuilt: {sum(map(len, self._state.base.values()))} suggestions")
+
+    def refresh(self, db: Session, place_ids: List[int]) -> None:
+        """Re-read ``place_ids`` into the overlay: their place suggestions are
+        replaced, dishes/categories/districts not yet indexed are added."""
+        state = self._state
+        fresh = load_suggestions(db, place_ids)
+        ids = frozenset(place_ids)
+        overlay = [entry for entry in state.overlay if entry[0].place_id not in ids]
+        for s in fresh:
+            if s.place_id is None:
+                if (s.kind, fold(s.text)) in self._known:
+                    continue
+                self._known.add((s.kind, fold(s.text)))
+            overlay.append((s, tuple(index_keys(s.text))))
+        self._state = _State(state.base, state.changed | ids, tuple(overlay))
+
+    def mark_dirty(self, place_ids: Iterable[Optional[int]]) -> None:
+        with self._lock:
+            self._dirty.update(place_ids)
+
+    def sync(self, db: Session, force_rebuild: bool = False) -> None:
+        """Apply pending changes: overlay refresh, or a full rebuild when
+        forced, never built, a category changed or the overlay grew too big."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        state = self._state
+        if (
+            force_rebuild or state is None or None in dirty
+            or len(state.changed) + len(dirty) > AUTOCOMPLETE_MAX_OVERLAY
+        ):
+            self.rebuild(db)
+        elif dirty:
+            self.refresh(db, sorted(dirty))
+
+    def suggest(self, q: str, limit: int = 10, kinds: Optional[Set[str]] = None) -> List[Suggestion]:
+        prefix = fold(q)
+        state = self._state
+        if not prefix or state is None:
+            return []
+        changed = state.changed
+        kinds = KINDS if kinds is None else [kind for kind in KINDS if kind in kinds]
+
+        found: List[Suggestion] = []
+        for kind in kinds:
+            if kind == "place" and changed:
+                found += state.base[kind].top(prefix, limit, lambda s: s.place_id in changed)
+            else:
+                found += state.base[kind].top(prefix, limit)
+        found += [
+            s for s, keys in state.overlay
+            if s.kind in kinds and any(key.startswith(prefix) for key in keys)
+        ]
+        best: Dict[Tuple[str, str], Suggestion] = {}
+        for s in found:
+            key = (s.kind, s.place_id if s.place_id is not None else fold(s.text))
+            if key not in best or s.weight > best[key].weight:
+                best[key] = s
+        return heapq.nlargest(limit, best.values(), key=lambda s: s.weight)
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+@on_places_changed
+def _mark_dirty(changes: PlaceChanges) -> None:
+    ids = [pid for pid, kinds in changes.items() if kinds & _SIGNALS]
+    if ids:
+        autocomplete_index.mark_dirty(ids)
+
+
+async def watch_autocomplete(refresh: float = AUTOCOMPLETE_REFRESH, rebuild: float = AUTOCOMPLETE_REBUILD) -> None:
+    """Build the index, then apply changes every ``refresh`` seconds and
+    rebuild it from scratch every ``rebuild`` seconds."""
+    from app.database import SessionLocal
+
+    def run(force_rebuild: bool) -> None:
+        with SessionLocal() as db:
+            autocomplete_index.sync(db, force_rebuild)
+
+    loop = asyncio.get_running_loop()
+    last_rebuild = None
+    while True:
+        try:
+            due = last_rebuild is None or (rebuild > 0 and loop.time() - last_rebuild >= rebuild)
+            await run_in_threadpool(run, due)
+            if due:
+                last_rebuild = loop.time()
+        except Exception:
+            logger.exception("autocomplete index update failed")
+        await asyncio.sleep(refresh)
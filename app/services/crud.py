@@ -1,6 +1,7 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models import models
-from app.security import hash_password, verify_password
+from app.security import hash_password, verify_and_update_password
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
@@ -21,8 +22,25 @@ def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email.lower())
     if not user or not user.password_hash:
         return None
-    if not verify_password(password, user.password_hash):
+    ok, new_hash = verify_and_update_password(password, user.password_hash)
+    if not ok:
         return None
     if hasattr(models.User, "is_active") and not user.is_active: 
         return None
-    return user
\ No newline at end of file
+    if new_hash:
+        rehash_password(db, user, new_hash)
+    return user
+
+def rehash_password(db: Session, user: models.User, new_hash: str) -> None:
+    """Store a re-costed hash of the *same* password.
+
+    Core UPDATE on purpose: this is not a credential change, so it must not
+    bump ``auth_version`` (which would revoke the user's live tokens).
+    """
+    U = models.User
+    db.execute(
+        update(U).where(U.id == user.id, U.password_hash == user.password_hash)
+        .values(password_hash=new_hash, updated_at=U.updated_at),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
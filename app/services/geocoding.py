@@ -1,7 +1,10 @@
 import os
+import time
 import requests
+from app.core.metrics import GEOCODE_LATENCY, GEOCODE_REQUESTS
 
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+# Point this at a local stub server for benchmarks (bench/stub_upstream.py).
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
 UA_DEFAULT = "FoodMap/1.0 (contact: admin@example.com)"
 HEADERS = {"User-Agent": os.getenv("GEOCODER_UA", UA_DEFAULT)}
 
@@ -12,9 +15,18 @@ def geocode_address(*, address: str, ward: str|None=None, district: str|None=Non
     parts = [address, ward, district, city, country]
     params = {"q": ", ".join([p for p in parts if p]),
               "format": "json", "addressdetails": 0, "limit": 1,"countrycodes": "vn"}
-    resp = requests.get(NOMINATIM_URL, params=params, headers=HEADERS, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
+    started = time.perf_counter()
+    try:
+        resp = requests.get(NOMINATIM_URL, params=params, headers=HEADERS, timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception:
+        GEOCODE_REQUESTS.labels("error").inc()
+        raise
+    finally:
+        GEOCODE_LATENCY.observe(time.perf_counter() - started)
     if not data:
+        GEOCODE_REQUESTS.labels("empty").inc()
         return None
+    GEOCODE_REQUESTS.labels("ok").inc()
     return {"lat": float(data[0]["lat"]), "lon": float(data[0]["lon"])}
@@ -0,0 +1,52 @@
+"""
+"Open at" helpers on top of ``places.open_minutes``.
+
+Opening hours are kept per place as an int4multirange of minute-of-week
+offsets (Monday 00:00 = 0, Sunday 23:59 = 10079) by a trigger on
+``opening_hours``; intervals past midnight are already split there, so
+checking a point in time is a single ``@>`` on an indexed column.
+"""
+from datetime import datetime
+from typing import List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Integer, literal
+
+from app.models import models
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+LOCAL_TZ = ZoneInfo("Asia/Bangkok")
+
+
+def minute_of_week(at: datetime) -> int:
+    """Local minute-of-week for ``at`` (naive datetimes are taken as local time)."""
+    local = at.replace(tzinfo=LOCAL_TZ) if at.tzinfo is None else at.astimezone(LOCAL_TZ)
+    return local.weekday() * 1440 + local.hour * 60 + local.minute
+
+
+def resolve_open_minute(open_now: bool = False, open_at: Optional[datetime] = None) -> Optional[int]:
+    """Minute-of-week to filter on, or None when no opening-hours filter was asked for."""
+    if open_at is not None:
+        return minute_of_week(open_at)
+    if open_now:
+        return minute_of_week(datetime.now(LOCAL_TZ))
+    return None
+
+
+def open_at_clause(minute: int):
+    """SQL filter: place is open at ``minute`` (places without hours never match)."""
+    return models.Place.open_minutes.op("@>")(literal(minute, Integer))
+
+
+def ranges_to_list(multirange) -> Optional[List[List[int]]]:
+    """JSON-friendly ``[[lower, upper), ...]`` form of a multirange value."""
+    if multirange is None:
+        return None
+    return [[r.lower, r.upper] for r in multirange]
+
+
+def is_open(intervals: Optional[Sequence[Sequence[int]]], minute: int) -> bool:
+    """In-memory counterpart of ``open_at_clause`` for ``ranges_to_list`` output."""
+    if not intervals:
+        return False
+    return any(lo <= minute < hi for lo, hi in intervals)
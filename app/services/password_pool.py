@@ -0,0 +1,150 @@
+"""
+bcrypt off the event loop and off the GIL.
+
+Hashing/verifying runs in a dedicated process pool (``PASSWORD_HASH_WORKERS``,
+0 = inline).  At most ``PASSWORD_HASH_MAX_PENDING`` jobs may be queued or
+running; sync callers wait up to ``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds for a
+slot, async callers are turned away at once, both with a 503.
+
+Keep this module light: pool workers import it to unpickle the job functions.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "2.0"))
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """passlib context, built on first use (passlib is slow to import at boot).
+
+    Hashes below the configured cost are flagged by needs_update() and rehashed on login.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+    )
+
+
+# ---------- jobs (run inside pool workers) ----------
+def _hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+def _verify_and_update(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return get_pwd_context().verify_and_update(password, password_hash)
+
+
+class _InlineFuture(Future):
+    def __init__(self, fn, *args):
+        super().__init__()
+        try:
+            self.set_result(fn(*args))
+        except Exception as err:
+            self.set_exception(err)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                    )
+        return self._pool
+
+    def _submit(self, fn, *args, wait: bool = True) -> Future:
+        if not self._slots.acquire(blocking=wait, timeout=self.queue_timeout if wait else None):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(status_code=503, detail="Authentication is busy, retry shortly", headers={"Retry-After": "1"})
+        started = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        try:
+            fut = _InlineFuture(fn, *args) if self.workers <= 0 else self._executor().submit(fn, *args)
+        except Exception:
+            self._done(started)
+            raise
+        fut.add_done_callback(lambda _: self._done(started))
+        return fut
+
+    def _done(self, started: float) -> None:
+        self._slots.release()
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - started
+
+    # ---------- sync API (threadpool callers) ----------
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password).result()
+
+    def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        ok, new_hash = self._submit(_verify_and_update, password, password_hash).result()
+        if new_hash:
+            with self._lock:
+                self.rehashed += 1
+        return ok, new_hash
+
+    # ---------- async API (event loop callers) ----------
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password, wait=False))
+
+    async def averify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        fut = self._submit(_verify_and_update, password, password_hash, wait=False)
+        ok, new_hash = await asyncio.wrap_future(fut)
+        if new_hash:
+            with self._lock:
+                self.rehashed += 1
+        return ok, new_hash
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "in_flight": self.in_flight,
+                "busy_seconds": round(self.busy_seconds, 3),
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_QUEUE_TIMEOUT)
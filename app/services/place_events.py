@@ -0,0 +1,101 @@
+"""
+Tracks which places a transaction touched and, once it commits, hands the
+change set to whoever keeps derived data about places (cached lists, indexes...).
+
+Listeners receive ``{place_id: {"Place.status", "MenuItem", ...}}``.  The
+``None`` key means "could affect any place" (e.g. a category was renamed or
+deleted; a brand-new category has no places yet and is not reported).
+Code that writes with bulk/Core statements bypasses the ORM and must call
+``notify_places_changed`` itself.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models import models
+
+PlaceChanges = Dict[Optional[int], Set[str]]
+
+_INFO_KEY = "place_changes"
+_TRACKED = (
+    models.Place,
+    models.Category,
+    models.PlaceCategory,
+    models.OpeningHour,
+    models.Menu,
+    models.MenuItem,
+    models.Review,
+    models.PlaceWeatherScore,
+)
+
+_listeners: List[Callable[[PlaceChanges], None]] = []
+
+
+def on_places_changed(fn: Callable[[PlaceChanges], None]):
+    """Register ``fn`` to be called after every commit that touched places."""
+    _listeners.append(fn)
+    return fn
+
+
+def notify_places_changed(changes: PlaceChanges) -> None:
+    if not changes:
+        return
+    for fn in _listeners:
+        try:
+            fn(changes)
+        except Exception:
+            logger.exception(f"place change listener {fn.__name__} failed")
+
+
+def _place_id_of(obj) -> Optional[int]:
+    if isinstance(obj, models.Place):
+        return obj.id
+    if isinstance(obj, models.Category):
+        return None
+    if isinstance(obj, models.MenuItem):
+        menu = sa_inspect(obj).attrs.menu.loaded_value
+        return getattr(menu, "place_id", None)
+    return getattr(obj, "place_id", None)
+
+
+def _kinds_of(obj, dirty: bool) -> Set[str]:
+    if dirty and isinstance(obj, models.Place):
+        state = sa_inspect(obj)
+        return {f"Place.{a.key}" for a in state.attrs if a.history.has_changes()}
+    if dirty and isinstance(obj, models.Category):
+        # only its own columns (a rename); a place joining it shows up as Place.categories
+        state = sa_inspect(obj)
+        changed = any(state.attrs[c.key].history.has_changes() for c in state.mapper.column_attrs)
+        return {"Category"} if changed else set()
+    return {type(obj).__name__}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    changes = session.info.setdefault(_INFO_KEY, defaultdict(set))
+    new = session.new
+    for objs, dirty in ((new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objs:
+            if not isinstance(obj, _TRACKED):
+                continue
+            if objs is new and isinstance(obj, models.Category):
+                continue  # linked to places through PlaceCategory rows, reported on their own
+            kinds = _kinds_of(obj, dirty)
+            if kinds:
+                changes[_place_id_of(obj)] |= kinds
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session: Session) -> None:
+    changes = session.info.pop(_INFO_KEY, None)
+    if changes:
+        notify_places_changed(dict(changes))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
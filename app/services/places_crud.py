@@ -1,10 +1,15 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, literal, asc, desc
+from sqlalchemy import func, literal, asc, desc, update, null, or_, case, select, cast
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.orm import selectinload
 from datetime import time as _time
 from app.models import models
 from app.schemas import places_schemas
+from app.services.opening_hours import open_at_clause
+from app.services.place_events import notify_places_changed
+from app.services.textnorm import fold
 from geoalchemy2.types import Geometry
 
 try:
@@ -218,6 +223,68 @@ def delete_place(db: Session, place: models.Place) -> None:
     db.delete(place)
     db.commit()
 
+# ---------- Moderation ----------
+_P = models.Place
+# action -> (values to set, condition for a row to actually change)
+MODERATION_ACTIONS = {
+    "approve": ({"status": "approved"}, _P.status != "approved"),
+    "reject": (
+        {"status": "rejected", "is_public": False, "published_at": null()},
+        or_(_P.status != "rejected", _P.is_public.is_(True)),
+    ),
+    "publish": (
+        {"is_public": True, "published_at": func.coalesce(_P.published_at, func.now())},
+        _P.is_public.is_(False),
+    ),
+    "unpublish": ({"is_public": False, "published_at": null()}, _P.is_public.is_(True)),
+}
+_MODERATED_KINDS = {"Place.status", "Place.is_public", "Place.published_at"}
+
+def bulk_moderate(
+    db: Session,
+    action: str,
+    *,
+    ids: Optional[Sequence[int]] = None,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    district: Optional[str] = None,
+    moderator_id: Optional[int] = None,
+) -> dict:
+    """Apply ``action`` to the places selected by ``ids`` or by the filters.
+
+    One ``UPDATE ... RETURNING`` for the whole selection; rows already in the
+    target state are left alone.  Caches are invalidated once, after commit.
+    """
+    if action not in MODERATION_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown action: {action}")
+    if ids is None and not (status or city or district):
+        raise HTTPException(status_code=400, detail="Give ids or at least one filter")
+
+    values, changes_something = MODERATION_ACTIONS[action]
+    stmt = update(_P).where(changes_something)
+    if ids is not None:
+        stmt = stmt.where(_P.id.in_(list(ids)))
+    if status:
+        stmt = stmt.where(_P.status == status)
+    if city:
+        stmt = stmt.where(func.lower(_P.city) == city.lower())
+    if district:
+        stmt = stmt.where(func.lower(_P.district) == district.lower())
+    if moderator_id:
+        values = dict(values, updated_by=moderator_id)
+
+    updated = list(db.scalars(
+        stmt.values(**values).returning(_P.id),
+        execution_options={"synchronize_session": False},
+    ))
+    db.commit()
+    notify_places_changed({pid: set(_MODERATED_KINDS) for pid in updated})
+
+    result = {"action": action, "updated": len(updated), "ids": updated}
+    if ids is not None:
+        result["skipped"] = len(set(ids) - set(updated))
+    return result
+
 def get_place(db: Session, place_id: int) -> Optional[models.Place]:
     return db.get(models.Place, place_id)
 
@@ -229,6 +296,7 @@ def list_places_nearby(
     lon: float | None, lat: float | None,
     radius_m: int | None = None,
     only_public: bool = True, only_approved: bool = True,
+    open_minute: int | None = None,
     limit: int = 20, offset: int = 0, **filters
 ):
     q = db.query(models.Place)
@@ -237,6 +305,8 @@ def list_places_nearby(
         q = q.filter(models.Place.is_public.is_(True))
     if only_approved:
         q = q.filter(models.Place.status == 'approved')
+    if open_minute is not None:
+        q = q.filter(open_at_clause(open_minute))
 
     if lon is not None and lat is not None:
         ref = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
@@ -255,7 +325,7 @@ def list_places_nearby(
             func.null().label("distance_m"),
             func.ST_X(models.Place.geom.cast(Geometry("POINT", 4326))).label("lon"),
             func.ST_Y(models.Place.geom.cast(Geometry("POINT", 4326))).label("lat"),
-        ).order_by(desc(models.Place.rating).nullslast())
+        ).order_by(desc(models.Place.rating_score), desc(models.Place.id))
 
     rows = q.limit(limit).offset(offset).all()
 
@@ -274,6 +344,85 @@ def list_places_nearby(
             out.append((place, None, None, None))
     return out
 
+def folded(expr):
+    """``f_unaccent(lower(expr))`` - the expression idx_menu_items_name_folded_trgm is built on."""
+    return func.f_unaccent(func.lower(expr))
+
+def dish_tags(q: str) -> List[str]:
+    """Tag spellings a query may be stored under: "Bún chả" -> bún chả, bun cha, bun-cha."""
+    raw = " ".join(q.lower().split())
+    plain = fold(q)
+    return list(dict.fromkeys(t for t in (raw, plain, plain.replace(" ", "-")) if t))
+
+def search_dishes_stmt(
+    q: str, *,
+    lon: float | None = None, lat: float | None = None, radius_m: int | None = None,
+    min_price: int | None = None, max_price: int | None = None, limit: int = 20,
+):
+    """Places serving a dish matching ``q``, best match first.
+
+    Items match on a tag (GIN on tags) or on word similarity of the
+    unaccented name (trigram GIN on ``folded(name)``); the planner ORs the
+    two bitmap scans.  A place scores its best item, plus a little for each
+    further matching item (up to 4).
+    """
+    MI, M, P = models.MenuItem, models.Menu, models.Place
+    term = func.f_unaccent(func.lower(literal(q)))
+    name_norm = folded(MI.name)
+    tag_hit = MI.tags.overlap(cast(dish_tags(q), ARRAY(MI.tags.type.item_type)))
+    item_score = func.greatest(func.word_similarity(term, name_norm), case((tag_hit, 1.0), else_=0.0))
+
+    items = (
+        select(M.place_id, MI.name, MI.price, item_score.label("score"))
+        .join(M, M.id == MI.menu_id)
+        .where(or_(tag_hit, term.op("<%")(name_norm)))
+    )
+    if min_price is not None:
+        items = items.where(MI.price >= min_price)
+    if max_price is not None:
+        items = items.where(MI.price <= max_price)
+    items = items.cte("matched_items")
+
+    relevance = (func.max(items.c.score) + 0.05 * func.least(func.count() - 1, 4)).label("relevance")
+    dishes = func.json_agg(aggregate_order_by(
+        func.json_build_object("name", items.c.name, "price", items.c.price), items.c.score.desc()
+    )).label("dishes")
+    point = P.geom.cast(Geometry("POINT", 4326))
+    stmt = (
+        select(
+            P.id, P.name, P.address, P.district, P.price_level, P.rating_score,
+            func.ST_X(point).label("lon"), func.ST_Y(point).label("lat"),
+            relevance, dishes,
+        )
+        .join(items, items.c.place_id == P.id)
+        .where(P.is_public.is_(True), P.status == "approved")
+        .group_by(P.id)
+    )
+    order = [relevance.desc()]
+    if lon is not None and lat is not None:
+        ref = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+        if radius_m:
+            stmt = stmt.where(func.ST_DWithin(P.geom, ref, radius_m))
+        distance = func.ST_Distance(P.geom, ref).label("distance_m")
+        stmt = stmt.add_columns(distance)
+        order.append(distance.asc())
+    else:
+        stmt = stmt.add_columns(null().label("distance_m"))
+    return stmt.order_by(*order, P.rating_score.desc().nulls_last(), P.id).limit(limit)
+
+def search_dishes(db: Session, q: str, *, dishes_per_place: int = 3, **kwargs) -> List[dict]:
+    rows = db.execute(search_dishes_stmt(q, **kwargs)).mappings().all()
+    return [
+        {
+            **{k: row[k] for k in ("id", "name", "address", "district", "price_level", "lon", "lat")},
+            "rating_score": float(row["rating_score"]) if row["rating_score"] is not None else None,
+            "relevance": round(float(row["relevance"]), 3),
+            "distance_m": round(float(row["distance_m"])) if row["distance_m"] is not None else None,
+            "dishes": row["dishes"][:dishes_per_place],
+        }
+        for row in rows
+    ]
+
 def _to_placeout_row(row) -> places_schemas.PlaceOut:
     if hasattr(row, "_mapping"):
         m = row._mapping
@@ -295,6 +444,8 @@ def _to_placeout_row(row) -> places_schemas.PlaceOut:
         website=place.website,
         price_level=place.price_level,
         rating=float(place.rating) if place.rating is not None else None,
+        review_count=place.review_count or 0,
+        rating_score=float(place.rating_score) if place.rating_score is not None else None,
         is_public=place.is_public,
         status=place.status,
         slug=place.slug,
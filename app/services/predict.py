@@ -1,41 +1,146 @@
-# import os
-
-# from loguru import logger
-
-# from core.errors import PredictException, ModelLoadException
-# from core.config import MODEL_NAME, MODEL_PATH
-
-
-# class MachineLearningModelHandlerScore(object):
-#     model = None
-
-#     @classmethod
-#     def predict(cls, input, load_wrapper=None, method="predict"):
-#         clf = cls.get_model(load_wrapper)
-#         if hasattr(clf, method):
-#             return getattr(clf, method)(input)
-#         raise PredictException(f"'{method}' attribute is missing")
-
-#     @classmethod
-#     def get_model(cls, load_wrapper):
-#         if cls.model is None and load_wrapper:
-#             cls.model = cls.load(load_wrapper)
-#         return cls.model
-
-#     @staticmethod
-#     def load(load_wrapper):
-#         model = None
-#         if MODEL_PATH.endswith("/"):
-#             path = f"{MODEL_PATH}{MODEL_NAME}"
-#         else:
-#             path = f"{MODEL_PATH}/{MODEL_NAME}"
-#         if not os.path.exists(path):
-#             message = f"Machine learning model at {path} not exists!"
-#             logger.error(message)
-#             raise FileNotFoundError(message)
-#         model = load_wrapper(path)
-#         if not model:
-#             message = f"Model {model} could not load!"
-#             logger.error(message)
-#             raise ModelLoadException(message)
-#         return model
+import io
+import os
+import threading
+
+import joblib
+import numpy as np
+from loguru import logger
+
+from app.core.errors import PredictException, ModelLoadException
+from app.core.config import MODEL_MMAP_MODE, MODEL_NAME, MODEL_PATH
+from app.models.prediction import FEATURES
+
+try:
+    import pyarrow as pa  # optional: Arrow IPC input for /predict/batch
+except ImportError:
+    pa = None
+
+
+def model_file_path():
+    if MODEL_PATH.endswith("/"):
+        return f"{MODEL_PATH}{MODEL_NAME}"
+    return f"{MODEL_PATH}/{MODEL_NAME}"
+
+
+def load_model_file(path):
+    """joblib.load with the arrays memory-mapped (shared page cache across workers).
+
+    Only arrays in uncompressed joblib dumps can be mapped; compressed files
+    load normally.  Publish new models by renaming over the old file, never
+    by rewriting it in place: the live model reads from the mapped file.
+    """
+    return joblib.load(path, mmap_mode=MODEL_MMAP_MODE or None)
+
+
+# ---------- batch input -> (n, len(FEATURES)) float matrix ----------
+def _check(matrix):
+    if matrix.ndim != 2 or matrix.shape[1] != len(FEATURES):
+        raise ValueError(f"expected shape (n, {len(FEATURES)}), got {matrix.shape}")
+    if not np.isfinite(matrix).all():
+        raise ValueError("features must be finite numbers")
+    return matrix
+
+
+def matrix_from_rows(rows):
+    """``[{"feature1": ..., ...}, ...]`` or ``[[f1, ..., f5], ...]``."""
+    if not rows:
+        return np.empty((0, len(FEATURES)))
+    if isinstance(rows[0], dict):
+        rows = [[r[f] for f in FEATURES] for r in rows]
+    return _check(np.asarray(rows, dtype=float).reshape(len(rows), -1))
+
+
+def matrix_from_columns(columns):
+    """``{"feature1": [...], ..., "feature5": [...]}``."""
+    missing = [f for f in FEATURES if f not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {missing}")
+    return _check(np.column_stack([np.asarray(columns[f], dtype=float) for f in FEATURES]))
+
+
+def matrix_from_npy(data):
+    """A ``.npy`` file holding an (n, 5) numeric array."""
+    return _check(np.load(io.BytesIO(data), allow_pickle=False).astype(float, copy=False))
+
+
+def matrix_from_arrow(data):
+    """An Arrow IPC stream with one numeric column per feature."""
+    if pa is None:
+        raise PredictException("Arrow input needs pyarrow installed")
+    table = pa.ipc.open_stream(data).read_all()
+    return matrix_from_columns({f: table.column(f).to_numpy() for f in FEATURES if f in table.column_names})
+
+
+def _file_version(path):
+    st = os.stat(path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"
+
+
+class MachineLearningModelHandlerScore(object):
+    model = None
+    model_version = None
+    failed_version = None  # file signature that failed to load; retried once it changes
+    _lock = threading.Lock()
+
+    @classmethod
+    def predict(cls, input, load_wrapper=None, method="predict"):
+        clf = cls.get_model(load_wrapper)
+        if hasattr(clf, method):
+            return getattr(clf, method)(input)
+        raise PredictException(f"'{method}' attribute is missing")
+
+    @classmethod
+    def get_model(cls, load_wrapper):
+        if cls.model is None and load_wrapper:
+            with cls._lock:
+                if cls.model is None:
+                    version = _file_version(model_file_path()) if os.path.exists(model_file_path()) else None
+                    try:
+                        cls.model = cls.load(load_wrapper)
+                    except (Exception, ModelLoadException):
+                        cls.failed_version = version
+                        raise
+                    cls.model_version, cls.failed_version = version, None
+        return cls.model
+
+    @classmethod
+    def reload_if_changed(cls, load_wrapper=load_model_file):
+        """Swap in the model file if it changed on disk; returns True on swap.
+
+        The new model is fully loaded before the (atomic) reference swap, so
+        requests already holding the old model finish with it.  A file that
+        fails to load leaves the current model in place and is not retried
+        until it changes again.
+        """
+        path = model_file_path()
+        try:
+            version = _file_version(path)
+        except FileNotFoundError:
+            return False
+        if version in (cls.model_version, cls.failed_version):
+            return False
+        try:
+            new_model = cls.load(load_wrapper)
+        except (Exception, ModelLoadException) as err:
+            cls.failed_version = version
+            logger.error(f"Keeping model {cls.model_version}: reload of {path} failed: {err}")
+            return False
+        with cls._lock:
+            cls.model, cls.model_version, cls.failed_version = new_model, version, None
+        logger.info(f"Loaded model {path} (version {version})")
+        return True
+
+    @staticmethod
+    def load(load_wrapper):
+        model = None
+        path = model_file_path()
+        if not os.path.exists(path):
+            message = f"Machine learning model at {path} not exists!"
+            logger.error(message)
+            raise FileNotFoundError(message)
+        model = load_wrapper(path)
+        if not model:
+            message = f"Model {model} could not load!"
+            logger.error(message)
+            raise ModelLoadException(message)
+        return model
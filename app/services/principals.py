@@ -0,0 +1,114 @@
+"""
+Who is calling, without a DB round trip per request.
+
+A ``Principal`` (id, email, role, is_active, auth_version) is looked up in a
+short-TTL in-process LRU, then Redis, then the ``users`` table.  Changing a
+user's email, password, role or active flag bumps ``users.auth_version``
+(revoking tokens issued before) and evicts the cached principal once the
+transaction commits.  Other workers may serve their local copy for at most
+``PRINCIPAL_LOCAL_TTL`` seconds; set it to 0 to always consult Redis.
+"""
+import os
+from typing import Optional
+
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.database import SessionLocal
+from app.models import models
+from app import redis_client
+from app.redis_client import get_redis
+
+PRINCIPAL_LOCAL_TTL = float(os.getenv("PRINCIPAL_LOCAL_TTL", "5"))
+PRINCIPAL_REDIS_TTL = int(os.getenv("PRINCIPAL_REDIS_TTL", "300"))
+
+_AUTH_FIELDS = ("email", "password_hash", "role", "is_active")
+_INFO_KEY = "principal_changes"
+
+_local = TTLCache(maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")), ttl=PRINCIPAL_LOCAL_TTL)
+
+
+class Principal(BaseModel):
+    id: int
+    email: Optional[str] = None
+    role: str = "user"
+    is_active: bool = True
+    auth_version: int = 0
+
+
+def _redis_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+def _load(user_id: int) -> Optional[Principal]:
+    U = models.User
+    with SessionLocal() as db:
+        row = db.execute(
+            select(U.id, U.email, U.role, U.is_active, U.auth_version).where(U.id == user_id)
+        ).first()
+    return Principal(**row._mapping) if row else None
+
+
+def get_principal(user_id: int) -> Optional[Principal]:
+    principal = _local.get(user_id)
+    if principal is not None:
+        return principal
+
+    try:
+        cached = get_redis().get(_redis_key(user_id))
+    except redis_client.RedisError as err:
+        logger.warning(f"principal cache unavailable: {err}")
+        cached = None
+    if cached:
+        principal = Principal.model_validate_json(cached)
+    else:
+        principal = _load(user_id)
+        if principal is None:
+            return None
+        try:
+            get_redis().setex(_redis_key(user_id), PRINCIPAL_REDIS_TTL, principal.model_dump_json())
+        except redis_client.RedisError:
+            pass
+
+    _local.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    _local.pop(user_id)
+    try:
+        get_redis().delete(_redis_key(user_id))
+    except redis_client.RedisError as err:
+        logger.warning(f"could not evict principal {user_id}: {err}")
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_auth_version(session: Session, flush_context, instances) -> None:
+    changed = set()
+    for obj in session.dirty:
+        if not isinstance(obj, models.User):
+            continue
+        state = sa_inspect(obj)
+        if any(state.attrs[k].history.has_changes() for k in _AUTH_FIELDS):
+            obj.auth_version = (obj.auth_version or 0) + 1
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, models.User):
+            changed.add(obj.id)
+    if changed:
+        session.info.setdefault(_INFO_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict(session: Session) -> None:
+    for user_id in session.info.pop(_INFO_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,25 @@
+import unicodedata
+
+
+class _FoldTable(dict):
+    """Code point -> lower-case character without diacritics, filled on first use
+    (``str.translate`` is far cheaper than NFD + a per-character filter)."""
+
+    def __missing__(self, cp: int) -> str:
+        s = unicodedata.normalize("NFD", chr(cp)).replace("đ", "d")
+        self[cp] = s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+        return s
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def fold(text: str | None) -> str:
+    """Lower-case, strip Vietnamese diacritics and collapse whitespace.
+
+    >>> fold("  Bún   Chả Đắc Kim ")
+    'bun cha dac kim'
+    """
+    if not text:
+        return ""
+    return " ".join(text.lower().translate(_FOLD_TABLE).split())
@@ -1,34 +1,128 @@
 import os, json, httpx
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-import redis
+from app.core.metrics import WEATHER_CACHE
+from app.redis_client import get_redis
 
-_r = redis.Redis(
-    host=os.getenv("REDIS_HOST", "redis"),
-    port=int(os.getenv("REDIS_PORT", "6379")),
-    decode_responses=True,
-)
+# Point this at a local stub server to run without the real API (no key needed then).
+_DEFAULT_BASE_URL = "https://api.openweathermap.org/data/2.5"
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", _DEFAULT_BASE_URL).rstrip("/")
 
-def fetch_weather_cached(lat: float, lon: float, ttl_sec: int = 900) -> dict:
-    key = f"weather:{round(lat,3)}:{round(lon,3)}"
-    cached = _r.get(key)
-    if cached:
-        return json.loads(cached)
+# Forecasts are coarse, so neighbouring users share one upstream call per ~1 km cell.
+FORECAST_GRID_PRECISION = int(os.getenv("FORECAST_GRID_PRECISION", "2"))
+
+# Upper bound on simultaneous upstream calls for one batch request.
+WEATHER_FETCH_CONCURRENCY = int(os.getenv("WEATHER_FETCH_CONCURRENCY", "8"))
+
+# A second, long-lived copy of every payload, served when the upstream is down.
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", "21600"))
+
+def grid_cell(lat: float, lon: float, precision: int = 3) -> tuple[float, float]:
+    return round(lat, precision), round(lon, precision)
 
+def _get_openweather(path: str, lat: float, lon: float, client: httpx.Client | None = None) -> dict:
     api_key = os.getenv("OPENWEATHER_API_KEY", "").strip()
-    if not api_key:
+    if not api_key and OPENWEATHER_BASE_URL == _DEFAULT_BASE_URL:
         raise HTTPException(status_code=503, detail="OPENWEATHER_API_KEY is not set")
 
     params = {"lat": lat, "lon": lon, "appid": api_key, "units": "metric", "lang": "vi"}
-    with httpx.Client(timeout=10) as client:
-        r = client.get("https://api.openweathermap.org/data/2.5/weather", params=params)
-        if r.status_code == 401:
-            raise HTTPException(status_code=401, detail="OpenWeather: Unauthorized (check/activate API key)")
-        r.raise_for_status()
-        payload = r.json()
+    if client is None:
+        with httpx.Client(timeout=10) as own:
+            return _get_openweather(path, lat, lon, own)
+    r = client.get(f"{OPENWEATHER_BASE_URL}/{path}", params=params)
+    if r.status_code == 401:
+        raise HTTPException(status_code=401, detail="OpenWeather: Unauthorized (check/activate API key)")
+    r.raise_for_status()
+    return r.json()
+
+def _store(pipe, key: str, ttl_sec: int, payload: dict) -> None:
+    raw = json.dumps(payload)
+    pipe.setex(key, ttl_sec, raw)
+    pipe.setex(f"{key}:stale", WEATHER_STALE_TTL, raw)
 
-    _r.setex(key, ttl_sec, json.dumps(payload))
+def _cached_fetch(kind: str, key: str, fetch, ttl_sec: int) -> dict:
+    _r = get_redis()
+    cached = _r.get(key)
+    if cached:
+        WEATHER_CACHE.labels(kind, "hit").inc()
+        return json.loads(cached)
+
+    try:
+        payload = fetch()
+    except httpx.HTTPError:
+        stale = _r.get(f"{key}:stale")
+        if stale is None:
+            raise
+        WEATHER_CACHE.labels(kind, "stale").inc()
+        return json.loads(stale)
+    WEATHER_CACHE.labels(kind, "miss").inc()
+    pipe = _r.pipeline()
+    _store(pipe, key, ttl_sec, payload)
+    pipe.execute()
     return payload
 
+def fetch_weather_cached(lat: float, lon: float, ttl_sec: int = 900) -> dict:
+    clat, clon = grid_cell(lat, lon)
+    return _cached_fetch(
+        "weather", f"weather:{clat}:{clon}", lambda: _get_openweather("weather", lat, lon), ttl_sec
+    )
+
+def fetch_weather_many(
+    points: list[tuple[float, float]], ttl_sec: int = 900, max_concurrency: int = WEATHER_FETCH_CONCURRENCY
+) -> dict[tuple[float, float], dict | Exception]:
+    """Current weather for many points, keyed by grid cell.
+
+    Points sharing a cell are fetched once; cache misses are fetched in parallel
+    (at most ``max_concurrency`` at a time). A failed cell maps to its exception.
+    """
+    _r = get_redis()
+    cells = list(dict.fromkeys(grid_cell(lat, lon) for lat, lon in points))
+    keys = [f"weather:{clat}:{clon}" for clat, clon in cells]
+    out: dict[tuple[float, float], dict | Exception] = {}
+    for cell, cached in zip(cells, _r.mget(keys) if keys else []):
+        if cached:
+            out[cell] = json.loads(cached)
+
+    misses = [c for c in cells if c not in out]
+    WEATHER_CACHE.labels("weather", "hit").inc(len(out))
+    if not misses:
+        return out
+
+    with httpx.Client(timeout=10) as client:
+        def fetch(cell):
+            try:
+                return _get_openweather("weather", cell[0], cell[1], client)
+            except Exception as err:
+                return err
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(misses)))) as pool:
+            fetched = dict(zip(misses, pool.map(fetch, misses)))
+
+    pipe = _r.pipeline()
+    for (clat, clon), payload in fetched.items():
+        if not isinstance(payload, Exception):
+            _store(pipe, f"weather:{clat}:{clon}", ttl_sec, payload)
+    pipe.execute()
+    WEATHER_CACHE.labels("weather", "miss").inc(sum(not isinstance(p, Exception) for p in fetched.values()))
+
+    failed = [c for c, p in fetched.items() if isinstance(p, httpx.HTTPError)]
+    if failed:
+        stale = _r.mget([f"weather:{clat}:{clon}:stale" for clat, clon in failed])
+        for cell, raw in zip(failed, stale):
+            if raw:
+                fetched[cell] = json.loads(raw)
+                WEATHER_CACHE.labels("weather", "stale").inc()
+    out.update(fetched)
+    return out
+
+def fetch_forecast_cached(lat: float, lon: float, ttl_sec: int = 1800) -> dict:
+    """3-hourly, 5-day forecast for the grid cell containing (lat, lon)."""
+    clat, clon = grid_cell(lat, lon, FORECAST_GRID_PRECISION)
+    return _cached_fetch(
+        "forecast", f"forecast:{clat}:{clon}", lambda: _get_openweather("forecast", clat, clon), ttl_sec
+    )
+
 def parse_weather(payload: dict) -> tuple[float, float, int, str]:
     temp = float(payload["main"]["temp"])
     feels = float(payload["main"]["feels_like"])
@@ -36,6 +130,47 @@ def parse_weather(payload: dict) -> tuple[float, float, int, str]:
     cond = (payload["weather"][0]["main"] or "").lower()
     return temp, feels, hum, cond
 
+def parse_forecast(payload: dict) -> list[dict]:
+    """Forecast slots as ``{"time", "temp_c", "feels_like_c", "humidity", "condition"}``, oldest first."""
+    slots = []
+    for entry in payload.get("list") or []:
+        t, f, h, cond = parse_weather(entry)
+        slots.append({
+            "time": datetime.fromtimestamp(int(entry["dt"]), tz=timezone.utc),
+            "temp_c": t, "feels_like_c": f, "humidity": h, "condition": cond,
+        })
+    slots.sort(key=lambda s: s["time"])
+    return slots
+
+def hourly_from_slots(slots: list[dict], start: datetime, hours: int) -> list[dict]:
+    """Expand forecast slots to one entry per hour from ``start``.
+
+    Temperatures and humidity are interpolated linearly between the slots
+    around each hour; the condition is the one of the latest slot not after it.
+    Hours outside the forecast range take the nearest slot as is.
+    """
+    if not slots:
+        return []
+    base = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    out, i = [], 0
+    for n in range(hours):
+        at = base + timedelta(hours=n)
+        while i + 1 < len(slots) and slots[i + 1]["time"] <= at:
+            i += 1
+        prev = slots[i]
+        nxt = slots[i + 1] if i + 1 < len(slots) else None
+        if nxt is None or at <= prev["time"]:
+            out.append(dict(prev, time=at))
+            continue
+        w = (at - prev["time"]) / (nxt["time"] - prev["time"])
+        out.append(dict(
+            prev, time=at,
+            temp_c=round(prev["temp_c"] + w * (nxt["temp_c"] - prev["temp_c"]), 2),
+            feels_like_c=round(prev["feels_like_c"] + w * (nxt["feels_like_c"] - prev["feels_like_c"]), 2),
+            humidity=round(prev["humidity"] + w * (nxt["humidity"] - prev["humidity"])),
+        ))
+    return out
+
 def bucket_from(feels_like_c: float, condition: str) -> str:
     c = condition.lower()
     if "rain" in c or "drizzle" in c or "thunderstorm" in c: return "rain"
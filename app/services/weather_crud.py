@@ -1,11 +1,148 @@
-from typing import Sequence, Optional
+import json
+import math
+import os
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from geoalchemy2.types import Geometry
+
 from app.models import models
+from app import redis_client
+from app.redis_client import get_redis
+from app.services.opening_hours import is_open, ranges_to_list
+from app.services.place_events import PlaceChanges, on_places_changed
+
+# Ranked candidates per bucket are identical for every user, so they are
+# computed once, kept in Redis and only narrowed down per request.
+BUCKET_TOP_N = int(os.getenv("BUCKET_TOP_N", "300"))
+BUCKET_CACHE_TTL = int(os.getenv("BUCKET_CACHE_TTL", "3600"))
+_CACHE_PREFIX = "bucket:places"
+# Bumped to invalidate: lists are keyed by generation, so one loaded before an
+# invalidation lands under the old generation and just expires.
+_CACHE_GENERATION = f"{_CACHE_PREFIX}:gen"
+
+# Changes to these never affect the precomputed lists.  (Reviews do: they
+# move rating_score, a ranking key in _load_candidates.)
+_IRRELEVANT = {"Menu", "MenuItem"}
+
+
+def _cache_key(generation: str, city_like: str) -> str:
+    return f"{_CACHE_PREFIX}:{generation}:{city_like.lower()}"
+
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres (haversine)."""
+    r = 6371008.8
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
+def _load_candidates(db: Session, buckets: Sequence[str], city_like: str) -> Dict[str, List[dict]]:
+    """Top-N approved public places per bucket, for all ``buckets`` in one query."""
+    P, S = models.Place, models.PlaceWeatherScore
+    rank = func.row_number().over(
+        partition_by=S.weather_bucket,
+        order_by=(S.score.desc(), P.rating_score.desc(), P.id),
+    ).label("rank")
+    q = db.query(
+        S.weather_bucket.label("bucket"),
+        S.score.label("score"),
+        P.id, P.name, P.address, P.district, P.city, P.rating,
+        func.ST_X(P.geom.cast(Geometry("POINT", 4326))).label("lon"),
+        func.ST_Y(P.geom.cast(Geometry("POINT", 4326))).label("lat"),
+        P.open_minutes,
+        rank,
+    ).join(P, P.id == S.place_id).filter(
+        S.weather_bucket.in_(list(buckets)),
+        P.is_public.is_(True),
+        P.status == "approved",
+    )
+    if city_like:
+        q = q.filter(func.lower(P.city).like(f"%{city_like.lower()}%"))
+    sub = q.subquery()
+    rows = (
+        db.query(sub)
+        .filter(sub.c.rank <= BUCKET_TOP_N)
+        .order_by(sub.c.bucket, sub.c.rank)
+        .all()
+    )
+
+    out: Dict[str, List[dict]] = {b: [] for b in buckets}
+    for r in rows:
+        out[r.bucket].append({
+            "id": r.id,
+            "name": r.name,
+            "address": r.address,
+            "district": r.district,
+            "city": r.city,
+            "rating": float(r.rating) if r.rating is not None else None,
+            "score": float(r.score),
+            "lat": float(r.lat) if r.lat is not None else None,
+            "lon": float(r.lon) if r.lon is not None else None,
+            "open": ranges_to_list(r.open_minutes),
+        })
+    return out
+
+
+def find_places_for_buckets(
+    db: Session, buckets: Sequence[str], city_like: str = "hà nội"
+) -> Dict[str, List[dict]]:
+    """Ranked candidate lists for ``buckets``; Redis first, one DB query for misses."""
+    buckets = list(dict.fromkeys(buckets))
+    try:
+        r = get_redis()
+        key = _cache_key(r.get(_CACHE_GENERATION) or "0", city_like)
+        cached = r.hmget(key, buckets) if buckets else []
+    except redis_client.RedisError as err:
+        logger.warning(f"bucket cache unavailable: {err}")
+        return _load_candidates(db, buckets, city_like)
+
+    out = {b: json.loads(c) for b, c in zip(buckets, cached) if c is not None}
+    missing = [b for b in buckets if b not in out]
+    if missing:
+        loaded = _load_candidates(db, missing, city_like)
+        out.update(loaded)
+        try:
+            pipe = r.pipeline()
+            pipe.hset(key, mapping={b: json.dumps(v) for b, v in loaded.items()})
+            pipe.expire(key, BUCKET_CACHE_TTL)
+            pipe.execute()
+        except redis_client.RedisError as err:
+            logger.warning(f"bucket cache write failed: {err}")
+    return out
+
+
+def rank_candidates(
+    candidates: List[dict],
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    limit: int = 12,
+    open_minute: Optional[int] = None,
+) -> List[dict]:
+    """Narrow a precomputed bucket list down for one user."""
+    if open_minute is not None:
+        candidates = [c for c in candidates if is_open(c.get("open"), open_minute)]
+    if lat is None or lon is None or not radius_km:
+        return candidates[:limit]
+
+    radius_m = radius_km * 1000
+    near = []
+    for c in candidates:
+        if c["lat"] is None or c["lon"] is None:
+            continue
+        d = _distance_m(lat, lon, c["lat"], c["lon"])
+        if d <= radius_m:
+            near.append(dict(c, distance_m=d))
+    # Closest first, then weather score
+    near.sort(key=lambda c: (c["distance_m"], -c["score"]))
+    return near[:limit]
 
-def haversine_km(db: Session, lat: float, lon: float):
-    point_wkt = func.ST_GeogFromText(f"SRID=4326;POINT({lon} {lat})")
-    return point_wkt
 
 def find_places_for_bucket(
     db: Session,
@@ -15,26 +152,22 @@ def find_places_for_bucket(
     lon: Optional[float] = None,
     radius_km: Optional[float] = None,
     limit: int = 12,
-):
-    P, S = models.Place, models.PlaceWeatherScore
-    q = db.query(P).join(S, S.place_id == P.id).filter(
-        S.weather_bucket == bucket,
-        P.is_public.is_(True),
-        P.status == "approved"
+    open_minute: Optional[int] = None,
+) -> List[dict]:
+    candidates = find_places_for_buckets(db, [bucket], city_like=city_like)[bucket]
+    return rank_candidates(
+        candidates, lat=lat, lon=lon, radius_km=radius_km, limit=limit, open_minute=open_minute
     )
 
-    if hasattr(P, "city") and city_like:
-        q = q.filter(func.lower(P.city).like(f"%{city_like.lower()}%"))
 
-    # Distance filter if lat/lon provided
-    if lat is not None and lon is not None and radius_km:
-        user_pt = haversine_km(db, lat, lon)
-        # ST_DWithin(geog1, geog2, meters)
-        q = q.filter(func.ST_DWithin(P.geom, user_pt, radius_km * 1000))
+def invalidate_bucket_cache() -> None:
+    try:
+        get_redis().incr(_CACHE_GENERATION)
+    except redis_client.RedisError as err:
+        logger.warning(f"bucket cache invalidation failed: {err}")
 
-        # Optionally order by distance first, then weather score
-        q = q.order_by(func.ST_Distance(P.geom, user_pt).asc(), S.score.desc())
-    else:
-        q = q.order_by(S.score.desc(), P.rating.desc().nullslast())
 
-    return q.limit(limit).all()
+@on_places_changed
+def _on_places_changed(changes: PlaceChanges) -> None:
+    if any(kinds - _IRRELEVANT for kinds in changes.values()):
+        invalidate_bucket_cache()
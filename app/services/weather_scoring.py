@@ -0,0 +1,247 @@
+"""
+Derives ``place_weather_score`` rows from what we already know about a place:
+menu item names/tags and categories matched against the bucket tag lists of
+``weather.suggestion()``, plus the review rating and price level.  The rating
+is ``Place.rating_score`` (reviews smoothed towards 3.5), not the hand-entered
+``Place.rating``, which most places never get.
+
+Everything is computed on NumPy matrices for a whole chunk of places at once:
+
+    hits  = X (places x terms) @ W (terms x buckets)
+    score = W_MATCH * (1 - exp(-hits / MATCH_SATURATION))
+          + W_QUALITY * rating + W_PRICE * affordability
+
+Rows flagged ``is_manual`` are never overwritten.  Places whose menus,
+categories, reviews or price change are queued in Redis and picked up by
+``recompute_dirty``, which the app runs every ``WEATHER_SCORE_INTERVAL``
+seconds (0 turns that off, e.g. to run ``python -m app.services.weather_scoring``
+from cron instead); add ``--all`` for a full rebuild.
+"""
+import asyncio
+import os
+import re
+import sys
+import uuid
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import models
+from app import redis_client
+from app.redis_client import get_redis
+from app.services.place_events import PlaceChanges, notify_places_changed, on_places_changed
+from app.services.textnorm import fold
+from app.services.weather import suggestion
+
+BUCKETS = ("hot", "warm", "cool", "cold", "rain")
+
+W_MATCH = 0.75
+W_QUALITY = 0.20
+W_PRICE = 0.05
+MATCH_SATURATION = 2.0
+
+CHUNK_SIZE = 20000
+UPSERT_BATCH = 5000
+WEATHER_SCORE_INTERVAL = float(os.getenv("WEATHER_SCORE_INTERVAL", "60"))
+
+_DIRTY_KEY = "weather_scores:dirty"
+_DIRTY_ALL = "*"
+_SIGNALS = {
+    "Menu", "MenuItem", "PlaceCategory", "Category",
+    "Place", "Place.name", "Place.categories", "Place.menus", "Place.price_level", "Review",
+}
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def _words(text: str) -> str:
+    """Folded text padded with spaces so terms only match on word boundaries."""
+    return f" {_NON_WORD.sub(' ', fold(text)).strip()} "
+
+
+def bucket_terms() -> tuple[List[str], np.ndarray]:
+    """Distinct folded tags and their (terms x buckets) membership matrix."""
+    per_bucket = [{_words(t) for t in suggestion(b)[1]} for b in BUCKETS]
+    terms = sorted(set().union(*per_bucket))
+    W = np.array([[t in tags for tags in per_bucket] for t in terms], dtype=np.float64)
+    return terms, W
+
+
+def _load_signals(db: Session, place_ids: Sequence[int]):
+    places = db.execute(
+        select(models.Place.id, models.Place.name, models.Place.rating_score.label("rating"), models.Place.price_level)
+        .where(models.Place.id.in_(place_ids))
+        .order_by(models.Place.id)
+    ).all()
+    items = db.execute(
+        select(models.Menu.place_id, models.MenuItem.name, models.MenuItem.tags)
+        .join(models.MenuItem, models.MenuItem.menu_id == models.Menu.id)
+        .where(models.Menu.place_id.in_(place_ids))
+    ).all()
+    cats = db.execute(
+        select(models.PlaceCategory.place_id, models.Category.slug, models.Category.title)
+        .join(models.Category, models.Category.id == models.PlaceCategory.category_id)
+        .where(models.PlaceCategory.place_id.in_(place_ids))
+    ).all()
+    return places, items, cats
+
+
+def score_matrix(places, items, cats) -> np.ndarray:
+    """(places x buckets) scores in [0, 1] for the rows returned by ``_load_signals``."""
+    n = len(places)
+    index = {p.id: i for i, p in enumerate(places)}
+
+    doc_place: List[int] = []
+    docs: List[str] = []
+    for p in places:
+        doc_place.append(index[p.id])
+        docs.append(_words(p.name))
+    for place_id, name, tags in items:
+        doc_place.append(index[place_id])
+        docs.append(_words(" | ".join([name or "", *(tags or [])])))
+    for place_id, slug, title in cats:
+        doc_place.append(index[place_id])
+        docs.append(_words(f"{(slug or '').replace('-', ' ')} | {title or ''}"))
+
+    terms, W = bucket_terms()
+    owner = np.asarray(doc_place, dtype=np.int64)
+    doc_arr = np.asarray(docs, dtype=str)
+    X = np.zeros((n, len(terms)), dtype=np.float64)
+    for j, term in enumerate(terms):
+        hit = np.char.find(doc_arr, term) >= 0
+        X[:, j] = np.bincount(owner[hit], minlength=n)
+
+    match = 1.0 - np.exp(-(X @ W) / MATCH_SATURATION)
+
+    rating = np.array([float(p.rating) if p.rating is not None else np.nan for p in places])
+    price = np.array([float(p.price_level) if p.price_level is not None else np.nan for p in places])
+    quality = np.nan_to_num(np.clip((rating - 1.0) / 4.0, 0.0, 1.0), nan=0.5)
+    afford = np.nan_to_num(np.clip((5.0 - price) / 4.0, 0.0, 1.0), nan=0.5)
+
+    score = W_MATCH * match + (W_QUALITY * quality + W_PRICE * afford)[:, None]
+    return np.round(np.clip(score, 0.0, 1.0), 2)
+
+
+def _upsert(db: Session, place_ids: Sequence[int], scores: np.ndarray) -> None:
+    S = models.PlaceWeatherScore.__table__
+    rows = [
+        {"place_id": pid, "weather_bucket": b, "score": float(scores[i, j])}
+        for i, pid in enumerate(place_ids)
+        for j, b in enumerate(BUCKETS)
+    ]
+    for start in range(0, len(rows), UPSERT_BATCH):
+        stmt = pg_insert(S).values(rows[start:start + UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[S.c.place_id, S.c.weather_bucket],
+            set_={"score": stmt.excluded.score},
+            where=S.c.is_manual.is_(False),
+        )
+        db.execute(stmt)
+
+
+def _score_chunk(db: Session, ids: Sequence[int]) -> int:
+    places, items, cats = _load_signals(db, ids)
+    if not places:
+        return 0
+    _upsert(db, [p.id for p in places], score_matrix(places, items, cats))
+    return len(places)
+
+
+def recompute_scores(db: Session, place_ids: Optional[Iterable[int]] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """Recompute scores for ``place_ids`` (all places if None). Returns places scored."""
+    total = 0
+    if place_ids is not None:
+        ids = sorted(set(place_ids))
+        for start in range(0, len(ids), chunk_size):
+            total += _score_chunk(db, ids[start:start + chunk_size])
+    else:
+        last_id = 0
+        while True:
+            ids = db.execute(
+                select(models.Place.id).where(models.Place.id > last_id)
+                .order_by(models.Place.id).limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+            total += _score_chunk(db, ids)
+            last_id = ids[-1]
+    db.commit()
+    if total:
+        notify_places_changed({None: {"PlaceWeatherScore"}})
+    logger.info(f"weather scores recomputed for {total} places")
+    return total
+
+
+def recompute_dirty(db: Session) -> int:
+    """Recompute only the places queued by ``_mark_dirty`` since the last run.
+
+    The queue is renamed to a key of this run's own, so places marked meanwhile
+    wait for the next run; if scoring fails the ids go back into the queue."""
+    r = get_redis()
+    processing = f"{_DIRTY_KEY}:{uuid.uuid4().hex}"
+    try:
+        r.rename(_DIRTY_KEY, processing)
+    except redis_client.ResponseError:  # no such key: nothing queued
+        return 0
+    try:
+        dirty = r.smembers(processing)
+        if _DIRTY_ALL in dirty:
+            total = recompute_scores(db)
+        else:
+            total = recompute_scores(db, [int(pid) for pid in dirty])
+    except Exception:
+        pipe = r.pipeline()
+        pipe.sunionstore(_DIRTY_KEY, [_DIRTY_KEY, processing])
+        pipe.delete(processing)
+        pipe.execute()
+        raise
+    r.delete(processing)
+    return total
+
+
+async def watch_dirty_scores(interval: float = WEATHER_SCORE_INTERVAL) -> None:
+    """Run ``recompute_dirty`` every ``interval`` seconds.  Every worker may run
+    this: each run takes over the queue atomically, so no place is scored twice."""
+    from app.database import SessionLocal
+
+    def run() -> int:
+        with SessionLocal() as db:
+            return recompute_dirty(db)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run)
+        except redis_client.RedisError as err:
+            logger.warning(f"weather score queue unavailable: {err}")
+        except Exception:
+            logger.exception("weather score recompute failed")
+
+
+@on_places_changed
+def _mark_dirty(changes: PlaceChanges) -> None:
+    ids = [
+        _DIRTY_ALL if pid is None else str(pid)
+        for pid, kinds in changes.items()
+        if kinds & _SIGNALS
+    ]
+    if not ids:
+        return
+    try:
+        get_redis().sadd(_DIRTY_KEY, *ids)
+    except redis_client.RedisError as err:
+        logger.warning(f"could not queue weather score recompute: {err}")
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    with SessionLocal() as session:
+        if "--all" in sys.argv[1:]:
+            recompute_scores(session)
+        else:
+            recompute_dirty(session)
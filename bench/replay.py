@@ -0,0 +1,138 @@
+"""
+Replay recorded traffic (``TRAFFIC_LOG``, see app/core/traffic.py) against a local API.
+
+    python -m bench.replay traffic.log traffic.log.2024-10-18_*.gz \\
+        --base-url http://localhost:8000 --speedup 4 --concurrency 64 \\
+        [--methods GET] [--login bench@example.com:bench-password] [--limit 100000]
+
+Requests keep their recorded spacing divided by ``--speedup`` (0 = as fast
+as possible, bounded by ``--concurrency``).  Only bodiless methods can be
+replayed, since bodies are never recorded.  Calls that were authenticated
+get a token from ``--login`` (defaults to the bench.datagen account).
+
+Prints, per route template: count, errors, p50/p95/p99 replayed, and the
+recorded p50 for comparison.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+import httpx
+
+from bench.datagen import BENCH_EMAIL, BENCH_PASSWORD
+from bench.run import percentile
+
+
+def read_log(paths: List[str], methods, limit: int = 0) -> Iterator[dict]:
+    n = 0
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("m") not in methods:
+                    continue
+                yield record
+                n += 1
+                if limit and n >= limit:
+                    return
+
+
+async def _token(client: httpx.AsyncClient, login: str):
+    email, _, password = login.partition(":")
+    response = await client.post("/auth/login-json", json={"email": email, "password": password})
+    if response.status_code != 200:
+        sys.exit(f"login as {email} failed: {response.status_code} {response.text[:200]}")
+    return response.json()["access_token"]
+
+
+async def replay(records: List[dict], base_url: str, speedup: float, concurrency: int, login: str):
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    recorded: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        auth = None
+        if any(r.get("a") for r in records):
+            auth = {"Authorization": f"Bearer {await _token(client, login)}"}
+
+        async def one(record):
+            route = f'{record["m"]} {record.get("r") or record["p"]}'
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    record["m"], record["p"], params=record.get("q") or None,
+                    headers=auth if record.get("a") else None,
+                )
+                # local data differs from production, so only server errors count
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            finally:
+                slots.release()
+            if failed:
+                errors[route] += 1
+            else:
+                latencies[route].append((time.perf_counter() - started) * 1000)
+            if record.get("d") is not None:
+                recorded[route].append(record["d"])
+
+        tasks = []
+        t0_recorded = records[0]["t"] if records else 0
+        t0 = time.perf_counter()
+        for record in records:
+            if speedup > 0:
+                delay = (record["t"] - t0_recorded) / speedup - (time.perf_counter() - t0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await slots.acquire()
+            tasks.append(asyncio.create_task(one(record)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - t0
+
+    return latencies, recorded, errors, elapsed
+
+
+def report(latencies, recorded, errors, elapsed) -> None:
+    routes = sorted(set(latencies) | set(errors), key=lambda r: -(len(latencies[r]) + errors[r]))
+    total = sum(len(v) for v in latencies.values()) + sum(errors.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} rps)")
+    print(f"{'route':<40}{'n':>7}{'err':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'rec p50':>9}")
+    for route in routes:
+        values = sorted(latencies[route])
+        rec = sorted(recorded[route])
+        print(
+            f"{route[:39]:<40}{len(values):>7}{errors[route]:>6}{percentile(values, 50):>9.1f}"
+            f"{percentile(values, 95):>9.1f}{percentile(values, 99):>9.1f}{percentile(rec, 50):>9.1f}"
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded traffic against a local API")
+    parser.add_argument("logs", nargs="+", help="traffic log files (.gz ok), oldest first")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speedup", type=float, default=1.0, help="0 = no pacing")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--methods", default="GET,HEAD", help="comma-separated methods to replay")
+    parser.add_argument("--login", default=f"{BENCH_EMAIL}:{BENCH_PASSWORD}", help="email:password for authenticated calls")
+    parser.add_argument("--limit", type=int, default=0, help="replay at most N requests")
+    args = parser.parse_args(argv)
+
+    records = sorted(read_log(args.logs, set(args.methods.upper().split(",")), args.limit), key=lambda r: r["t"])
+    if not records:
+        sys.exit("nothing to replay")
+    report(*asyncio.run(replay(records, args.base_url, args.speedup, args.concurrency, args.login)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Run the benchmark scenarios against a running API and compare with baselines.
+
+    python -m bench.run --base-url http://localhost:8000 --scale 100k \\
+        [--only list_places,auth_login] [--duration 20] [--concurrency 16] \\
+        [--save-baseline] [--tolerance 0.2] [--output results.json]
+
+Reports p50/p95/p99 latency and throughput per scenario.  With a baseline
+stored for the scale (``bench/baselines.json``), a scenario regresses when
+its p95 grows, or its throughput drops, by more than ``--tolerance``; the
+exit status is then 1.  ``--save-baseline`` records this run instead.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from bench.scenarios import SCENARIOS, WRITES
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest rank
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies_ms: List[float], errors: int, elapsed_s: float) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, build, duration: float, concurrency: int, warmup: float, seed: int):
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(i: int, until: float, record: bool):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + i)
+        while time.perf_counter() < until:
+            started = time.perf_counter()
+            try:
+                response = await client.request(**build(rng))
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if record:
+                if ok:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+
+    if warmup:
+        until = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(i, until, False) for i in range(concurrency)))
+    started = time.perf_counter()
+    until = started + duration
+    await asyncio.gather(*(worker(i, until, True) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    problems = []
+    if baseline.get("p95_ms") and result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+        problems.append(f"p95 {baseline['p95_ms']} -> {result['p95_ms']} ms")
+    if baseline.get("rps") and result["rps"] < baseline["rps"] * (1 - tolerance):
+        problems.append(f"rps {baseline['rps']} -> {result['rps']}")
+    if result["requests"] and result["errors"] > baseline.get("errors", 0):
+        problems.append(f"{result['errors']} errors")
+    return problems
+
+
+def _load_baselines() -> dict:
+    try:
+        with open(BASELINES) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+async def main_async(args) -> int:
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenarios: {unknown}; known: {list(SCENARIOS)}")
+    if args.read_only:
+        names = [n for n in names if n not in WRITES]
+
+    baselines = _load_baselines()
+    stored = baselines.get(args.scale, {})
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results, failed = {}, False
+
+    print(f"{'scenario':<24}{'req':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}  vs baseline")
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        for name in names:
+            result = await run_scenario(
+                client, SCENARIOS[name], args.duration, args.concurrency, args.warmup, args.seed
+            )
+            results[name] = result
+            problems = compare(result, stored[name], args.tolerance) if name in stored else None
+            failed |= bool(problems)
+            verdict = "-" if problems is None else ("REGRESSED: " + ", ".join(problems) if problems else "ok")
+            print(
+                f"{name:<24}{result['requests']:>7}{result['rps']:>9}{result['p50_ms']:>9}"
+                f"{result['p95_ms']:>9}{result['p99_ms']:>9}{result['errors']:>6}  {verdict}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scale": args.scale, "results": results}, f, indent=2)
+    if args.save_baseline:
+        baselines.setdefault(args.scale, {}).update(results)
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"baseline for {args.scale} saved to {BASELINES}")
+        return 0
+    return 1 if failed else 0
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="FoodMap API benchmarks")
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://localhost:8000"))
+    parser.add_argument("--scale", default="10k", help="dataset loaded with bench.datagen (baseline key)")
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--read-only", action="store_true", help="skip scenarios that write")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds run before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
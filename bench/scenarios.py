@@ -0,0 +1,93 @@
+"""
+Benchmark scenarios: each builds one request from a seeded ``random.Random``.
+
+Points, search terms and categories come from the same vocabulary as
+``bench.datagen``, so every request hits generated data.
+"""
+import random
+import uuid
+
+from bench.datagen import BENCH_EMAIL, BENCH_PASSWORD, CATEGORIES, DISTRICTS, STREETS
+
+SEARCH_TERMS = ["bún", "phở", "bánh mì", "cà phê", "lẩu", "xôi", "Hàng", "Kim Mã", "chả"]
+
+
+def _point(rng: random.Random):
+    lat, lon, spread = DISTRICTS[rng.choice(list(DISTRICTS))]
+    return round(rng.gauss(lat, spread), 5), round(rng.gauss(lon, spread), 5)
+
+
+def list_places(rng):
+    return {"method": "GET", "url": "/places/", "params": {"limit": 50}}
+
+
+def list_places_q(rng):
+    return {"method": "GET", "url": "/places/", "params": {"q": rng.choice(SEARCH_TERMS), "limit": 50}}
+
+
+def list_places_category(rng):
+    return {"method": "GET", "url": "/places/", "params": {"category": rng.choice(list(CATEGORIES)), "limit": 50}}
+
+
+def list_places_q_category(rng):
+    params = {"q": rng.choice(SEARCH_TERMS), "category": rng.choice(list(CATEGORIES)), "limit": 50}
+    return {"method": "GET", "url": "/places/", "params": params}
+
+
+def autocomplete(rng):
+    # one keystroke of a search term: a random prefix of it
+    term = rng.choice(SEARCH_TERMS)
+    return {"method": "GET", "url": "/autocomplete", "params": {"q": term[:rng.randint(1, len(term))]}}
+
+
+def list_places_nearby(rng):
+    lat, lon = _point(rng)
+    params = {"lat": lat, "lon": lon, "radius_km": rng.choice((0.5, 1, 2, 5)), "limit": 200}
+    return {"method": "GET", "url": "/places/map", "params": params}
+
+
+def places_map(rng):
+    lat, lon = _point(rng)
+    return {"method": "GET", "url": "/places/map", "params": {"lat": lat, "lon": lon}}
+
+
+def weather_today(rng):
+    # weather from the stub, then find_places_for_bucket
+    lat, lon = _point(rng)
+    return {"method": "GET", "url": "/weather/today", "params": {"lat": lat, "lon": lon, "radius_km": 3}}
+
+
+def create_place(rng):
+    lat, lon = _point(rng)
+    body = {
+        "name": f"Bench {uuid.uuid4().hex[:12]}",
+        "address": f"{rng.randint(1, 200)} {rng.choice(STREETS)}",
+        "district": rng.choice(list(DISTRICTS)),
+        "lat": lat, "lon": lon,
+        "price_level": rng.randint(1, 4),
+        "category_slugs": [rng.choice(list(CATEGORIES))],
+    }
+    return {"method": "POST", "url": "/places/", "json": body}
+
+
+def create_place_geocoded(rng):
+    # no coordinates: goes through the (stubbed) geocoder
+    request = create_place(rng)
+    del request["json"]["lat"], request["json"]["lon"]
+    return request
+
+
+def auth_login(rng):
+    return {"method": "POST", "url": "/auth/login-json", "json": {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}}
+
+
+SCENARIOS = {
+    f.__name__: f
+    for f in (
+        list_places, list_places_q, list_places_category, list_places_q_category, autocomplete,
+        list_places_nearby, places_map, weather_today,
+        create_place, create_place_geocoded, auth_login,
+    )
+}
+# Scenarios that write; skipped with --read-only
+WRITES = {"create_place", "create_place_geocoded"}
@@ -0,0 +1,81 @@
+"""
+Stand-in for OpenWeather and Nominatim, so benchmarks never call the internet.
+
+    python -m bench.stub_upstream --port 9000 [--latency-ms 80]
+
+and start the API with
+
+    OPENWEATHER_BASE_URL=http://localhost:9000/data/2.5
+    NOMINATIM_URL=http://localhost:9000/search
+
+Answers are deterministic per coordinate / query, and vary enough across
+Hanoi to hit every weather bucket.  ``--latency-ms`` adds a fixed upstream
+delay (default 0).
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+
+from fastapi import FastAPI, Query
+
+app = FastAPI(title="bench upstream stub")
+app.state.latency = 0.0
+
+_CONDITIONS = ["Clear", "Clouds", "Rain", "Drizzle", "Mist", "Thunderstorm"]
+
+
+def _unit(*parts) -> float:
+    """Deterministic value in [0, 1) from the parts."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def _sample(lat: float, lon: float, slot: int = 0) -> dict:
+    u = _unit(round(lat, 2), round(lon, 2), slot)
+    temp = 12 + 25 * u
+    return {
+        "main": {"temp": round(temp, 1), "feels_like": round(temp + 3 * u - 1, 1), "humidity": int(50 + 45 * u)},
+        "weather": [{"main": _CONDITIONS[int(u * 7) % len(_CONDITIONS)]}],
+    }
+
+
+async def _delay() -> None:
+    if app.state.latency:
+        await asyncio.sleep(app.state.latency)
+
+
+@app.get("/data/2.5/weather")
+async def weather(lat: float, lon: float):
+    await _delay()
+    return {**_sample(lat, lon), "name": "Hanoi", "dt": int(time.time())}
+
+
+@app.get("/data/2.5/forecast")
+async def forecast(lat: float, lon: float):
+    await _delay()
+    start = int(time.time()) // 10800 * 10800
+    return {"list": [{**_sample(lat, lon, i), "dt": start + i * 10800} for i in range(40)]}
+
+
+@app.get("/search")
+async def search(q: str = Query("")):
+    await _delay()
+    # a point in the Hanoi bounding box, fixed per address
+    return [{"lat": str(20.95 + 0.15 * _unit(q, "lat")), "lon": str(105.75 + 0.15 * _unit(q, "lon"))}]
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenWeather/Nominatim stub for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    app.state.latency = args.latency_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+-- Hand-curated scores are kept when the scoring engine recomputes a place.
+ALTER TABLE place_weather_score
+  ADD COLUMN IF NOT EXISTS is_manual boolean NOT NULL DEFAULT false;
+
+-- Existing rows stay is_manual = false, so the engine derives them like any
+-- other place.  To keep scores that were curated by hand, flag them explicitly
+-- before the first recompute, e.g.:
+--   UPDATE place_weather_score SET is_manual = true WHERE place_id IN (...);
@@ -0,0 +1,75 @@
+-- Minute-of-week opening intervals (Mon 00:00 = 0) kept on places for "open now" filters.
+-- Requires PostgreSQL 14+ (multiranges, range_agg, CREATE OR REPLACE TRIGGER).
+ALTER TABLE places ADD COLUMN IF NOT EXISTS open_minutes int4multirange;
+CREATE INDEX IF NOT EXISTS idx_places_open_minutes ON places USING GIST (open_minutes);
+
+CREATE INDEX IF NOT EXISTS idx_opening_hours_place_id ON opening_hours (place_id);
+
+CREATE OR REPLACE FUNCTION place_open_minutes(pid bigint) RETURNS int4multirange
+LANGUAGE sql STABLE AS $$
+  WITH spans AS (
+    SELECT weekday * 1440 + (extract(epoch FROM opens) / 60)::int AS s,
+           weekday * 1440 + (extract(epoch FROM closes) / 60)::int
+             + CASE WHEN closes <= opens THEN 1440 ELSE 0 END AS e
+    FROM opening_hours WHERE place_id = pid
+  )
+  SELECT range_agg(r) FROM (
+    SELECT int4range(s, LEAST(e, 10080)) FROM spans
+    UNION ALL
+    SELECT int4range(0, e - 10080) FROM spans WHERE e > 10080
+  ) AS parts(r)
+$$;
+
+CREATE OR REPLACE FUNCTION refresh_open_minutes(ids bigint[]) RETURNS void
+LANGUAGE sql AS $$
+  WITH spans AS (
+    SELECT o.place_id,
+           o.weekday * 1440 + (extract(epoch FROM o.opens) / 60)::int AS s,
+           o.weekday * 1440 + (extract(epoch FROM o.closes) / 60)::int
+             + CASE WHEN o.closes <= o.opens THEN 1440 ELSE 0 END AS e
+    FROM opening_hours o JOIN unnest(ids) AS t(id) ON o.place_id = t.id
+  ), agg AS (
+    SELECT place_id, range_agg(r) AS m FROM (
+      SELECT place_id, int4range(s, LEAST(e, 10080)) FROM spans
+      UNION ALL
+      SELECT place_id, int4range(0, e - 10080) FROM spans WHERE e > 10080
+    ) AS parts(place_id, r)
+    GROUP BY place_id
+  )
+  UPDATE places p SET open_minutes = agg.m
+  FROM unnest(ids) AS t(id) LEFT JOIN agg ON agg.place_id = t.id
+  WHERE p.id = t.id
+$$;
+
+CREATE OR REPLACE FUNCTION opening_hours_refresh_places() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+  ids bigint[];
+BEGIN
+  -- one set-based recompute for every place the statement touched
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(DISTINCT place_id) INTO ids FROM new_rows;
+  ELSIF TG_OP = 'DELETE' THEN
+    SELECT array_agg(DISTINCT place_id) INTO ids FROM old_rows;
+  ELSE
+    SELECT array_agg(place_id) INTO ids
+    FROM (SELECT place_id FROM new_rows UNION SELECT place_id FROM old_rows) AS changed;
+  END IF;
+  PERFORM refresh_open_minutes(ids);
+  RETURN NULL;
+END $$;
+
+CREATE OR REPLACE TRIGGER trg_opening_hours_ins AFTER INSERT ON opening_hours
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION opening_hours_refresh_places();
+
+CREATE OR REPLACE TRIGGER trg_opening_hours_upd AFTER UPDATE ON opening_hours
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION opening_hours_refresh_places();
+
+CREATE OR REPLACE TRIGGER trg_opening_hours_del AFTER DELETE ON opening_hours
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION opening_hours_refresh_places();
+
+-- Backfill
+SELECT refresh_open_minutes(array_agg(id)) FROM places;
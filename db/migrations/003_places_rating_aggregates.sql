@@ -0,0 +1,55 @@
+-- Denormalised review aggregates on places, kept current by statement-level triggers on reviews.
+ALTER TABLE places
+  ADD COLUMN IF NOT EXISTS review_count integer NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS rating_sum   bigint  NOT NULL DEFAULT 0;
+ALTER TABLE places
+  ADD COLUMN IF NOT EXISTS rating_score numeric(4, 3)
+    GENERATED ALWAYS AS ((rating_sum + 3.5 * 5) / (review_count + 5)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_places_rating_score ON places (rating_score DESC, id DESC)
+  WHERE is_public AND status = 'approved';
+
+CREATE OR REPLACE FUNCTION reviews_refresh_rating() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE places p SET review_count = p.review_count + d.n, rating_sum = p.rating_sum + d.s
+    FROM (SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+          FROM new_rows GROUP BY place_id) d
+    WHERE p.id = d.place_id AND d.n > 0;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE places p SET review_count = p.review_count - d.n, rating_sum = p.rating_sum - d.s
+    FROM (SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+          FROM old_rows GROUP BY place_id) d
+    WHERE p.id = d.place_id AND d.n > 0;
+  ELSE
+    UPDATE places p SET review_count = p.review_count + d.n, rating_sum = p.rating_sum + d.s
+    FROM (SELECT place_id, sum(n) AS n, sum(s) AS s FROM (
+            SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+            FROM new_rows GROUP BY place_id
+            UNION ALL
+            SELECT place_id, -count(rating), -coalesce(sum(rating), 0)
+            FROM old_rows GROUP BY place_id
+          ) x GROUP BY place_id) d
+    WHERE p.id = d.place_id AND (d.n <> 0 OR d.s <> 0);
+  END IF;
+  RETURN NULL;
+END $$;
+
+CREATE OR REPLACE TRIGGER trg_reviews_rating_ins AFTER INSERT ON reviews
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION reviews_refresh_rating();
+
+CREATE OR REPLACE TRIGGER trg_reviews_rating_upd AFTER UPDATE ON reviews
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION reviews_refresh_rating();
+
+CREATE OR REPLACE TRIGGER trg_reviews_rating_del AFTER DELETE ON reviews
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION reviews_refresh_rating();
+
+-- Backfill
+UPDATE places p SET review_count = a.n, rating_sum = a.s
+FROM (SELECT place_id, count(rating) AS n, coalesce(sum(rating), 0) AS s
+      FROM reviews GROUP BY place_id) a
+WHERE p.id = a.place_id;
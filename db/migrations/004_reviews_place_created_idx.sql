@@ -0,0 +1,3 @@
+-- Keyset pagination for GET /places/{id}/reviews
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_place_created
+  ON reviews (place_id, created_at DESC, id DESC);
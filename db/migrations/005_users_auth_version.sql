@@ -0,0 +1,2 @@
+-- Bumped whenever email/password/role/is_active change; tokens carry it as "ver".
+ALTER TABLE users ADD COLUMN IF NOT EXISTS auth_version integer NOT NULL DEFAULT 0;
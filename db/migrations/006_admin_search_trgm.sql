@@ -0,0 +1,11 @@
+-- Trigram indexes for the admin search boxes (ILIKE '%term%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_name_trgm ON users USING GIN (name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_phone_trgm ON users USING GIN (phone gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_places_phone_trgm ON places USING GIN (phone gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_places_slug_trgm ON places USING GIN (slug gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menus_title_trgm ON menus USING GIN (title gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menu_items_name_trgm ON menu_items USING GIN (name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_content_trgm ON reviews USING GIN (content gin_trgm_ops);
@@ -0,0 +1,7 @@
+-- Boot checks max(version) here instead of running create_all (see app/core/startup.py).
+-- Every later migration ends by stamping its own number.
+CREATE TABLE IF NOT EXISTS schema_version (
+  version integer PRIMARY KEY,
+  applied_at timestamptz NOT NULL DEFAULT now()
+);
+INSERT INTO schema_version (version) VALUES (7) ON CONFLICT DO NOTHING;
@@ -0,0 +1,14 @@
+-- Slow-query log with plans (app/core/slowlog.py, enabled by SLOW_QUERY_MS > 0).
+CREATE TABLE IF NOT EXISTS slow_queries (
+  id bigserial PRIMARY KEY,
+  captured_at timestamptz NOT NULL DEFAULT now(),
+  endpoint text,
+  duration_ms double precision NOT NULL,
+  statement text NOT NULL,
+  parameters jsonb,
+  plan text,
+  plan_signature text
+);
+CREATE INDEX IF NOT EXISTS idx_slow_queries_captured ON slow_queries (captured_at DESC);
+CREATE INDEX IF NOT EXISTS idx_slow_queries_signature ON slow_queries (plan_signature);
+INSERT INTO schema_version (version) VALUES (8) ON CONFLICT DO NOTHING;
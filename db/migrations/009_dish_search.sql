@@ -0,0 +1,17 @@
+-- Dish search (GET /places/search/dishes): tag and accent-insensitive name lookups on menu items,
+-- plus the foreign-key indexes the place -> menus -> items joins were missing.
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+  SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menus_place_id ON menus (place_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menu_items_menu_id ON menu_items (menu_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menu_items_tags ON menu_items USING GIN (tags);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menu_items_name_folded_trgm
+  ON menu_items USING GIN (f_unaccent(lower(name)) gin_trgm_ops);
+
+INSERT INTO schema_version (version) VALUES (9) ON CONFLICT DO NOTHING;
@@ -0,0 +1,10 @@
+-- Trigram indexes for the remaining admin search fields (ILIKE '%term%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_places_ward_trgm ON places USING GIN (ward gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_places_district_trgm ON places USING GIN (district gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_places_city_trgm ON places USING GIN (city gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_places_website_trgm ON places USING GIN (website gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_menu_items_description_trgm ON menu_items USING GIN (description gin_trgm_ops);
+
+INSERT INTO schema_version (version) VALUES (10) ON CONFLICT DO NOTHING;
@@ -0,0 +1,59 @@
+import anyio
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.core.querystats import track_queries
+from app.models import models
+from app.services.admin import crud
+from app.services.admin.crud import MenuItemAdmin, PlaceAdmin, UserAdmin
+
+"""
+In order to keep the admin list pages cheap (estimated counts, lean rows, indexed search)
+"""
+
+
+def _view(cls, pg_db):
+    view = cls()
+    view.session_maker = lambda **kw: Session(bind=pg_db.connection(), join_transaction_mode="create_savepoint", **kw)
+    return view
+
+
+def test_search_fields_have_trigram_indexes():
+    for cls in (UserAdmin, PlaceAdmin, MenuItemAdmin):
+        view = cls()
+        gin = {
+            i.columns[0].name for i in view.model.__table__.indexes
+            if i.dialect_options["postgresql"]["using"] == "gin" and len(i.columns) == 1
+        }
+        assert set(view._search_fields) <= gin, cls.__name__
+    assert {"city", "district", "ward", "website"} <= set(PlaceAdmin()._search_fields)
+    assert "description" in MenuItemAdmin()._search_fields
+
+
+def test_unfiltered_count_uses_reltuples_when_large(pg_db, monkeypatch):
+    view = _view(UserAdmin, pg_db)
+    pg_db.execute(insert(models.User), [{"email": f"u{i}@example.com"} for i in range(3)])
+    monkeypatch.setattr(crud, "ADMIN_COUNT_ESTIMATE_ABOVE", 2)
+    pg_db.execute(text("ANALYZE users"))
+    pg_db.execute(insert(models.User), [{"email": f"late{i}@example.com"} for i in range(2)])
+
+    assert anyio.run(view.count, None) == 3  # planner stats, not COUNT(*)
+    monkeypatch.setattr(crud, "ADMIN_COUNT_ESTIMATE_ABOVE", 10)
+    assert anyio.run(view.count, None) == 5
+
+
+def test_list_rows_load_listed_columns_only(pg_db, make_place):
+    place = make_place("Phở Thìn", city="Hà Nội")
+    pg_db.add(models.Menu(place_id=place.id, title="Món chính"))
+    pg_db.flush()
+    pg_db.expunge_all()
+
+    view = PlaceAdmin()
+    with track_queries() as stats:
+        rows = pg_db.scalars(view.search_query(view.list_query(None), "hà nội")).all()
+    assert [p.name for p in rows] == ["Phở Thìn"]
+    assert stats.count == 1, stats.report()  # no selectin fan-out for categories/menus/opening hours
+    unloaded = sa_inspect(rows[0]).unloaded
+    assert {"geom", "open_minutes"} <= unloaded
+    assert "city" not in unloaded
@@ -0,0 +1,28 @@
+import anyio
+
+from app.models import models
+from app.services.admin.crud import PlaceWeatherScoreAdmin
+
+"""
+In order to test that scores edited in the admin are kept out of the recompute
+"""
+
+
+def _change(data, model, is_created=False):
+    anyio.run(PlaceWeatherScoreAdmin().on_model_change, data, model, is_created, None)
+    return data
+
+
+def test_edited_score_becomes_manual():
+    row = models.PlaceWeatherScore(place_id=1, weather_bucket="rain", score=0.4, is_manual=False)
+    assert _change({"score": 0.9, "is_manual": False}, row)["is_manual"] is True
+
+
+def test_created_score_is_manual():
+    assert _change({"score": 0.5}, models.PlaceWeatherScore(), is_created=True)["is_manual"] is True
+
+
+def test_unchanged_score_keeps_the_manual_flag_as_submitted():
+    # e.g. unticking is_manual to hand the row back to the recompute
+    row = models.PlaceWeatherScore(place_id=1, weather_bucket="rain", score=0.4, is_manual=True)
+    assert _change({"score": 0.4, "is_manual": False}, row)["is_manual"] is False
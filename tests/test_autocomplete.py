@@ -0,0 +1,86 @@
+import random
+
+from app.services.autocomplete import AutocompleteIndex, Snapshot, Suggestion, build_suggestions
+
+PLACES = [
+    # id, name, district, review_count, rating_score
+    (1, "Bún chả Hương Liên", "Hai Bà Trưng", 900, 4.6),
+    (2, "Bún Chả Đắc Kim", "Hoàn Kiếm", 300, 4.4),
+    (3, "Phở Thìn", "Hai Bà Trưng", 1200, 4.2),
+    (4, "Quán nhỏ", "Đống Đa", 0, None),
+]
+DISHES = [(1, "Bún chả"), (1, "bún chả"), (2, "Bún chả"), (3, "Phở bò"), (4, "Bún riêu")]
+CATEGORIES = [(1, "Bún"), (2, "Bún"), (3, "Phở")]
+
+
+def _index():
+    index = AutocompleteIndex()
+    index.load(build_suggestions(PLACES, DISHES, CATEGORIES))
+    return index
+
+
+def test_folds_diacritics_and_matches_word_starts():
+    index = _index()
+    found = [(s.kind, s.text) for s in index.suggest("bun ch")]
+    assert ("dish", "Bún chả") in found
+    assert ("place", "Bún chả Hương Liên") in found and ("place", "Bún Chả Đắc Kim") in found
+    assert ("dish", "Bún chả") in [(s.kind, s.text) for s in index.suggest("CHẢ")]
+    assert [s.text for s in index.suggest("dong", kinds={"district"})] == ["Đống Đa"]
+    assert index.suggest("xyz") == [] and index.suggest("  ") == []
+
+
+def test_ranked_by_popularity_and_rating():
+    index = _index()
+    places = index.suggest("bun cha", kinds={"place"})
+    assert [s.place_id for s in places] == [1, 2]
+    # listed by two places, counted once per place
+    districts = index.suggest("hai ba", kinds={"district"})
+    assert len(districts) == 1 and districts[0].weight > index.suggest("hoan", kinds={"district"})[0].weight
+
+
+def test_overlay_replaces_and_hides_changed_places():
+    index = _index()
+    state = index._state
+    index._state = state._replace(
+        changed=frozenset({2, 4}),
+        overlay=(
+            (Suggestion("place", "Bún chả Đắc Kim 2", 2, 1.0), ("bun cha dac kim 2",)),
+            (Suggestion("dish", "Bún đậu", None, 1.0), ("bun dau",)),
+        ),
+    )
+    places = index.suggest("bun", kinds={"place"})
+    assert [s.text for s in places] == ["Bún chả Hương Liên", "Bún chả Đắc Kim 2"]
+    assert "Bún đậu" in [s.text for s in index.suggest("bun d")]
+
+
+def test_top_matches_brute_force_for_wide_and_narrow_prefixes():
+    rng = random.Random(3)
+    words = ["bun", "bánh", "bò", "cha", "pho", "ca", "xoi"]
+    suggestions = [
+        Suggestion("place", " ".join(rng.choice(words) for _ in range(rng.randint(1, 3))), i, rng.random())
+        for i in range(3000)
+    ]
+    snapshot = Snapshot(suggestions, suffixes=1)
+    for prefix in ("b", "bo", "bun c", "x", "pho pho"):
+        expected = sorted((s for s in suggestions if s.text.replace("á", "a").replace("ò", "o").startswith(prefix)),
+                          key=lambda s: -s.weight)[:10]
+        assert snapshot.top(prefix, 10) == expected
+
+
+def test_kind_filter_only_searches_that_kind(monkeypatch):
+    rng = random.Random(5)
+    places = [(i, f"Bún {rng.randint(0, 10**6)}", f"Quận {i % 12}", rng.randint(0, 50), 4.0) for i in range(20000)]
+    index = AutocompleteIndex()
+    index.load(build_suggestions(places, [], []))
+    searched = []
+    top = Snapshot.top
+
+    def spy(self, prefix, k, skip=lambda s: False):
+        searched.append(len(self.rows))
+        return top(self, prefix, k, skip)
+
+    monkeypatch.setattr(Snapshot, "top", spy)
+    # "q" only prefixes districts, "b" only places: neither may walk the place array
+    assert [s.kind for s in index.suggest("q", kinds={"district"})] == ["district"] * 10
+    assert index.suggest("b", kinds={"district", "category"}) == []
+    assert searched and max(searched) == len(index._state.base["district"].rows) < 100
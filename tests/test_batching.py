@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.core.batching import MicroBatcher
+
+"""
+In order to test behavior of the MicroBatcher used for buffered writes and inference
+"""
+
+
+def test_concurrent_submits_share_one_handler_call():
+    calls = []
+
+    def handler(items):
+        calls.append(list(items))
+        return [i * 10 for i in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=100, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_full_batch_flushes_without_waiting():
+    sizes = []
+    batcher = MicroBatcher(lambda items: items, max_batch_size=2, max_wait_ms=60_000, on_batch=sizes.append)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(4))), 5)
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+    assert sizes == [2, 2]
+
+
+def test_per_item_exception_only_fails_that_caller():
+    def handler(items):
+        return [ValueError("bad") if i < 0 else i for i in items]
+
+    batcher = MicroBatcher(handler, max_wait_ms=5)
+
+    async def main():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+
+    ok, err = asyncio.run(main())
+    assert ok == 1
+    assert isinstance(err, ValueError)
+
+
+def test_handler_failure_reaches_every_caller():
+    def handler(items):
+        raise RuntimeError("db down")
+
+    batcher = MicroBatcher(handler, max_wait_ms=5)
+
+    async def main():
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    with pytest.raises(RuntimeError, match="db down"):
+        asyncio.run(main())
+
+
+@pytest.mark.parametrize("results", [[1], [1, 2, 3]])
+def test_wrong_result_count_fails_every_caller(results):
+    batcher = MicroBatcher(lambda items: results, max_wait_ms=5)
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True), 5
+        )
+
+    outcomes = asyncio.run(main())
+    assert all(isinstance(o, ValueError) and "results for 2 items" in str(o) for o in outcomes)
+
+
+def test_failing_on_batch_hook_does_not_strand_callers():
+    def on_batch(size):
+        raise RuntimeError("metrics down")
+
+    batcher = MicroBatcher(lambda items: items, max_wait_ms=5, on_batch=on_batch)
+
+    async def main():
+        await asyncio.wait_for(batcher.submit(1), 5)
+
+    with pytest.raises(RuntimeError, match="metrics down"):
+        asyncio.run(main())
@@ -0,0 +1,33 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models import models
+from app.services.places_crud import dish_tags, search_dishes_stmt
+
+"""
+In order to keep dish search on its indexes (expression must match the index definition)
+"""
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_tag_spellings():
+    assert dish_tags("  Bún  Chả ") == ["bún chả", "bun cha", "bun-cha"]
+    assert dish_tags("Đậu phụ") == ["đậu phụ", "dau phu", "dau-phu"]
+
+
+def test_uses_indexed_expressions():
+    indexes = {i.name: _sql(CreateIndex(i)) for i in models.MenuItem.__table__.indexes}
+    sql = _sql(search_dishes_stmt("bún chả"))
+    assert "f_unaccent(lower(name))" in indexes["idx_menu_items_name_folded_trgm"]
+    assert "<%% f_unaccent(lower(menu_items.name))" in sql
+    assert "menu_items.tags && " in sql and "USING gin (tags)" in indexes["idx_menu_items_tags"]
+
+
+def test_distance_and_price_filters():
+    sql = _sql(search_dishes_stmt("pho", lon=105.85, lat=21.03, radius_m=1500, min_price=20000, max_price=60000))
+    assert "ST_DWithin" in sql and "distance_m ASC" in sql
+    assert "menu_items.price >= " in sql and "menu_items.price <= " in sql
+    assert "ST_DWithin" not in _sql(search_dishes_stmt("pho"))
@@ -0,0 +1,16 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+"""
+In order to test that /metrics exposes per-route latency by route template
+"""
+
+client = TestClient(app)
+
+
+def test_route_template_label():
+    client.get("/api/v1/live")
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/live",status="200"}' in body
+    assert "microbatch_size" in body
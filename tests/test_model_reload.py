@@ -0,0 +1,103 @@
+import os
+
+import joblib
+import numpy as np
+
+from app.services import predict
+from app.services.predict import MachineLearningModelHandlerScore as handler
+
+"""
+In order to test that a model file replaced on disk is swapped in without a restart
+"""
+
+
+class ConstModel:
+    def __init__(self, value):
+        self.weights = np.full(5, value)
+
+    def predict(self, X):
+        return X @ self.weights
+
+
+def _dump(path, value):
+    tmp = path.with_suffix(".tmp")
+    joblib.dump(ConstModel(value), tmp)
+    os.replace(tmp, path)  # how deploys should publish a new model
+
+
+def test_hot_swap(tmp_path, monkeypatch):
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "model.pkl")
+    monkeypatch.setattr(handler, "model", None)
+    monkeypatch.setattr(handler, "model_version", None)
+    monkeypatch.setattr(handler, "failed_version", None)
+    x = np.ones((1, 5))
+
+    _dump(tmp_path / "model.pkl", 1.0)
+    assert handler.predict(x, load_wrapper=predict.load_model_file).tolist() == [5.0]
+    first = handler.model_version
+    assert handler.reload_if_changed() is False
+
+    _dump(tmp_path / "model.pkl", 2.0)
+    assert handler.reload_if_changed() is True
+    assert handler.model_version != first
+    assert handler.predict(x).tolist() == [10.0]
+    assert isinstance(handler.model.weights, np.memmap)
+
+
+def test_broken_file_keeps_current_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "model.pkl")
+    monkeypatch.setattr(handler, "model", None)
+    monkeypatch.setattr(handler, "model_version", None)
+    monkeypatch.setattr(handler, "failed_version", None)
+
+    _dump(tmp_path / "model.pkl", 1.0)
+    handler.reload_if_changed()
+    (tmp_path / "broken.tmp").write_bytes(b"not a pickle")
+    os.replace(tmp_path / "broken.tmp", tmp_path / "model.pkl")
+    assert handler.reload_if_changed() is False
+    assert handler.predict(np.ones((1, 5))).tolist() == [5.0]
+
+    # the same broken file is not loaded again on every poll, a new one is
+    loads = []
+
+    def counting(path):
+        loads.append(path)
+        return predict.load_model_file(path)
+
+    assert handler.reload_if_changed(counting) is False
+    assert loads == []
+    _dump(tmp_path / "model.pkl", 2.0)
+    assert handler.reload_if_changed(counting) is True
+    assert len(loads) == 1 and handler.failed_version is None
+
+
+def test_broken_file_at_boot_leaves_the_app_up_and_not_ready(tmp_path, monkeypatch):
+    from pathlib import Path
+
+    from fastapi.testclient import TestClient
+
+    from app.api.routes import predictor
+    from app.core.events import preload_model
+    from app.main import app
+
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "model.pkl")
+    monkeypatch.setattr(handler, "model", None)
+    monkeypatch.setattr(handler, "model_version", None)
+    monkeypatch.setattr(handler, "failed_version", None)
+    monkeypatch.setattr(predictor, "_readiness", {"status": False, "checked_at": None, "model_version": None})
+    monkeypatch.setattr(
+        predictor, "INPUT_EXAMPLE", str(Path(__file__).resolve().parents[1] / "ml" / "model" / "examples" / "example.json")
+    )
+    (tmp_path / "model.pkl").write_bytes(b"not a pickle")
+
+    preload_model()
+    assert handler.model is None and handler.failed_version is not None
+    assert handler.reload_if_changed() is False  # not retried by the watcher
+    assert TestClient(app).get("/api/v1/health").status_code == 404
+
+    _dump(tmp_path / "model.pkl", 1.0)
+    assert handler.reload_if_changed() is True
+    assert handler.predict(np.ones((1, 5))).tolist() == [5.0]
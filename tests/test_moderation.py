@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import select
+
+from app.deps import get_current_principal
+from app.main import app
+from app.models import models
+from app.services import places_crud
+from app.services.principals import Principal
+
+"""
+In order to test bulk place moderation (one UPDATE, one notification; needs TEST_DATABASE_URL)
+"""
+
+
+@pytest.fixture
+def notified(monkeypatch):
+    calls = []
+    monkeypatch.setattr(places_crud, "notify_places_changed", calls.append)
+    return calls
+
+
+@pytest.fixture
+def as_role(pg_db):
+    """``as_role("admin")``: requests run as a fresh user with that role."""
+
+    def login(role):
+        user = models.User(email=f"{role}@example.com", role=role)
+        pg_db.add(user)
+        pg_db.flush()
+        app.dependency_overrides[get_current_principal] = lambda: Principal(id=user.id, role=role)
+        return user
+
+    yield login
+    app.dependency_overrides.pop(get_current_principal, None)
+
+
+def _statuses(pg_db, ids):
+    P = models.Place
+    return dict(pg_db.execute(select(P.id, P.status).where(P.id.in_(ids))).all())
+
+
+def test_approve_mixed_ids(pg_db, make_place, notified):
+    pending = make_place("Pending", status="pending")
+    done = make_place("Already approved")
+    missing = done.id + 1000
+
+    result = places_crud.bulk_moderate(pg_db, "approve", ids=[pending.id, done.id, missing])
+
+    assert (result["updated"], result["ids"], result["skipped"]) == (1, [pending.id], 2)
+    assert _statuses(pg_db, [pending.id, done.id]) == {pending.id: "approved", done.id: "approved"}
+    assert notified == [{pending.id: {"Place.status", "Place.is_public", "Place.published_at"}}]
+
+
+def test_reject_unpublishes(pg_db, make_place, notified):
+    public, hidden = make_place("Public"), make_place("Hidden", is_public=False, status="rejected")
+
+    result = places_crud.bulk_moderate(pg_db, "reject", ids=[public.id, hidden.id])
+
+    assert (result["ids"], result["skipped"]) == ([public.id], 1)
+    pg_db.refresh(public)
+    assert (public.status, public.is_public, public.published_at) == ("rejected", False, None)
+    assert len(notified) == 1
+
+
+def test_moderation_endpoint(pg_db, pg_client, make_place, notified, as_role):
+    a, b = make_place("A", status="pending"), make_place("B", status="pending")
+    admin = as_role("admin")
+
+    r = pg_client.post("/places/moderation", json={"action": "approve", "ids": [a.id, b.id, b.id + 1000]})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["updated"], sorted(body["ids"]), body["skipped"]) == (2, [a.id, b.id], 1)
+    assert len(notified) == 1 and set(notified[0]) == {a.id, b.id}
+    pg_db.refresh(a)
+    assert a.updated_by == admin.id
+
+
+def test_moderation_endpoint_is_admin_only(pg_db, pg_client, make_place, notified, as_role):
+    place = make_place("A", status="pending")
+    as_role("user")
+
+    r = pg_client.post("/places/moderation", json={"action": "approve", "ids": [place.id]})
+
+    assert r.status_code == 403
+    assert notified == []
+    assert _statuses(pg_db, [place.id]) == {place.id: "pending"}
@@ -0,0 +1,82 @@
+from datetime import datetime, time, timezone
+
+from sqlalchemy import delete, insert, select, update
+
+from app.models import models
+from app.services.opening_hours import (
+    LOCAL_TZ,
+    MINUTES_PER_WEEK,
+    is_open,
+    minute_of_week,
+    ranges_to_list,
+    resolve_open_minute,
+)
+
+"""
+In order to test minute-of-week helpers behind the open_now / open_at filters, and the
+opening_hours triggers keeping places.open_minutes in sync (needs TEST_DATABASE_URL)
+"""
+
+
+def test_minute_of_week_monday_midnight_is_zero():
+    assert minute_of_week(datetime(2024, 1, 1, 0, 0, tzinfo=LOCAL_TZ)) == 0
+
+
+def test_minute_of_week_converts_to_local_time():
+    # 2024-01-07 is a Sunday; 16:59 UTC is 23:59 in Hanoi
+    at = datetime(2024, 1, 7, 16, 59, tzinfo=timezone.utc)
+    assert minute_of_week(at) == MINUTES_PER_WEEK - 1
+
+
+def test_naive_datetime_is_local():
+    assert minute_of_week(datetime(2024, 1, 2, 9, 30)) == 1440 + 9 * 60 + 30
+
+
+def test_is_open_half_open_intervals():
+    # Sunday 22:00 -> Monday 02:00, already split at the week boundary
+    intervals = [[0, 120], [6 * 1440 + 22 * 60, MINUTES_PER_WEEK]]
+    assert is_open(intervals, 60)
+    assert is_open(intervals, MINUTES_PER_WEEK - 1)
+    assert not is_open(intervals, 120)
+    assert not is_open(None, 60)
+
+
+def test_resolve_open_minute():
+    assert resolve_open_minute() is None
+    assert resolve_open_minute(open_at=datetime(2024, 1, 1, 1, 0)) == 60
+    assert 0 <= resolve_open_minute(open_now=True) < MINUTES_PER_WEEK
+
+
+def _open_minutes(pg_db, places):
+    P = models.Place
+    rows = pg_db.execute(select(P.id, P.open_minutes).where(P.id.in_([p.id for p in places])))
+    return {pid: ranges_to_list(m) for pid, m in rows}
+
+
+def test_triggers_refresh_every_touched_place(pg_db, make_place):
+    a, b, c = make_place("A"), make_place("B"), make_place("C")
+    OH = models.OpeningHour
+    pg_db.execute(insert(OH), [
+        {"place_id": a.id, "weekday": 0, "opens": time(8), "closes": time(12)},
+        {"place_id": a.id, "weekday": 0, "opens": time(11), "closes": time(14)},
+        {"place_id": b.id, "weekday": 6, "opens": time(22), "closes": time(2)},
+    ])
+    assert _open_minutes(pg_db, [a, b, c]) == {
+        a.id: [[480, 840]],
+        b.id: [[0, 120], [9960, MINUTES_PER_WEEK]],
+        c.id: None,
+    }
+
+    # one statement moving hours between places refreshes both sides
+    pg_db.execute(update(OH).where(OH.place_id == b.id).values(place_id=c.id))
+    assert _open_minutes(pg_db, [b, c]) == {b.id: None, c.id: [[0, 120], [9960, MINUTES_PER_WEEK]]}
+
+    pg_db.execute(delete(OH).where(OH.place_id.in_([a.id, c.id]), OH.opens == time(8)))
+    pg_db.execute(delete(OH).where(OH.place_id == c.id))
+    assert _open_minutes(pg_db, [a, c]) == {a.id: [[660, 840]], c.id: None}
+
+
+def test_opening_hours_place_id_is_indexed():
+    assert any(
+        [col.name for col in i.columns] == ["place_id"] for i in models.OpeningHour.__table__.indexes
+    )
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.core.paginator import estimate_count, paginate_keyset, paginate_query
+from app.models import models
+
+"""
+In order to test that paginate_query / paginate_keyset match pagenation without loading everything
+"""
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.User.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all(models.User(id=i, email=f"u{i}@example.com") for i in range(1, 46))
+        session.commit()
+        yield session
+
+
+def test_exact_count_in_same_query(db):
+    d = paginate_query(db, select(models.User).order_by(models.User.id), 3, 20)
+    assert [u.id for u in d["listings"]] == list(range(41, 46))
+    assert d["totalCount"] == 45
+    assert d["totalPages"] == 3
+    assert (d["begin"], d["end"]) == (40, 45)
+    assert d["countIsEstimate"] is False
+
+
+def test_columns_come_back_as_dicts(db):
+    U = models.User
+    d = paginate_query(db, select(U.id, U.email).order_by(U.id), 1, 2)
+    assert d["listings"] == [{"id": 1, "email": "u1@example.com"}, {"id": 2, "email": "u2@example.com"}]
+
+
+def test_past_last_page_still_reports_total(db):
+    d = paginate_query(db, select(models.User).order_by(models.User.id), 9, 20)
+    assert d["listings"] == []
+    assert d["totalCount"] == 45
+
+
+def test_estimate_falls_back_to_exact_off_postgres(db):
+    d = paginate_query(db, select(models.User.id).order_by(models.User.id), 1, 10, count="estimate")
+    assert d["totalCount"] == 45
+    assert d["listings"] == list(range(1, 11))
+
+
+def test_keyset_walks_all_rows(db):
+    U = models.User
+    seen, after = [], None
+    while True:
+        page = paginate_keyset(db, select(U.id), [U.id], after=after, page_size=20, descending=True)
+        seen += page["listings"]
+        if not page["hasMore"]:
+            break
+        after = page["nextAfter"]
+    assert seen == list(range(45, 0, -1))
+
+
+def test_estimate_keeps_user_input_as_parameters(pg_db, make_place):
+    P = models.Place
+    make_place("Bún :cha 100%")
+    stmt = select(P.id).where(P.name.ilike("%bún :cha%"), P.id.in_([1, 2, 3]))
+    assert isinstance(estimate_count(pg_db, stmt), int)
+    d = paginate_query(pg_db, select(P.id).where(P.name.ilike("%100%%")).order_by(P.id), 1, 10, count="estimate")
+    assert d["countIsEstimate"] is True
+
+
+def test_paged_places_endpoint(pg_client, make_place):
+    for name in ("A", "B", "C"):
+        make_place(name)
+    d = pg_client.get("/places/paged", params={"page": 2, "page_size": 2, "count": "exact"}).json()
+    assert (d["totalCount"], d["totalPages"], d["countIsEstimate"]) == (3, 2, False)
+    assert [p["name"] for p in d["listings"]] == ["A"]
+    assert d["listings"][0]["lon"] == pytest.approx(105.8342)
+
+    d = pg_client.get("/places/paged", params={"q": "bún :cha%", "count": "estimate"}).json()
+    assert d["listings"] == [] and d["countIsEstimate"] is True
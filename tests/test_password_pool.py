@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.services import password_pool
+from app.services.password_pool import PasswordHasher
+
+
+def test_inline_hash_and_verify():
+    h = PasswordHasher(workers=0, max_pending=4, queue_timeout=0.1)
+    hashed = h.hash("s3cret")
+    assert h.verify_and_update("s3cret", hashed) == (True, None)
+    assert h.verify_and_update("wrong", hashed)[0] is False
+    assert h.stats()["completed"] == 3
+    assert h.stats()["in_flight"] == 0
+
+
+def test_rehash_when_cost_below_configured():
+    weak = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4).hash("s3cret")
+    h = PasswordHasher(workers=0, max_pending=4, queue_timeout=0.1)
+    ok, new_hash = h.verify_and_update("s3cret", weak)
+    assert ok and new_hash
+    assert password_pool.get_pwd_context().verify("s3cret", new_hash)
+    assert h.stats()["rehashed"] == 1
+
+
+def test_full_queue_is_rejected_with_503():
+    h = PasswordHasher(workers=0, max_pending=1, queue_timeout=0.01)
+    h._slots.acquire()  # simulate one job in flight
+    try:
+        with pytest.raises(HTTPException) as exc:
+            h.hash("x")
+        assert exc.value.status_code == 503
+        with pytest.raises(HTTPException):
+            asyncio.run(h.ahash("x"))
+    finally:
+        h._slots.release()
+    assert h.stats()["rejected"] == 2
+
+
+def test_process_pool_roundtrip():
+    h = PasswordHasher(workers=1, max_pending=4, queue_timeout=1)
+    try:
+        hashed = h.hash("s3cret")
+        ok, _ = asyncio.run(h.averify_and_update("s3cret", hashed))
+        assert ok
+    finally:
+        h.shutdown()
@@ -0,0 +1,35 @@
+from app.models import models
+from app.services import place_events
+
+"""
+In order to test which place ids a flush reports to the change listeners (needs TEST_DATABASE_URL)
+"""
+
+
+def _changes(pg_db):
+    pg_db.flush()
+    return dict(pg_db.info.pop(place_events._INFO_KEY, {}))
+
+
+def test_new_category_is_not_a_global_change(pg_db, make_place):
+    place = make_place("Phở Thìn")
+    _changes(pg_db)
+
+    cat = models.Category(slug="pho", title="Phở")
+    pg_db.add(cat)
+    assert _changes(pg_db) == {}
+
+    place.categories.append(cat)
+    assert None not in _changes(pg_db)
+
+
+def test_renamed_or_deleted_category_affects_every_place(pg_db):
+    cat = models.Category(slug="bun", title="Bún")
+    pg_db.add(cat)
+    _changes(pg_db)
+
+    cat.title = "Bún chả"
+    assert _changes(pg_db) == {None: {"Category"}}
+
+    pg_db.delete(cat)
+    assert _changes(pg_db) == {None: {"Category"}}
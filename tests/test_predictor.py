@@ -1,14 +1,11 @@
 import json
-import sys
 from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 
-sys.path.append(str(Path(__file__).resolve().parents[1] / "app"))
-
-from api.routes import predictor
-from main import app
+from app.api.routes import predictor
+from app.main import app
 
 
 client = TestClient(app)
@@ -36,3 +33,90 @@ def test_health_endpoint(monkeypatch):
     response = client.get("/api/v1/health")
     assert response.status_code == 200
     assert response.json() == {"status": True}
+
+
+def test_predict_rows_makes_one_model_call(monkeypatch):
+    calls = []
+
+    def fake(matrix):
+        calls.append(matrix.shape)
+        return matrix[:, 0]
+
+    monkeypatch.setattr(predictor, "get_prediction", fake)
+    rows = [predictor.np.array([[float(i), 0, 0, 0, 0]]) for i in range(3)]
+    assert predictor.predict_rows(rows) == [0.0, 1.0, 2.0]
+    assert calls == [(3, 5)]
+
+
+def test_predict_batch_rows_and_columns(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda matrix: (matrix[:, 0] > 0).astype(float))
+    rows = [dict(sample_input(), feature1=v) for v in (1.0, -1.0)]
+
+    response = client.post("/api/v1/predict/batch", json={"rows": rows})
+    assert response.status_code == 200
+    assert response.json() == {"count": 2, "predictions": [1.0, 0.0], "prediction_labels": ["label ok", "label nok"]}
+
+    columns = {k: [r[k] for r in rows] for k in rows[0]}
+    assert client.post("/api/v1/predict/batch", json={"columns": columns}).json() == response.json()
+
+
+def test_predict_batch_empty(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda matrix: 1 / 0)
+    empty = {"count": 0, "predictions": [], "prediction_labels": []}
+    assert client.post("/api/v1/predict/batch", json={"rows": []}).json() == empty
+    columns = {k: [] for k in sample_input()}
+    assert client.post("/api/v1/predict/batch", json={"columns": columns}).json() == empty
+
+
+def test_predict_batch_npy(monkeypatch):
+    import io
+    monkeypatch.setattr(predictor, "get_prediction", lambda matrix: matrix.sum(axis=1))
+    buf = io.BytesIO()
+    predictor.np.save(buf, predictor.np.ones((3, 5)))
+    response = client.post(
+        "/api/v1/predict/batch", content=buf.getvalue(), headers={"content-type": "application/x-npy"}
+    )
+    assert response.status_code == 200
+    assert response.json()["predictions"] == [5.0, 5.0, 5.0]
+    bad = client.post("/api/v1/predict/batch", json={"rows": [[1, 2, 3]]})
+    assert bad.status_code == 422
+
+
+
+def test_predict_batch_refuses_oversized_bodies(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda matrix: 1 / 0)
+    monkeypatch.setattr(predictor, "PREDICT_BATCH_MAX_BYTES", 100)
+    rows = {"rows": [[1, 2, 3, 4, 5]] * 20}
+    assert client.post("/api/v1/predict/batch", json=rows).status_code == 413
+
+    # no Content-Length: cut off while streaming
+    def chunks():
+        yield json.dumps(rows).encode()
+
+    response = client.post("/api/v1/predict/batch", content=chunks(), headers={"content-type": "application/json"})
+    assert response.status_code == 413
+
+def test_predict_cache_is_tagged_with_model_version(monkeypatch):
+    calls = []
+
+    def fake(matrix):
+        calls.append(len(matrix))
+        return [1.0] * len(matrix)
+
+    monkeypatch.setattr(predictor, "get_prediction", fake)
+    monkeypatch.setattr(predictor.model, "model_version", "v1")
+    predictor.prediction_cache.clear()
+    body = dict(sample_input(), feature5=42.0)
+
+    assert client.post("/api/v1/predict", json=body).status_code == 200
+    assert client.post("/api/v1/predict", json=body).status_code == 200
+    assert calls == [1]
+
+    monkeypatch.setattr(predictor.model, "model_version", "v2")
+    assert client.post("/api/v1/predict", json=body).status_code == 200
+    assert calls == [1, 1]
+
+
+def test_liveness_does_no_model_work(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data_point: 1 / 0)
+    assert client.get("/api/v1/live").json() == {"status": True}
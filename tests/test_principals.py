@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import models
+from app.services import principals
+
+"""
+In order to test that auth-relevant user changes revoke tokens and evict cached principals
+"""
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.User.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def evicted(monkeypatch):
+    ids = []
+    monkeypatch.setattr(principals, "invalidate_principal", ids.append)
+    return ids
+
+
+def test_deactivation_bumps_version_and_evicts(db, evicted):
+    user = models.User(id=1, email="a@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    assert user.auth_version == 0
+
+    user.is_active = False
+    db.commit()
+
+    assert user.auth_version == 1
+    assert evicted == [1]
+
+
+def test_unrelated_change_keeps_tokens(db, evicted):
+    user = models.User(id=2, email="b@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+
+    user.phone = "0900000000"
+    db.commit()
+
+    assert user.auth_version == 0
+    assert evicted == []
+
+
+def test_rollback_discards_pending_eviction(db, evicted):
+    user = models.User(id=3, email="c@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+
+    user.role = "admin"
+    db.flush()
+    db.rollback()
+
+    assert evicted == []
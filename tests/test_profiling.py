@@ -0,0 +1,68 @@
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import profiling
+from app.core.profiling import ProfilingMiddleware
+
+"""
+In order to test on-demand request profiling (header trigger, admin arm, speedscope output)
+"""
+
+app = FastAPI()
+app.add_middleware(ProfilingMiddleware)
+
+
+def busy_work():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+@app.get("/slow")
+def slow():
+    busy_work()
+    return {"ok": True}
+
+
+client = TestClient(app)
+
+
+def test_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    response = client.get("/slow", headers={"X-Profile": "wrong"})
+    assert "x-profile-id" not in response.headers
+    assert profiling.list_profiles() == []
+
+
+def test_header_writes_speedscope_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    response = client.get("/slow", headers={"X-Profile": "s3cret", "X-Request-ID": "req-1"})
+    profile_id = response.headers["x-profile-id"]
+    assert profile_id.endswith("-req-1") and len(profile_id) == 32 + len("-req-1")
+
+    again = client.get("/slow", headers={"X-Profile": "s3cret", "X-Request-ID": "req-1"})
+    assert again.headers["x-profile-id"] != profile_id  # a client cannot overwrite a profile
+    assert len(profiling.list_profiles()) == 2
+
+    with open(profiling.profile_path(profile_id)) as f:
+        profile = json.load(f)
+    names = {frame["name"] for frame in profile["shared"]["frames"]}
+    assert "busy_work" in names
+    assert all(len(p["samples"]) == len(p["weights"]) for p in profile["profiles"])
+
+
+def test_armed_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    profiling.arm("/slow", minutes=1)
+    try:
+        assert "x-profile-id" in client.get("/slow").headers
+    finally:
+        profiling.disarm()
+    assert "x-profile-id" not in client.get("/slow").headers
+    assert profiling.profile_path("../etc/passwd") is None
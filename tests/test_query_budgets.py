@@ -0,0 +1,54 @@
+import pytest
+
+from app.models import models
+from app.services import weather
+
+"""
+In order to keep the hot read endpoints at a fixed number of queries, whatever the
+number of places (needs TEST_DATABASE_URL)
+"""
+
+
+@pytest.fixture
+def places(pg_db, make_place):
+    """Ten places with categories, hours, a menu and weather scores (the selectin relationships)."""
+    from datetime import time
+
+    cats = [models.Category(slug=f"c{i}", title=f"C{i}") for i in range(3)]
+    pg_db.add_all(cats)
+    out = []
+    for i in range(10):
+        place = make_place(f"Quán {i}", lon=105.83 + i / 1000, lat=21.02 + i / 1000, city="Hà Nội")
+        place.categories = cats[: 1 + i % 3]
+        place.opening_hours = [models.OpeningHour(weekday=d, opens=time(7), closes=time(22)) for d in range(7)]
+        place.menus = [models.Menu(title="Menu", items=[models.MenuItem(name="Phở bò", price=50000)])]
+        place.weather_scores = [models.PlaceWeatherScore(weather_bucket=b, score=0.5) for b in ("cool", "rain")]
+        out.append(place)
+    pg_db.flush()
+    pg_db.expunge_all()
+    return out
+
+
+def test_list_places(pg_client, places, query_budget):
+    with query_budget(6):
+        r = pg_client.get("/places/", params={"limit": 50})
+    assert len(r.json()) == 10
+
+
+def test_places_map(pg_client, places, query_budget):
+    with query_budget(6):
+        r = pg_client.get("/places/map", params={"lon": 105.83, "lat": 21.02, "radius_km": 5})
+    assert len(r.json()["features"]) == 10
+
+
+def test_weather_today(pg_client, places, fake_redis, monkeypatch, query_budget):
+    payload = {"main": {"temp": 24, "feels_like": 24, "humidity": 80}, "weather": [{"main": "Clouds"}]}
+    monkeypatch.setattr(weather, "_get_openweather", lambda path, lat, lon, client=None: payload)
+
+    with query_budget(1):
+        r = pg_client.get("/weather/today", params={"lat": 21.02, "lon": 105.83})
+    assert r.json()["bucket"] == "cool" and len(r.json()["places"]) == 10
+
+    # bucket list now cached: no query at all
+    with query_budget(0):
+        pg_client.get("/weather/today", params={"lat": 21.02, "lon": 105.83})
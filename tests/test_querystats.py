@@ -0,0 +1,80 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core import querystats
+from app.core.querystats import QueryStatsMiddleware, statement_shape
+from app.models import models
+
+"""
+In order to test per-request SQL counting, Server-Timing and N+1 detection
+"""
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+models.User.__table__.create(engine)
+with Session(engine) as s:
+    s.add_all(models.User(id=i, email=f"u{i}@example.com") for i in range(1, 6))
+    s.commit()
+
+
+def get_db():
+    with Session(engine) as db:
+        yield db
+
+
+app = FastAPI()
+app.add_middleware(QueryStatsMiddleware)
+
+
+@app.get("/one-query")
+def one_query(db: Session = Depends(get_db)):
+    return list(db.scalars(select(models.User.email)))
+
+
+@app.get("/n-plus-one")
+def n_plus_one(db: Session = Depends(get_db)):
+    ids = db.scalars(select(models.User.id)).all()
+    return [db.scalar(select(models.User.email).where(models.User.id == i)) for i in ids]
+
+
+client = TestClient(app)
+
+
+def test_server_timing_header():
+    response = client.get("/one-query")
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+
+
+def test_budget_passes(query_budget):
+    with query_budget(1):
+        client.get("/one-query")
+
+
+def test_budget_flags_n_plus_one(query_budget):
+    with pytest.raises(AssertionError, match="N\\+1"):
+        with query_budget(10):
+            client.get("/n-plus-one")
+
+
+def test_in_lists_share_a_shape():
+    a = "SELECT * FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)"
+    b = "SELECT * FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+    assert statement_shape(a) == statement_shape(b)
+
+
+def test_failed_statement_does_not_leak_start_time():
+    with engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.exec_driver_sql("SELECT nope FROM nowhere")
+        assert conn.info["query_start"] == []
+
+
+def test_failing_hook_does_not_fail_the_statement(monkeypatch):
+    def broken(*args):
+        raise RuntimeError("hook bug")
+
+    monkeypatch.setattr(querystats, "statement_hooks", [broken])
+    assert client.get("/one-query").status_code == 200
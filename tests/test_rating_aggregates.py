@@ -0,0 +1,73 @@
+from sqlalchemy import delete, insert, select, update
+
+from app.models import models
+from app.services import reviews_crud
+from app.services.reviews_crud import rebuild_rating_aggregates
+
+"""
+In order to test the review aggregates the triggers keep on places (needs TEST_DATABASE_URL)
+"""
+
+
+def _agg(db, place_id):
+    P = models.Place
+    row = db.execute(select(P.review_count, P.rating_sum, P.rating_score).where(P.id == place_id)).one()
+    return row.review_count, row.rating_sum, float(row.rating_score)
+
+
+def _review(db, place_id, rating):
+    return db.scalar(insert(models.Review).values(place_id=place_id, rating=rating).returning(models.Review.id))
+
+
+def test_insert_update_delete_keep_aggregates(pg_db, make_place):
+    a, b = make_place("A"), make_place("B")
+    assert _agg(pg_db, a.id) == (0, 0, 3.5)
+
+    pg_db.execute(insert(models.Review), [
+        {"place_id": a.id, "rating": 5}, {"place_id": a.id, "rating": 4},
+        {"place_id": a.id, "rating": None}, {"place_id": b.id, "rating": 1},
+    ])
+    assert _agg(pg_db, a.id) == (2, 9, round((9 + 17.5) / 7, 3))
+    assert _agg(pg_db, b.id)[:2] == (1, 1)
+
+    moved = _review(pg_db, a.id, 2)
+    pg_db.execute(update(models.Review).where(models.Review.id == moved).values(place_id=b.id, rating=3))
+    assert _agg(pg_db, a.id)[:2] == (2, 9)
+    assert _agg(pg_db, b.id)[:2] == (2, 4)
+
+    pg_db.execute(delete(models.Review).where(models.Review.place_id == b.id))
+    assert _agg(pg_db, b.id) == (0, 0, 3.5)
+
+
+def test_rebuild_repairs_drifted_aggregates(pg_db, make_place, monkeypatch):
+    notified = []
+    monkeypatch.setattr(reviews_crud, "notify_places_changed", notified.append)
+    a, b = make_place("A"), make_place("B")
+    _review(pg_db, a.id, 5)
+    _review(pg_db, b.id, 2)
+    P = models.Place
+    pg_db.execute(update(P).where(P.id.in_([a.id, b.id])).values(review_count=7, rating_sum=30))
+
+    rebuild_rating_aggregates(pg_db, [a.id])
+    assert _agg(pg_db, a.id)[:2] == (1, 5)
+    assert _agg(pg_db, b.id)[:2] == (7, 30)
+
+    rebuild_rating_aggregates(pg_db)
+    assert _agg(pg_db, b.id)[:2] == (1, 2)
+    assert notified == [{a.id: {"Review"}}, {None: {"Review"}}]
+
+
+def test_list_sort_and_min_rating_use_rating_score(pg_db, pg_client, make_place):
+    good, ok, unrated = make_place("Good"), make_place("Ok"), make_place("Unrated")
+    for rating in (5, 5, 5, 5):
+        _review(pg_db, good.id, rating)
+    for rating in (5, 4):
+        _review(pg_db, ok.id, rating)
+
+    names = [p["name"] for p in pg_client.get("/places/", params={"sort": "rating"}).json()]
+    assert names == ["Good", "Ok", "Unrated"]
+    # Good: (20 + 17.5) / 9 = 4.167, Ok: (9 + 17.5) / 7 = 3.786, Unrated: 3.5
+    names = [p["name"] for p in pg_client.get("/places/", params={"min_rating": 3.6, "sort": "rating"}).json()]
+    assert names == ["Good", "Ok"]
+    names = [p["name"] for p in pg_client.get("/places/", params={"min_rating": 4}).json()]
+    assert names == ["Good"]
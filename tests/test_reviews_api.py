@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.deps import get_current_principal
+from app.main import app
+from app.models import models
+from app.services import reviews_crud
+from app.services.principals import Principal
+
+"""
+In order to test review listing (keyset pages) and batched review writes (needs TEST_DATABASE_URL)
+"""
+
+
+@pytest.fixture
+def writes_in_test_db(pg_db, monkeypatch):
+    """Batched writes open their own session: put it on the test's connection."""
+    monkeypatch.setattr(
+        reviews_crud, "SessionLocal",
+        lambda: Session(bind=pg_db.connection(), join_transaction_mode="create_savepoint"),
+    )
+    notified = []
+    monkeypatch.setattr(reviews_crud, "notify_places_changed", notified.append)
+    return notified
+
+
+def test_keyset_pages_across_equal_timestamps(pg_db, pg_client, make_place):
+    place = make_place("A")
+    same = datetime(2024, 10, 18, 12, 0, tzinfo=timezone.utc)
+    pg_db.execute(insert(models.Review), [{"place_id": place.id, "rating": 4, "created_at": same} for _ in range(5)])
+    pg_db.execute(insert(models.Review).values(place_id=place.id, rating=5, created_at=datetime(2024, 10, 19, tzinfo=timezone.utc)))
+
+    seen, cursor = [], None
+    while True:
+        body = pg_client.get(f"/places/{place.id}/reviews", params={"limit": 2, "cursor": cursor}).json()
+        seen += [(r["created_at"], r["id"]) for r in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 6 and len(set(seen)) == 6
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_bad_cursor_and_missing_place(pg_client, make_place):
+    place = make_place("A")
+    assert pg_client.get(f"/places/{place.id}/reviews", params={"cursor": "not a cursor!"}).status_code == 400
+    assert pg_client.get(f"/places/{place.id}/reviews").json() == {"items": [], "next_cursor": None}
+    assert pg_client.get(f"/places/{place.id + 1000}/reviews").status_code == 404
+
+
+def test_mixed_batch_fails_only_missing_places(pg_db, make_place, writes_in_test_db):
+    a, b = make_place("A"), make_place("B")
+    rows = [
+        {"place_id": a.id, "user_id": None, "rating": 5, "content": "ngon"},
+        {"place_id": b.id + 1000, "user_id": None, "rating": 1, "content": None},
+        {"place_id": b.id, "user_id": None, "rating": 3, "content": None},
+    ]
+    results = reviews_crud.write_reviews(rows)
+
+    assert [r["place_id"] for r in (results[0], results[2])] == [a.id, b.id]
+    assert results[1].status_code == 404
+    assert writes_in_test_db == [{a.id: {"Review"}, b.id: {"Review"}}]
+    pg_db.refresh(a)
+    assert (a.review_count, a.rating_sum) == (1, 5)
+
+
+def test_post_review(pg_db, pg_client, make_place, writes_in_test_db):
+    place = make_place("A")
+    user = models.User(email="reviewer@example.com")
+    pg_db.add(user)
+    pg_db.flush()
+    app.dependency_overrides[get_current_principal] = lambda: Principal(id=user.id)
+    try:
+        created = pg_client.post(f"/places/{place.id}/reviews", json={"rating": 4, "content": "ok"})
+        missing = pg_client.post(f"/places/{place.id + 1000}/reviews", json={"rating": 4})
+    finally:
+        app.dependency_overrides.pop(get_current_principal)
+    assert created.status_code == 201 and created.json()["user_id"] == user.id
+    assert missing.status_code == 404
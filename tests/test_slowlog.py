@@ -0,0 +1,77 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app.core import querystats, slowlog
+from app.core.slowlog import SlowQueryLog, plan_signature
+from app.models import models
+
+"""
+In order to test slow-query capture (threshold, cooldown, scrubbing, storage)
+"""
+
+# a file, not :memory: - the capture thread needs its own connection
+engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'slowlog.db')}")
+models.User.__table__.create(engine)
+models.SlowQuery.__table__.create(engine)
+
+
+def _captured():
+    with Session(engine) as s:
+        return s.scalars(select(models.SlowQuery).order_by(models.SlowQuery.id)).all()
+
+
+def test_captures_once_per_shape_with_scrubbed_params():
+    log = SlowQueryLog(threshold_ms=0.001, sample=1.0, cooldown=60)
+    slowlog.enable(log)
+    try:
+        with engine.begin() as conn:
+            for i in range(3):
+                conn.execute(
+                    text("SELECT id FROM users WHERE email = :email AND password_hash = :password_hash"),
+                    {"email": f"u{i}@example.com", "password_hash": "secret"},
+                )
+        log.flush()
+    finally:
+        slowlog.disable(log)
+
+    rows = [r for r in _captured() if "FROM users" in r.statement]
+    assert len(rows) == 1
+    assert rows[0].parameters[0] == "u0@example.com"
+    assert log.capture not in querystats.statement_hooks
+
+
+def test_secrets_are_masked():
+    scrubbed = slowlog._scrub({"email": "a@b.c", "password_hash": "$2b$12$x", "q": "x" * 500})
+    assert scrubbed["password_hash"] == "***"
+    assert scrubbed["email"] == "a@b.c" and len(scrubbed["q"]) == 200
+
+
+def test_below_threshold_is_ignored():
+    log = SlowQueryLog(threshold_ms=10_000, sample=1.0, cooldown=0)
+    assert not log.capture(None, "SELECT 1", {}, 5.0, "GET /")
+
+
+def test_plan_signature_ignores_costs():
+    a = "Limit  (cost=0.1..8.2 rows=20)\n  ->  Index Scan using idx_places_geom on places  (cost=0.1..80 rows=200)\n        Filter: (is_public)"
+    b = "Limit  (cost=0.3..9.9 rows=10)\n  ->  Index Scan using idx_places_geom on places  (cost=0.3..99 rows=100)\n        Filter: (is_public)"
+    c = "Limit  (cost=0.1..8.2 rows=20)\n  ->  Seq Scan on places  (cost=0.1..8000 rows=200)"
+    assert plan_signature(a) == plan_signature(b) != plan_signature(c)
+
+
+def test_cooldown_entries_are_pruned(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(slowlog.time, "monotonic", lambda: clock[0])
+    log = SlowQueryLog(threshold_ms=0, sample=1.0, cooldown=60)
+    monkeypatch.setattr(log, "_ensure_worker", lambda: None)
+    conn = SimpleNamespace(engine=engine)
+
+    for i in range(50):
+        assert log.capture(conn, f"SELECT {i} FROM t{i}", None, 1.0, None)
+    assert len(log._last_seen) == 50
+    clock[0] += 61
+    assert log.capture(conn, "SELECT 1 FROM later", None, 1.0, None)
+    assert list(log._last_seen) == ["SELECT 1 FROM later"]
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, insert, inspect
+
+from app.core import startup
+from app.core.startup import ensure_schema
+from app.models import models
+
+"""
+In order to test the boot-time schema check (stamp mode)
+"""
+
+
+@pytest.fixture
+def create_all(monkeypatch):
+    """Calls to ``Base.metadata.create_all`` (stubbed: the models need PostGIS)."""
+    monkeypatch.setattr(startup, "SCHEMA_CHECK", "stamp")
+    calls = []
+    monkeypatch.setattr(models.Base.metadata, "create_all", lambda **kw: calls.append(kw))
+    return calls
+
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://")
+
+
+def test_current_version_skips_create_all(engine, create_all):
+    models.SchemaVersion.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.SchemaVersion).values(version=models.SCHEMA_VERSION))
+    ensure_schema(engine)
+    assert create_all == []
+
+
+@pytest.mark.parametrize("stamped", [None, 7])
+def test_existing_database_without_migrations_fails_fast(engine, create_all, stamped):
+    models.User.__table__.create(engine)
+    if stamped is not None:
+        models.SchemaVersion.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(models.SchemaVersion).values(version=stamped))
+    with pytest.raises(RuntimeError, match="apply db/migrations/"):
+        ensure_schema(engine)
+    assert create_all == []
+
+
+def test_empty_version_table_on_existing_database_fails_fast(engine, create_all):
+    # a pre-versioning database that once ran create_all: tables, no version row
+    models.User.__table__.create(engine)
+    models.SchemaVersion.__table__.create(engine)
+    with pytest.raises(RuntimeError, match="from 001"):
+        ensure_schema(engine)
+    assert create_all == []
+
+
+def test_fresh_database_is_created_and_stamped(engine, create_all):
+    models.SchemaVersion.__table__.create(engine)  # stands in for what create_all builds
+    ensure_schema(engine)
+    assert len(create_all) == 1
+    assert "schema_version" in inspect(engine).get_table_names()
+    ensure_schema(engine)
+    assert len(create_all) == 1
@@ -0,0 +1,40 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from app.core.traffic import TrafficRecorderMiddleware, install_sink, scrub_query
+
+"""
+In order to test traffic recording (route template, scrubbing, auth flag)
+"""
+
+app = FastAPI()
+app.add_middleware(TrafficRecorderMiddleware, sample=1.0)
+
+
+@app.get("/places/{place_id}")
+def get_place(place_id: int):
+    return {"id": place_id}
+
+
+def test_scrub_query():
+    q = scrub_query(b"lat=21.028511&lon=105.804817&q=b%C3%BAn%20ch%E1%BA%A3%200912345678&email=a%40b.c&token=x")
+    assert q == {"lat": "21.03", "lon": "105.80", "q": "bún chả #"}
+
+
+def test_records_request_shape(tmp_path):
+    path = tmp_path / "traffic.log"
+    handler = install_sink(str(path))
+    try:
+        TestClient(app).get("/places/7?radius_km=2", headers={"Authorization": "Bearer secret"})
+        logger.complete()
+    finally:
+        logger.remove(handler)
+
+    (line,) = path.read_text().splitlines()
+    record = json.loads(line)
+    assert record["r"] == "/places/{place_id}" and record["p"] == "/places/7"
+    assert record["q"] == {"radius_km": "2"} and record["a"] == 1 and record["s"] == 200
+    assert "secret" not in line
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import weather as weather_routes
+from app.database import get_db
+from app.main import app
+from app.services import weather, weather_crud
+from app.services.weather import hourly_from_slots
+
+"""
+In order to test the weather fetch/parse helpers and routes against a stubbed upstream
+"""
+
+
+def _payload(feels_like, condition="Clouds", dt=None):
+    entry = {
+        "main": {"temp": feels_like, "feels_like": feels_like, "humidity": 70},
+        "weather": [{"main": condition}],
+    }
+    if dt is not None:
+        entry["dt"] = dt
+    return entry
+
+
+@pytest.fixture
+def upstream(fake_redis, monkeypatch):
+    """Fake OpenWeather: ``upstream.replies[cell]`` is a payload or an exception."""
+
+    class Upstream:
+        replies = {}
+        forecast = {"list": []}
+        calls = []
+
+    def fake_get(path, lat, lon, client=None):
+        Upstream.calls.append((path, lat, lon))
+        if path == "forecast":
+            return Upstream.forecast
+        reply = Upstream.replies.get((lat, lon), _payload(25))
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(weather, "_get_openweather", fake_get)
+    return Upstream
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No database: bucket candidates come back empty
+    monkeypatch.setattr(weather_routes.crud, "find_places_for_buckets", lambda db, buckets: {b: [] for b in buckets})
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_fetch_many_dedups_grid_cells(upstream):
+    out = weather.fetch_weather_many([(21.02781, 105.83421), (21.02779, 105.83419), (10.7626, 106.6602)])
+    assert set(out) == {(21.028, 105.834), (10.763, 106.66)}
+    assert len(upstream.calls) == 2
+
+
+def test_fetch_many_keeps_failures_per_cell(upstream):
+    upstream.replies = {(10.763, 106.66): httpx.ConnectError("down")}
+    out = weather.fetch_weather_many([(21.0278, 105.8342), (10.7626, 106.6602)])
+    assert weather.parse_weather(out[(21.028, 105.834)])[1] == 25
+    assert isinstance(out[(10.763, 106.66)], httpx.ConnectError)
+
+
+def test_batch_reports_partial_upstream_failure(upstream, client):
+    upstream.replies = {
+        (10.763, 106.66): httpx.ConnectError("down"),
+        (16.054, 108.202): {"main": {}},  # malformed
+    }
+    points = [
+        {"lat": 21.0278, "lon": 105.8342}, {"lat": 21.02779, "lon": 105.83419},
+        {"lat": 10.7626, "lon": 106.6602}, {"lat": 16.0544, "lon": 108.2022},
+    ]
+    r = client.post("/weather/batch", json={"points": points})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [p["bucket"] for p in results[:2]] == ["cool", "cool"]
+    assert results[2]["error"] == "down"
+    assert results[3]["error"] == "OpenWeather: malformed response"
+    assert len(upstream.calls) == 3
+
+
+def _slot(at, temp, humidity=60, condition="clouds"):
+    return {"time": at, "temp_c": temp, "feels_like_c": temp, "humidity": humidity, "condition": condition}
+
+
+def test_hourly_interpolates_between_3h_slots():
+    t0 = datetime(2026, 6, 1, 3, tzinfo=timezone.utc)
+    slots = [_slot(t0, 30, 60), _slot(t0 + timedelta(hours=3), 24, 90, "rain")]
+    hourly = hourly_from_slots(slots, start=t0 - timedelta(hours=1, minutes=20), hours=6)
+
+    assert [h["time"] for h in hourly] == [t0 + timedelta(hours=n) for n in range(-2, 4)]
+    # before the first slot and from the last one on: the slot as is
+    assert [h["temp_c"] for h in hourly] == [30, 30, 30, 28, 26, 24]
+    assert [h["humidity"] for h in hourly] == [60, 60, 60, 70, 80, 90]
+    assert [h["condition"] for h in hourly] == ["clouds"] * 5 + ["rain"]
+
+
+def test_forecast_route_buckets_each_hour(upstream, client):
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    upstream.forecast = {"list": [
+        _payload(34, dt=int(now.timestamp())),
+        _payload(22, "Rain", dt=int((now + timedelta(hours=3)).timestamp())),
+    ]}
+    r = client.get("/weather/forecast", params={"hours": 4})
+    assert r.status_code == 200
+    body = r.json()
+    assert [h["feels_like_c"] for h in body["hours"]] == [34, 30, 26, 22]
+    assert [h["bucket"] for h in body["hours"]] == ["hot", "warm", "cool", "rain"]
+    assert set(body["recommendations"]) == {"hot", "warm", "cool", "rain"}
+    assert upstream.calls == [("forecast", 21.03, 105.83)]
+
+
+def test_bucket_list_loaded_across_an_invalidation_is_not_cached(fake_redis, monkeypatch):
+    loads = []
+
+    def load(db, buckets, city_like):
+        loads.append(list(buckets))
+        if len(loads) == 1:
+            weather_crud.invalidate_bucket_cache()  # a place changed while we were loading
+        return {b: [{"id": len(loads)}] for b in buckets}
+
+    monkeypatch.setattr(weather_crud, "_load_candidates", load)
+
+    assert weather_crud.find_places_for_buckets(None, ["rain"]) == {"rain": [{"id": 1}]}
+    assert weather_crud.find_places_for_buckets(None, ["rain"]) == {"rain": [{"id": 2}]}
+    assert weather_crud.find_places_for_buckets(None, ["rain"]) == {"rain": [{"id": 2}]}
+    assert len(loads) == 2
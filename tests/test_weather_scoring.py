@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+import pytest
+
+from app.services.weather_scoring import BUCKETS, score_matrix
+
+"""
+In order to test the vectorized weather score computation
+"""
+
+PlaceRow = namedtuple("PlaceRow", "id name rating price_level")
+
+
+def _col(bucket):
+    return BUCKETS.index(bucket)
+
+
+def test_menu_tags_drive_bucket_scores():
+    places = [PlaceRow(1, "Quán Lẩu Nấm", 4.0, 2), PlaceRow(2, "Kem Tràng Tiền", 4.0, 2)]
+    items = [(1, "Lẩu nấm", ["lẩu"]), (2, "Kem ốc quế", ["kem"])]
+    scores = score_matrix(places, items, [])
+
+    assert scores[0, _col("cold")] > scores[0, _col("hot")]
+    assert scores[1, _col("hot")] > scores[1, _col("cold")]
+
+
+def test_terms_match_on_word_boundaries_only():
+    places = [PlaceRow(1, "Quán Chén", None, None)]
+    scores = score_matrix(places, [(1, "Chén ngọc", None)], [])
+    # "chè" folds to "che" and must not match inside "chen"
+    assert scores[0, _col("hot")] == scores[0, _col("cool")]
+
+
+def test_categories_count_and_scores_are_bounded():
+    places = [PlaceRow(1, "A", 5.0, 1), PlaceRow(2, "B", None, None)]
+    cats = [(1, "pho", "Phở"), (1, "bun-rieu", "Bún riêu")]
+    scores = score_matrix(places, [], cats)
+
+    assert scores[0, _col("rain")] > scores[1, _col("rain")]
+    assert ((scores >= 0) & (scores <= 1)).all()
+
+
+def test_dirty_queue_is_drained_periodically(monkeypatch):
+    import asyncio
+
+    from app.services import weather_scoring
+
+    runs = []
+
+    def fake_recompute(db):
+        runs.append(db)
+        if len(runs) == 2:
+            raise RuntimeError("db down")  # logged, the loop keeps going
+        return 0
+
+    monkeypatch.setattr(weather_scoring, "recompute_dirty", fake_recompute)
+
+    async def main():
+        task = asyncio.create_task(weather_scoring.watch_dirty_scores(0.01))
+        while len(runs) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+    assert len(runs) >= 3
+
+
+def test_recompute_dirty_requeues_on_failure(fake_redis, monkeypatch):
+    from app.services import weather_scoring
+
+    scored = []
+
+    def fake_scores(db, place_ids=None):
+        scored.append(sorted(place_ids))
+        if len(scored) == 1:
+            fake_redis.sadd(weather_scoring._DIRTY_KEY, "3")  # marked while scoring
+            raise RuntimeError("db down")
+        return len(place_ids)
+
+    monkeypatch.setattr(weather_scoring, "recompute_scores", fake_scores)
+    fake_redis.sadd(weather_scoring._DIRTY_KEY, "1", "2")
+
+    with pytest.raises(RuntimeError):
+        weather_scoring.recompute_dirty(None)
+    assert fake_redis.data == {weather_scoring._DIRTY_KEY: {"1", "2", "3"}}
+
+    assert weather_scoring.recompute_dirty(None) == 3
+    assert scored[-1] == [1, 2, 3]
+    assert fake_redis.data == {}
+    assert weather_scoring.recompute_dirty(None) == 0